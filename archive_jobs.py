@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Move old terminal jobs (COMPLETED, DEAD_LETTER) from jobs to jobs_archive
+
+Run daily (cron / Cloud Scheduler). Settings: ARCHIVE_AFTER_DAYS,
+ARCHIVE_BATCH_SIZE, ARCHIVE_PAUSE_SECONDS, ARCHIVE_MAX_SECONDS.
+"""
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.logging_config import get_logger
+from src.archival import archive_cutoff, count_archivable, run_archival
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, help='Archive jobs last updated more than this many days ago')
+    parser.add_argument('--batch-size', type=int, help='Jobs per transaction')
+    parser.add_argument('--pause', type=float, help='Seconds to sleep between batches')
+    parser.add_argument('--max-seconds', type=float, help='Stop after this long (0 = until drained)')
+    parser.add_argument('--dry-run', action='store_true', help='Only count eligible jobs')
+    args = parser.parse_args()
+    
+    try:
+        if args.dry_run:
+            cutoff = archive_cutoff(args.days)
+            print(f"{count_archivable(cutoff)} jobs last updated before {cutoff.isoformat()}")
+            sys.exit(0)
+        
+        result = run_archival(
+            after_days=args.days,
+            batch_size=args.batch_size,
+            pause_seconds=args.pause,
+            max_seconds=args.max_seconds
+        )
+        logger.info("✅ Job archival finished", **result)
+    except Exception as e:
+        logger.error(f"❌ Job archival failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+API microbenchmarks: src/api.py in-process through httpx's ASGI transport
+
+Runs each endpoint case sequentially (no network, no server, startup tasks
+not run) against the configured database, grown to each dataset size in
+turn with seeded jobs (one message.received event each, statuses mixed
+like production, created over the last --days days):
+
+    list_jobs   ... page 1 and a deep page (--deep-fraction into the
+                    filtered rows), unfiltered and per status, with the
+                    list cache cleared before each request, plus page 1
+                    served from cache
+    get_job     ... cache hit and cache miss (job key deleted first)
+    job_stats   ... recomputed (aggregation key deleted first) and cached
+    job_events  ... events of a random seeded job
+
+Each request's time is split into DB (statement execution, from the query
+profiler's histogram), cache (Redis operations, from the cache latency
+histogram), serialization (FastAPI response validation/encoding and JSON
+rendering) and other (routing, dependencies, ORM and pydantic work inside
+the handler, the threadpool hop), so a regression can be pinned to a layer.
+
+Seeded jobs stay in the database and count towards the next run's size:
+point DB_NAME at a scratch database. Seeding 10M jobs takes a while.
+
+Usage:
+    python benchmarks/api_bench.py --datasets 10k --iterations 100
+    DB_NAME=cuida_bench python benchmarks/api_bench.py --datasets 10k,1m,10m --deep-iterations 5 --output api.json
+    python benchmarks/api_bench.py --datasets 10k --cases get_job,list_jobs
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import fastapi.routing
+import httpx
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+
+from src.api import app
+from src.cache import CacheKey, cache_delete, cache_latency, invalidate_job
+from src.database import close_db_connections, get_engine
+from src.ids import new_id
+from src.ingest import ingest
+from src.models import JobStatus
+from src.query_profiler import query_duration
+
+CASES = ('list_jobs', 'get_job', 'job_stats', 'job_events')
+
+DATASETS = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Status mix of seeded jobs
+SEED_STATUSES = [
+    (JobStatus.COMPLETED, 0.80),
+    (JobStatus.PENDING, 0.10),
+    (JobStatus.FAILED, 0.05),
+    (JobStatus.PROCESSING, 0.04),
+    (JobStatus.DEAD_LETTER, 0.01),
+]
+SEED_CHUNK = 50_000
+SEED_PAYLOADS = 100  # distinct payloads (the payload store dedupes the rest)
+
+# Job ids drawn for get_job / job_events
+SAMPLE_JOBS = 200
+
+# Seconds spent serializing responses, accumulated by the wrappers below
+_serialize_seconds = 0.0
+
+
+def _timed_serialize(serialize):
+    async def wrapper(*args, **kwargs):
+        global _serialize_seconds
+        start = time.perf_counter()
+        try:
+            return await serialize(*args, **kwargs)
+        finally:
+            _serialize_seconds += time.perf_counter() - start
+    return wrapper
+
+
+def _timed_render(render):
+    def wrapper(self, content):
+        global _serialize_seconds
+        start = time.perf_counter()
+        try:
+            return render(self, content)
+        finally:
+            _serialize_seconds += time.perf_counter() - start
+    return wrapper
+
+
+fastapi.routing.serialize_response = _timed_serialize(fastapi.routing.serialize_response)
+JSONResponse.render = _timed_render(JSONResponse.render)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def histogram_totals(histogram) -> Tuple[float, float]:
+    """(sum, count) over every label set of a histogram"""
+    total = count = 0.0
+    for metric in histogram.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_sum'):
+                total += sample.value
+            elif sample.name.endswith('_count'):
+                count += sample.value
+    return total, count
+
+
+def layer_totals() -> Dict[str, float]:
+    db_seconds, db_statements = histogram_totals(query_duration)
+    cache_seconds, cache_ops = histogram_totals(cache_latency)
+    return {
+        'db': db_seconds, 'db_statements': db_statements,
+        'cache': cache_seconds, 'cache_ops': cache_ops,
+        'serialize': _serialize_seconds,
+    }
+
+
+def count_jobs() -> int:
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM jobs")).scalar()
+
+
+def seed_records(rows: int, days: float, rng: random.Random):
+    """Job and event records, oldest first"""
+    statuses, weights = zip(*SEED_STATUSES)
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=days)
+    step = (end - start) / max(rows, 1)
+    for i in range(rows):
+        created_at = start + step * i
+        status = rng.choices(statuses, weights)[0]
+        job_id = new_id()
+        finished = status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.DEAD_LETTER)
+        yield (
+            {
+                'job_id': job_id, 'message_id': f'bench-{i}', 'status': status,
+                'payload': {'data': f'bench payload {i % SEED_PAYLOADS}', 'attributes': {}},
+                'result': {'processed': True} if status == JobStatus.COMPLETED else None,
+                'error_message': 'bench failure' if status in (JobStatus.FAILED, JobStatus.DEAD_LETTER) else None,
+                'retry_count': 3 if status == JobStatus.DEAD_LETTER else 0, 'max_retries': 3,
+                'created_at': created_at, 'updated_at': created_at,
+                'started_at': created_at if status != JobStatus.PENDING else None,
+                'completed_at': created_at + timedelta(milliseconds=rng.randint(5, 500)) if finished else None,
+                'source': 'bench', 'priority': 0,
+            },
+            {
+                'event_id': new_id(), 'event_type': 'message.received', 'job_id': job_id,
+                'data': {'message_id': f'bench-{i}'}, 'event_metadata': {'attributes': {}}, 'timestamp': created_at,
+            },
+        )
+
+
+def seed(target: int, days: float, rng: random.Random) -> dict:
+    """Add seeded jobs until the jobs table holds target rows"""
+    existing = count_jobs()
+    missing = max(target - existing, 0)
+    start = time.perf_counter()
+    records = seed_records(missing, days, rng)
+    while True:
+        chunk = [record for _, record in zip(range(SEED_CHUNK), records)]
+        if not chunk:
+            break
+        ingest('jobs', [job for job, _ in chunk], chunk_rows=SEED_CHUNK)
+        ingest('event_logs', [event for _, event in chunk], chunk_rows=SEED_CHUNK)
+        existing += len(chunk)
+        print(f"seeded {existing}/{target} jobs", file=sys.stderr)
+    if missing:
+        with get_engine().begin() as conn:
+            conn.execute(text("ANALYZE jobs"))
+            conn.execute(text("ANALYZE event_logs"))
+    return {'seeded': missing, 'seed_seconds': round(time.perf_counter() - start, 1)}
+
+
+def sample_job_ids(rng: random.Random) -> List[str]:
+    """Random job ids, found by probing random primary keys"""
+    with get_engine().connect() as conn:
+        low, high = conn.execute(text("SELECT min(id), max(id) FROM jobs")).one()
+        if low is None:
+            return []
+        probes = [rng.randint(low, high) for _ in range(SAMPLE_JOBS * 4)]
+        ids = conn.execute(
+            text("SELECT job_id FROM jobs WHERE id = ANY(:ids) LIMIT :limit"),
+            {'ids': probes, 'limit': SAMPLE_JOBS}
+        ).scalars().all()
+    return [str(job_id) for job_id in ids]
+
+
+def status_counts() -> Dict[Optional[str], int]:
+    with get_engine().connect() as conn:
+        rows = conn.execute(text("SELECT status, count(*) FROM jobs GROUP BY status")).all()
+    # The column holds enum names (COMPLETED); the API filters by value (completed)
+    counts = {JobStatus[status].value if status in JobStatus.__members__ else status: count for status, count in rows}
+    counts[None] = sum(counts.values())
+    return counts
+
+
+def build_cases(selected, page_size: int, deep_fraction: float, job_ids: List[str], rng: random.Random,
+                iterations: int, deep_iterations: int) -> List[dict]:
+    """Case name, URL per iteration, preparation per iteration and iteration count"""
+    cases = []
+    if 'list_jobs' in selected:
+        counts = status_counts()
+        for status in [None] + [status.value for status in JobStatus]:
+            label = status or 'all'
+            suffix = f'&status={status}' if status else ''
+            deep_page = max(int(counts.get(status, 0) * deep_fraction) // page_size, 1)
+            pages = [('page1', 1, iterations)]
+            if deep_page > 1:
+                pages.append((f'page{deep_page}', deep_page, deep_iterations))
+            for name, page, runs in pages:
+                key = CacheKey.job_list(status, page, page_size)
+                cases.append({
+                    'name': f'list_jobs[{label},{name}]',
+                    'url': lambda i, page=page, suffix=suffix: f'/api/v1/jobs?page={page}&limit={page_size}{suffix}',
+                    'prepare': lambda i, key=key: cache_delete(key),
+                    'iterations': runs,
+                })
+        cases.append({
+            'name': 'list_jobs[all,page1,cached]',
+            'url': lambda i: f'/api/v1/jobs?page=1&limit={page_size}',
+            'prepare': None,
+            'iterations': iterations,
+        })
+    if job_ids and 'get_job' in selected:
+        hits = [rng.choice(job_ids) for _ in range(iterations)]
+        misses = [rng.choice(job_ids) for _ in range(iterations)]
+        cases.append({
+            'name': 'get_job[hit]',
+            'url': lambda i: f'/api/v1/jobs/{hits[i % len(hits)]}',
+            'prime': [f'/api/v1/jobs/{job_id}' for job_id in set(hits)],
+            'prepare': None,
+            'iterations': iterations,
+        })
+        cases.append({
+            'name': 'get_job[miss]',
+            'url': lambda i: f'/api/v1/jobs/{misses[i % len(misses)]}',
+            'prepare': lambda i: invalidate_job(misses[i % len(misses)]),
+            'iterations': iterations,
+        })
+    if 'job_stats' in selected:
+        key = CacheKey.aggregation('job_stats', 'all')
+        cases.append({
+            'name': 'job_stats[recompute]',
+            'url': lambda i: '/api/v1/jobs/stats/summary',
+            'prepare': lambda i: cache_delete(key),
+            'iterations': deep_iterations,
+        })
+        cases.append({
+            'name': 'job_stats[cached]',
+            'url': lambda i: '/api/v1/jobs/stats/summary',
+            'prepare': None,
+            'iterations': iterations,
+        })
+    if job_ids and 'job_events' in selected:
+        picks = [rng.choice(job_ids) for _ in range(iterations)]
+        cases.append({
+            'name': 'job_events',
+            'url': lambda i: f'/api/v1/events/{picks[i % len(picks)]}',
+            'prepare': None,
+            'iterations': iterations,
+        })
+    return cases
+
+
+async def measure(client: httpx.AsyncClient, case: dict, warmup: int) -> dict:
+    for url in case.get('prime', []):
+        await client.get(url)
+    
+    totals, layers = [], {'db': [], 'cache': [], 'serialize': [], 'other': []}
+    statements, cache_ops, errors = [], [], {}
+    for i in range(warmup + case['iterations']):
+        if case['prepare']:
+            case['prepare'](i)
+        before = layer_totals()
+        start = time.perf_counter()
+        response = await client.get(case['url'](i))
+        elapsed = time.perf_counter() - start
+        after = layer_totals()
+        if i < warmup:
+            continue
+        if response.status_code != 200:
+            errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+            continue
+        
+        spent = {layer: after[layer] - before[layer] for layer in ('db', 'cache', 'serialize')}
+        spent['other'] = max(elapsed - sum(spent.values()), 0.0)
+        totals.append(elapsed)
+        for layer, seconds in spent.items():
+            layers[layer].append(seconds)
+        statements.append(after['db_statements'] - before['db_statements'])
+        cache_ops.append(after['cache_ops'] - before['cache_ops'])
+    
+    def mean_ms(values):
+        return round(sum(values) / len(values) * 1000, 3) if values else None
+    
+    return {
+        'case': case['name'],
+        'requests': len(totals),
+        'errors': errors,
+        'p50_ms': round(percentile(totals, 50) * 1000, 3) if totals else None,
+        'p95_ms': round(percentile(totals, 95) * 1000, 3) if totals else None,
+        'p99_ms': round(percentile(totals, 99) * 1000, 3) if totals else None,
+        'mean_ms': mean_ms(totals),
+        'db_ms': mean_ms(layers['db']),
+        'cache_ms': mean_ms(layers['cache']),
+        'serialize_ms': mean_ms(layers['serialize']),
+        'other_ms': mean_ms(layers['other']),
+        'db_statements': round(sum(statements) / len(statements), 2) if statements else None,
+        'cache_ops': round(sum(cache_ops) / len(cache_ops), 2) if cache_ops else None,
+    }
+
+
+async def run_cases(cases: List[dict], warmup: int, progress: Callable[[dict], None]) -> List[dict]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        results = []
+        for case in cases:
+            result = await measure(client, case, warmup)
+            progress(result)
+            results.append(result)
+        return results
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    selected = set(args.cases.split(','))
+    unknown = selected - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown cases: {', '.join(sorted(unknown))}")
+    
+    datasets = []
+    for name in args.datasets.split(','):
+        size = DATASETS[name.strip().lower()]
+        seeding = seed(size, args.days, rng)
+        job_ids = sample_job_ids(rng)
+        cases = build_cases(selected, args.page_size, args.deep_fraction, job_ids, rng,
+                            args.iterations, args.deep_iterations)
+        results = asyncio.run(run_cases(cases, args.warmup, lambda result: print(
+            f"[{name}] {result['case']}: p50 {result['p50_ms']} ms "
+            f"(db {result['db_ms']}, cache {result['cache_ms']}, serialize {result['serialize_ms']})",
+            file=sys.stderr
+        )))
+        datasets.append({'dataset': name, 'jobs': count_jobs(), **seeding, 'results': results})
+    
+    close_db_connections()
+    return {
+        'benchmark': 'api_bench',
+        'page_size': args.page_size,
+        'deep_fraction': args.deep_fraction,
+        'iterations': args.iterations,
+        'deep_iterations': args.deep_iterations,
+        'datasets': datasets,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datasets', default='10k', help=f"comma-separated sizes, grown in order ({', '.join(DATASETS)})")
+    parser.add_argument('--cases', default=','.join(CASES), help='comma-separated endpoints to run')
+    parser.add_argument('--iterations', type=int, default=50, help='measured requests per case')
+    parser.add_argument('--deep-iterations', type=int, default=10,
+                        help='measured requests for deep list pages and stats recomputes')
+    parser.add_argument('--warmup', type=int, default=3, help='unmeasured requests per case')
+    parser.add_argument('--page-size', type=int, default=10, help='list_jobs limit')
+    parser.add_argument('--deep-fraction', type=float, default=0.5,
+                        help='deep list page position as a fraction of the filtered rows')
+    parser.add_argument('--days', type=float, default=30.0, help='seeded jobs are spread over this many days')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the report here (default: stdout)')
+    args = parser.parse_args()
+    
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Connect-storm benchmark: many threads opening database connections at once
+
+Compares connection-creation latency (and thread growth) for:
+  tcp                 direct TCP to a local Postgres stand-in
+  connector           the shared process-wide Cloud SQL Connector
+  connector-per-call  a new Connector per connection (previous behaviour)
+
+Usage:
+    python benchmarks/connect_storm.py --mode tcp --threads 50 --rounds 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import config
+from src.database import get_connection, get_tcp_connection, close_db_connections
+
+
+def connect_per_call():
+    """Previous behaviour: a fresh Connector for every connection"""
+    from google.cloud.sql.connector import Connector
+    connector = Connector()
+    return connector.connect(
+        config.database.instance_connection_name,
+        "pg8000",
+        user=config.database.user,
+        password=config.database.password,
+        db=config.database.database_name
+    )
+
+
+CONNECTORS = {
+    'tcp': get_tcp_connection,
+    'connector': get_connection,
+    'connector-per-call': connect_per_call,
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(mode: str, threads: int, rounds: int) -> dict:
+    connect = CONNECTORS[mode]
+    latencies = []
+    errors = 0
+    threads_before = threading.active_count()
+    
+    def one(_):
+        start = time.perf_counter()
+        conn = connect()
+        elapsed = time.perf_counter() - start
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        conn.close()
+        return elapsed
+    
+    wall_start = time.perf_counter()
+    for _ in range(rounds):
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(one, i) for i in range(threads)]:
+                try:
+                    latencies.append(future.result())
+                except Exception as e:
+                    errors += 1
+                    print(f"connect failed: {e}", file=sys.stderr)
+    wall = time.perf_counter() - wall_start
+    
+    return {
+        'mode': mode,
+        'threads': threads,
+        'rounds': rounds,
+        'connections': len(latencies),
+        'errors': errors,
+        'wall_seconds': round(wall, 3),
+        'connects_per_second': round(len(latencies) / wall, 1) if wall else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else None,
+        'thread_growth': threading.active_count() - threads_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=sorted(CONNECTORS), default='tcp')
+    parser.add_argument('--threads', type=int, default=50, help='concurrent connects per round')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    
+    try:
+        print(json.dumps(run(args.mode, args.threads, args.rounds), indent=2))
+    finally:
+        close_db_connections()
+
+
+if __name__ == '__main__':
+    main()
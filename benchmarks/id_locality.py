@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Identifier locality benchmark: random (v4) vs time-ordered (v7) job ids
+
+Inserts the same number of rows into four scratch tables, each with a
+unique index on job_id, and compares insert time, final index size and
+WAL generated:
+
+    varchar_v4   VARCHAR(255) column, uuid4 strings (previous default)
+    varchar_v7   VARCHAR(255) column, src.ids.uuid7 strings
+    uuid_v4      native uuid column, uuid4 values
+    uuid_v7      native uuid column, uuid7 values (migrations/optional/0001)
+
+Usage:
+    python benchmarks/id_locality.py --rows 2000000
+    python benchmarks/id_locality.py --rows 200000 --batch 5000   # quick run
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import get_tcp_connection
+from src.ids import uuid7
+
+SCHEMA = 'bench_id_locality'
+
+VARIANTS = {
+    'varchar_v4': ('VARCHAR(255)', uuid.uuid4),
+    'varchar_v7': ('VARCHAR(255)', uuid7),
+    'uuid_v4': ('uuid', uuid.uuid4),
+    'uuid_v7': ('uuid', uuid7),
+}
+
+
+def wal_lsn(cursor) -> int:
+    cursor.execute("SELECT pg_current_wal_lsn() - '0/0'::pg_lsn")
+    return int(cursor.fetchone()[0])
+
+
+def run_variant(cursor, name: str, column_type: str, generate, rows: int, batch: int) -> dict:
+    cursor.execute(
+        f"CREATE TABLE {name} (id BIGSERIAL PRIMARY KEY, job_id {column_type} NOT NULL, "
+        f"created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cursor.execute(f"CREATE UNIQUE INDEX {name}_job_id ON {name} (job_id)")
+    
+    insert = f"INSERT INTO {name} (job_id) SELECT unnest(%s::text[])::{column_type}"
+    wal_start = wal_lsn(cursor)
+    elapsed = 0.0
+    for done in range(0, rows, batch):
+        ids = [str(generate()) for _ in range(min(batch, rows - done))]
+        start = time.perf_counter()
+        cursor.execute(insert, (ids,))
+        elapsed += time.perf_counter() - start
+    wal_bytes = wal_lsn(cursor) - wal_start
+    
+    cursor.execute(f"SELECT pg_relation_size('{name}_job_id'), pg_relation_size('{name}')")
+    index_bytes, table_bytes = cursor.fetchone()
+    return {
+        'variant': name,
+        'insert_seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed, 1),
+        'job_id_index_bytes': index_bytes,
+        'table_bytes': table_bytes,
+        'wal_bytes': wal_bytes,
+    }
+
+
+def run(rows: int, batch: int, keep: bool) -> dict:
+    conn = get_tcp_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        cursor.execute("CHECKPOINT")
+        results = [
+            run_variant(cursor, name, column_type, generate, rows, batch)
+            for name, (column_type, generate) in VARIANTS.items()
+        ]
+    finally:
+        if not keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+    
+    return {'rows': rows, 'batch': batch, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--batch', type=int, default=10_000, help='rows per INSERT statement')
+    parser.add_argument('--keep', action='store_true', help=f'keep the {SCHEMA} schema afterwards')
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.rows, args.batch, args.keep), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Index-pack benchmark: hot query plans before and after migrations/0001
+
+Seeds jobs/event_logs in a scratch schema with the previous single-column
+index set, captures EXPLAIN (ANALYZE, BUFFERS) for the hot queries, applies
+0001_query_index_pack.sql through the migration runner's statement splitter,
+and captures the plans again. Insert cost is measured in both phases.
+
+Usage:
+    python benchmarks/index_pack.py --jobs 10000000 --events-per-job 2
+    python benchmarks/index_pack.py --jobs 200000 --plans   # quick run, print plan text
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import get_tcp_connection
+from src.migrations import MIGRATIONS_DIR, load_migrations, split_statements
+
+SCHEMA = 'bench_index_pack'
+
+TABLES = """
+CREATE TABLE jobs (
+    id SERIAL PRIMARY KEY,
+    job_id VARCHAR(255) NOT NULL,
+    message_id VARCHAR(255),
+    status VARCHAR(50) NOT NULL,
+    payload JSONB,
+    result JSONB,
+    error_message TEXT,
+    retry_count INTEGER DEFAULT 0,
+    max_retries INTEGER DEFAULT 3,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    source VARCHAR(100),
+    correlation_id VARCHAR(255)
+);
+CREATE TABLE event_logs (
+    id SERIAL PRIMARY KEY,
+    event_id VARCHAR(255) NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    job_id VARCHAR(255),
+    data JSONB,
+    event_metadata JSONB,
+    timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    correlation_id VARCHAR(255)
+)
+"""
+
+# Index set before 0001 (create_all output plus the schema.sql duplicates)
+LEGACY_INDEXES = """
+CREATE INDEX ix_jobs_id ON jobs (id);
+CREATE UNIQUE INDEX ix_jobs_job_id ON jobs (job_id);
+CREATE INDEX idx_jobs_job_id ON jobs (job_id);
+CREATE INDEX ix_jobs_message_id ON jobs (message_id);
+CREATE INDEX ix_jobs_status ON jobs (status);
+CREATE INDEX ix_jobs_created_at ON jobs (created_at);
+CREATE INDEX ix_jobs_correlation_id ON jobs (correlation_id);
+CREATE INDEX ix_event_logs_id ON event_logs (id);
+CREATE UNIQUE INDEX ix_event_logs_event_id ON event_logs (event_id);
+CREATE INDEX idx_event_logs_event_id ON event_logs (event_id);
+CREATE INDEX ix_event_logs_event_type ON event_logs (event_type);
+CREATE INDEX ix_event_logs_job_id ON event_logs (job_id);
+CREATE INDEX ix_event_logs_timestamp ON event_logs (timestamp);
+CREATE INDEX ix_event_logs_correlation_id ON event_logs (correlation_id)
+"""
+
+# Status mix: 80% completed, 10% failed, 5% pending, 3% processing, 2% dead letter
+SEED_JOBS = """
+INSERT INTO jobs (job_id, message_id, status, payload, retry_count, created_at, updated_at,
+                  started_at, completed_at, source, correlation_id)
+SELECT 'job-' || g, 'msg-' || g,
+       CASE WHEN g %% 100 < 80 THEN 'COMPLETED' WHEN g %% 100 < 90 THEN 'FAILED'
+            WHEN g %% 100 < 95 THEN 'PENDING' WHEN g %% 100 < 98 THEN 'PROCESSING'
+            ELSE 'DEAD_LETTER' END,
+       jsonb_build_object('n', g), g %% 3,
+       now() - make_interval(secs => %s::int - g), now() - make_interval(secs => %s::int - g),
+       now() - make_interval(secs => %s::int - g),
+       CASE WHEN g %% 100 < 90 THEN now() - make_interval(secs => %s::int - g) + interval '2 seconds' END,
+       'pubsub', 'corr-' || g
+FROM generate_series(%s::int, %s::int) AS g
+"""
+
+SEED_EVENTS = """
+INSERT INTO event_logs (event_id, event_type, job_id, data, timestamp, correlation_id)
+SELECT 'evt-' || g || '-' || e, CASE e WHEN 0 THEN 'message.received' ELSE 'job.completed' END,
+       'job-' || g, jsonb_build_object('e', e), now() - make_interval(secs => %s::int - g - e), 'corr-' || g
+FROM generate_series(%s::int, %s::int) AS g, generate_series(0, %s::int - 1) AS e
+"""
+
+# Hot paths from src/api.py (status stored as the JobStatus member name)
+QUERIES = {
+    'list_by_status': (
+        "SELECT * FROM jobs WHERE status = 'FAILED' ORDER BY created_at DESC, id LIMIT 20 OFFSET 40"
+    ),
+    'list_by_status_deep': (
+        "SELECT * FROM jobs WHERE status = 'DEAD_LETTER' ORDER BY created_at DESC, id LIMIT 20 OFFSET 2000"
+    ),
+    'count_by_status': "SELECT count(*) FROM jobs WHERE status = 'FAILED'",
+    'job_events': "SELECT * FROM event_logs WHERE job_id = 'job-{probe}' ORDER BY timestamp",
+    'avg_completed_duration': (
+        "SELECT avg(extract(epoch FROM completed_at - started_at)) FROM jobs "
+        "WHERE status = 'COMPLETED' AND completed_at IS NOT NULL AND started_at IS NOT NULL"
+    ),
+}
+
+_EXECUTION = re.compile(r"Execution Time: ([\d.]+) ms")
+_BUFFERS = re.compile(r"Buffers: shared(?: hit=(\d+))?(?: read=(\d+))?")
+
+
+def execute(cursor, sql, params=()):
+    for statement in split_statements(sql):
+        cursor.execute(statement, params)
+
+
+def seed(cursor, jobs: int, events_per_job: int, chunk: int):
+    for start in range(1, jobs + 1, chunk):
+        end = min(start + chunk - 1, jobs)
+        cursor.execute(SEED_JOBS, (jobs, jobs, jobs, jobs, start, end))
+        cursor.execute(SEED_EVENTS, (jobs, start, end, events_per_job))
+        print(f"seeded {end}/{jobs} jobs", file=sys.stderr)
+
+
+def explain(cursor, name: str, sql: str) -> dict:
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+    lines = [row[0] for row in cursor.fetchall()]
+    buffers = _BUFFERS.search("\n".join(lines))
+    return {
+        'query': name,
+        'execution_ms': float(_EXECUTION.search(lines[-1]).group(1)),
+        'top_node': lines[0].split("  (")[0].strip(),
+        'shared_hit': int(buffers.group(1) or 0) if buffers else 0,
+        'shared_read': int(buffers.group(2) or 0) if buffers else 0,
+        'plan': lines,
+    }
+
+
+def insert_cost(cursor, rows: int, offset: int) -> dict:
+    """Time inserting fresh jobs and events (index maintenance dominates)"""
+    start = time.perf_counter()
+    cursor.execute(SEED_JOBS, (0, 0, 0, 0, offset, offset + rows - 1))
+    cursor.execute(SEED_EVENTS, (0, offset, offset + rows - 1, 2))
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'seconds': round(elapsed, 3), 'jobs_per_second': round(rows / elapsed, 1)}
+
+
+def index_sizes(cursor) -> dict:
+    cursor.execute(
+        "SELECT relname, pg_relation_size(oid) FROM pg_class "
+        "WHERE relkind = 'i' AND relnamespace = %s::regnamespace ORDER BY relname",
+        (SCHEMA,)
+    )
+    return {name: size for name, size in cursor.fetchall()}
+
+
+def phase(cursor, probe: int, insert_rows: int, insert_offset: int) -> dict:
+    cursor.execute("VACUUM ANALYZE jobs")
+    cursor.execute("VACUUM ANALYZE event_logs")
+    # Warm the cache so both phases compare plans rather than disk reads
+    results = [explain(cursor, name, sql.format(probe=probe)) for name, sql in QUERIES.items()]
+    results = [explain(cursor, name, sql.format(probe=probe)) for name, sql in QUERIES.items()]
+    sizes = index_sizes(cursor)
+    return {
+        'queries': results,
+        'insert': insert_cost(cursor, insert_rows, insert_offset),
+        'index_count': len(sizes),
+        'index_bytes': sum(sizes.values()),
+    }
+
+
+def run(jobs: int, events_per_job: int, chunk: int, insert_rows: int, keep: bool) -> dict:
+    conn = get_tcp_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        # Only the scratch schema is visible, so the migration cannot touch public
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        execute(cursor, TABLES)
+        execute(cursor, LEGACY_INDEXES)
+        seed(cursor, jobs, events_per_job, chunk)
+        
+        probe = jobs // 2
+        before = phase(cursor, probe, insert_rows, jobs + 1)
+        
+        migration = next(m for m in load_migrations(MIGRATIONS_DIR) if m.version == '0001')
+        start = time.perf_counter()
+        execute(cursor, migration.sql)
+        migrate_seconds = time.perf_counter() - start
+        
+        after = phase(cursor, probe, insert_rows, jobs + insert_rows + 1)
+    finally:
+        if not keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+    
+    return {
+        'jobs': jobs,
+        'events_per_job': events_per_job,
+        'migration_seconds': round(migrate_seconds, 2),
+        'before': before,
+        'after': after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=10_000_000)
+    parser.add_argument('--events-per-job', type=int, default=2)
+    parser.add_argument('--chunk', type=int, default=500_000, help='rows per seeding statement')
+    parser.add_argument('--insert-rows', type=int, default=10_000, help='rows for the insert-cost probe')
+    parser.add_argument('--plans', action='store_true', help='include full plan text in the output')
+    parser.add_argument('--keep', action='store_true', help=f'keep the {SCHEMA} schema afterwards')
+    args = parser.parse_args()
+    
+    result = run(args.jobs, args.events_per_job, args.chunk, args.insert_rows, args.keep)
+    if not args.plans:
+        for key in ('before', 'after'):
+            for query in result[key]['queries']:
+                query.pop('plan')
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
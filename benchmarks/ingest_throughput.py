@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Ingest throughput benchmark: ORM inserts vs COPY + staging merge
+
+Modes:
+  orm-per-row  one transaction per job + event (what /pubsub/push does)
+  orm-batch    session.add_all and one commit per chunk
+  copy         src/ingest.py (COPY CSV into a staging table, INSERT ... ON CONFLICT)
+
+Rows are written with a run-specific job_id/event_id prefix and deleted afterwards.
+
+Usage:
+    python benchmarks/ingest_throughput.py --rows 200000 --orm-rows 5000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import text
+
+from src.database import close_db_connections, get_db_session, get_engine
+from src.ingest import ingest
+from src.models import EventLog, Job, JobStatus
+
+
+def make_records(prefix: str, rows: int):
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    for i in range(rows):
+        ts = base + timedelta(milliseconds=i)
+        job_id = f"{prefix}-{i}"
+        yield (
+            {
+                'job_id': job_id, 'message_id': f"msg-{i}", 'status': JobStatus.COMPLETED,
+                'payload': {'data': 'x' * 64, 'attributes': {'n': i}}, 'result': {'processed': True},
+                'created_at': ts, 'started_at': ts, 'completed_at': ts, 'source': 'bench',
+                'correlation_id': job_id
+            },
+            {
+                'event_id': f"{prefix}-evt-{i}", 'event_type': 'message.received', 'job_id': job_id,
+                'data': {'n': i}, 'timestamp': ts, 'correlation_id': job_id
+            }
+        )
+
+
+def run_orm_per_row(prefix: str, rows: int, chunk: int):
+    for job, event in make_records(prefix, rows):
+        with get_db_session() as session:
+            session.add(Job(**job))
+            session.add(EventLog(**event))
+
+
+def run_orm_batch(prefix: str, rows: int, chunk: int):
+    records = make_records(prefix, rows)
+    while True:
+        batch = [record for _, record in zip(range(chunk), records)]
+        if not batch:
+            break
+        with get_db_session() as session:
+            session.add_all([Job(**job) for job, _ in batch])
+            session.add_all([EventLog(**event) for _, event in batch])
+
+
+def run_copy(prefix: str, rows: int, chunk: int):
+    ingest('jobs', (job for job, _ in make_records(prefix, rows)), chunk_rows=chunk, progress_every=rows + 1)
+    ingest('event_logs', (event for _, event in make_records(prefix, rows)), chunk_rows=chunk, progress_every=rows + 1)
+
+
+MODES = {
+    'orm-per-row': run_orm_per_row,
+    'orm-batch': run_orm_batch,
+    'copy': run_copy,
+}
+
+
+def cleanup(prefix: str):
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM event_logs WHERE job_id LIKE :p"), {'p': f"{prefix}-%"})
+        conn.execute(text("DELETE FROM jobs WHERE job_id LIKE :p"), {'p': f"{prefix}-%"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='orm-per-row,orm-batch,copy')
+    parser.add_argument('--rows', type=int, default=100_000, help='jobs (plus one event each) for batch/copy modes')
+    parser.add_argument('--orm-rows', type=int, default=5_000, help='jobs for orm-per-row (slow)')
+    parser.add_argument('--chunk', type=int, default=10_000, help='rows per transaction')
+    args = parser.parse_args()
+    
+    results = []
+    try:
+        for mode in args.modes.split(','):
+            rows = args.orm_rows if mode == 'orm-per-row' else args.rows
+            prefix = f"bench-{uuid.uuid4().hex[:8]}"
+            start = time.perf_counter()
+            try:
+                MODES[mode](prefix, rows, args.chunk)
+                elapsed = time.perf_counter() - start
+            finally:
+                cleanup(prefix)
+            results.append({
+                'mode': mode,
+                'jobs': rows,
+                'rows_written': rows * 2,
+                'seconds': round(elapsed, 2),
+                'jobs_per_second': round(rows / elapsed, 1),
+            })
+            print(json.dumps(results[-1]), file=sys.stderr)
+    finally:
+        close_db_connections()
+    
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Lane fairness benchmark: queue time per lane during a bulk flood
+
+Simulates one pull worker (no database, virtual clock) with a bulk
+backfill dumped on the queue at t=0 while interactive (high) and normal
+jobs keep arriving at a steady rate, under each policy:
+
+    fifo    ... one queue in arrival order (the behaviour before lanes)
+    lanes   ... per-lane buffers and LaneScheduler from src/lanes.py
+                (weighted fair dequeueing, per-lane concurrency caps)
+
+Each policy runs once without the flood as a baseline. Reports queue-time
+(arrival to start) p50/p99 per lane, so the high lane's p99 can be checked
+to stay flat when the flood hits.
+
+Usage:
+    python benchmarks/lane_fairness.py --flood 20000 --concurrency 8
+    python benchmarks/lane_fairness.py --weights high=8,normal=4,bulk=1 --caps high=8,normal=8,bulk=2
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import _parse_pairs, config
+from src.lanes import LANE_BULK, LANE_HIGH, LANE_NORMAL, LANES, LaneScheduler
+
+POLICIES = ('fifo', 'lanes')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def arrivals(flood: int, rate: float, duration: float, seed: int):
+    """(time, lane) for the bulk flood at t=0 and Poisson high/normal arrivals"""
+    rng = random.Random(seed)
+    jobs = [(0.0, LANE_BULK)] * flood
+    for lane in (LANE_HIGH, LANE_NORMAL):
+        now = 0.0
+        while True:
+            now += rng.expovariate(rate)
+            if now >= duration:
+                break
+            jobs.append((now, lane))
+    jobs.sort(key=lambda job: job[0])
+    return jobs
+
+
+def simulate(policy: str, jobs, concurrency: int, service_ms: float, weights, caps, seed: int) -> dict:
+    rng = random.Random(seed)
+    scheduler = LaneScheduler(weights, caps)
+    pending = {lane: deque() for lane in LANES}  # the jobs table, per lane
+    fifo = deque()
+    waits = {lane: [] for lane in LANES}
+    finishing = []  # heap of (finish time, lane)
+    running = 0
+    now = 0.0
+    index = 0
+    
+    def start(lane, arrived):
+        nonlocal running
+        waits[lane].append(now - arrived)
+        running += 1
+        heapq.heappush(finishing, (now + rng.expovariate(1000 / service_ms), lane))
+    
+    while index < len(jobs) or finishing or running:
+        next_arrival = jobs[index][0] if index < len(jobs) else float('inf')
+        next_finish = finishing[0][0] if finishing else float('inf')
+        if next_arrival == float('inf') and next_finish == float('inf'):
+            break
+        if next_arrival <= next_finish:
+            now, lane = jobs[index]
+            index += 1
+            (fifo if policy == 'fifo' else pending[lane]).append((now, lane))
+        else:
+            now, lane = heapq.heappop(finishing)
+            running -= 1
+            if policy == 'lanes':
+                scheduler.done(lane)
+        
+        if policy == 'fifo':
+            while running < concurrency and fifo:
+                arrived, lane = fifo.popleft()
+                start(lane, arrived)
+            continue
+        
+        # Claim into the lane buffers while they have room, then dispatch by weight
+        for lane in LANES:
+            while scheduler.room(lane) and pending[lane]:
+                scheduler.push(lane, pending[lane].popleft())
+        while running < concurrency:
+            picked = scheduler.pop()
+            if picked is None:
+                break
+            lane, (arrived, _), _ = picked
+            start(lane, arrived)
+    
+    return {
+        lane: {
+            'jobs': len(waits[lane]),
+            'wait_p50_ms': round(percentile(waits[lane], 50) * 1000, 1) if waits[lane] else None,
+            'wait_p99_ms': round(percentile(waits[lane], 99) * 1000, 1) if waits[lane] else None,
+        }
+        for lane in LANES
+    }
+
+
+def run(flood: int, rate: float, duration: float, concurrency: int, service_ms: float, weights, caps,
+        seed: int) -> dict:
+    results = []
+    for policy in POLICIES:
+        for flooded in (0, flood):
+            jobs = arrivals(flooded, rate, duration, seed)
+            results.append({
+                'policy': policy,
+                'flood': flooded,
+                'lanes': simulate(policy, jobs, concurrency, service_ms, weights, caps, seed),
+            })
+    return {
+        'concurrency': concurrency,
+        'service_ms': service_ms,
+        'arrivals_per_second_per_lane': rate,
+        'seconds': duration,
+        'weights': weights,
+        'caps': caps,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--flood', type=int, default=20_000, help='bulk jobs queued at t=0')
+    parser.add_argument('--rate', type=float, default=100.0, help='high and normal arrivals per second (each)')
+    parser.add_argument('--seconds', type=float, default=30.0, help='arrival window')
+    parser.add_argument('--concurrency', type=int, default=config.queue.concurrency)
+    parser.add_argument('--service-ms', type=float, default=10.0, help='mean job run time (exponential)')
+    parser.add_argument('--weights', default=config.lanes.weights_spec, help='lane=weight pairs')
+    parser.add_argument('--caps', default=config.lanes.concurrency_spec, help='lane=max concurrency pairs')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    
+    weights = _parse_pairs(args.weights, float)
+    caps = _parse_pairs(args.caps, int)
+    print(json.dumps(run(
+        args.flood, args.rate, args.seconds, args.concurrency, args.service_ms, weights, caps, args.seed
+    ), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+End-to-end load generator: the push worker and the API under a request mix
+
+Sends requests open-loop: each one is scheduled at a fixed point in time
+(constant or Poisson arrivals at --rate) regardless of how fast earlier
+ones completed, and latency is measured from that scheduled time, so a
+stalled server shows up as queueing delay instead of silently lowering the
+offered load (coordinated omission). Service time (measured from the
+actual send) is reported alongside.
+
+Operations (--mix name=weight):
+
+    push        ... POST /pubsub/push, one message
+    push_batch  ... POST /pubsub/push/batch, --batch-size messages
+    get_job     ... GET /api/v1/jobs/{job_id} (ids seen in push responses)
+    list_jobs   ... GET /api/v1/jobs, random status filter and page
+    job_stats   ... GET /api/v1/jobs/stats/summary
+    job_events  ... GET /api/v1/events/{job_id}
+
+Besides throughput and p50/p95/p99 per operation, the report counts
+database and Redis work per request: statements and cache operations from
+each service's /metrics (run the services single-process so one scrape
+sees everything; --start-services does), transactions and tuples from
+pg_stat_database, and commands from Redis INFO commandstats when the
+server supports it. Reports are JSON; compare one against a baseline with
+--baseline or the compare command.
+
+Usage:
+    python benchmarks/loadgen.py run --start-services --rate 200 --duration 60 --output reports/base.json
+    python benchmarks/loadgen.py run --rate 500 --mix push=50,get_job=30,list_jobs=20 --arrival poisson
+    python benchmarks/loadgen.py run --start-services --baseline reports/base.json --max-regression 10
+    python benchmarks/loadgen.py compare reports/base.json reports/new.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+from redis.exceptions import RedisError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cache import get_redis_client
+from src.config import _parse_pairs
+from src.database import get_tcp_connection
+from src.models import JobStatus
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+OPS = ('push', 'push_batch', 'get_job', 'list_jobs', 'job_stats', 'job_events')
+DEFAULT_MIX = 'push=60,get_job=20,list_jobs=15,job_stats=5'
+
+# Job ids remembered for get_job / job_events
+JOB_ID_POOL = 10_000
+
+PG_STAT_COLUMNS = (
+    'xact_commit', 'xact_rollback', 'tup_returned', 'tup_fetched', 'tup_inserted', 'tup_updated',
+    'tup_deleted', 'blks_hit', 'blks_read',
+)
+
+# Metric families scraped from the services: name -> label giving the breakdown
+SCRAPED = {
+    'db_query_duration_seconds': 'fingerprint',  # statements
+    'cache_operation_seconds': 'operation',  # Redis operations
+    'cache_requests': 'result',  # lookups (hit/miss)
+}
+
+# Compared between reports: (path, higher is better)
+COMPARED = [
+    ('throughput', True),
+    ('p50_ms', False),
+    ('p95_ms', False),
+    ('p99_ms', False),
+    ('error_rate', False),
+]
+COMPARED_PER_REQUEST = [
+    ('db', 'statements_per_request'),
+    ('db', 'xact_per_request'),
+    ('redis', 'client_ops_per_request'),
+    ('redis', 'commands_per_request'),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def envelope(n: int, payload_bytes: int, tenants: int, rng: random.Random) -> dict:
+    """Push envelope with a unique body (identical bodies would share one payload row)"""
+    body = json.dumps({'n': n, 'pad': rng.randbytes(payload_bytes // 2).hex()})
+    return {
+        'message': {
+            'data': base64.b64encode(body.encode('utf-8')).decode('ascii'),
+            'messageId': f'loadgen-{n}',
+            'attributes': {'source': 'loadgen', 'tenant': f't{n % tenants}'},
+        },
+        'subscription': 'projects/loadgen/subscriptions/loadgen',
+    }
+
+
+class Load:
+    """Request builder and result collector for one run"""
+    
+    def __init__(self, args, rng: random.Random):
+        self.args = args
+        self.rng = rng
+        self.job_ids = deque(maxlen=JOB_ID_POOL)
+        self.statuses = [None] + [status.value for status in JobStatus]
+        self.sent = 0  # messages
+        self.issued = 0  # requests, warm-up included
+        self.results = defaultdict(lambda: {'latency': [], 'service': [], 'errors': defaultdict(int), 'skipped': 0})
+        self.last_end = None
+    
+    def request(self, op: str):
+        """(method, url, json body) for an operation, or None if it has nothing to target"""
+        args = self.args
+        if op == 'push':
+            self.sent += 1
+            return 'POST', f'{args.worker_url}/pubsub/push', envelope(self.sent, args.payload_bytes, args.tenants, self.rng)
+        if op == 'push_batch':
+            batch = []
+            for _ in range(args.batch_size):
+                self.sent += 1
+                batch.append(envelope(self.sent, args.payload_bytes, args.tenants, self.rng))
+            return 'POST', f'{args.worker_url}/pubsub/push/batch', batch
+        if op == 'list_jobs':
+            params = {'page': self.rng.randint(1, args.list_pages), 'limit': args.page_size}
+            status = self.rng.choice(self.statuses)
+            if status:
+                params['status'] = status
+            return 'GET', f'{args.api_url}/api/v1/jobs?' + '&'.join(f'{k}={v}' for k, v in params.items()), None
+        if op == 'job_stats':
+            return 'GET', f'{args.api_url}/api/v1/jobs/stats/summary', None
+        if not self.job_ids:
+            return None
+        job_id = self.rng.choice(self.job_ids)
+        if op == 'get_job':
+            return 'GET', f'{args.api_url}/api/v1/jobs/{job_id}', None
+        return 'GET', f'{args.api_url}/api/v1/events/{job_id}', None
+    
+    def remember(self, op: str, body):
+        """Keep job ids from push responses for the read operations"""
+        if op == 'push' and isinstance(body, dict) and body.get('job_id'):
+            self.job_ids.append(body['job_id'])
+        elif op == 'push_batch' and isinstance(body, dict):
+            self.job_ids.extend(item['job_id'] for item in body.get('results', []) if item.get('job_id'))
+    
+    def record(self, op: str, measured: bool, latency: float, service: float, error: Optional[str], end: float):
+        if not measured:
+            return
+        result = self.results[op]
+        if error:
+            result['errors'][error] += 1
+        else:
+            result['latency'].append(latency)
+            result['service'].append(service)
+        self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+
+def schedule(args, rng: random.Random) -> List[tuple]:
+    """(offset seconds, operation) for every request of the run"""
+    mix = {op: weight for op, weight in _parse_pairs(args.mix, float).items() if weight > 0}
+    unknown = set(mix) - set(OPS)
+    if unknown:
+        raise ValueError(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    ops, weights = list(mix), list(mix.values())
+    
+    total = args.warmup + args.duration
+    planned = []
+    offset = 0.0
+    n = 0
+    while True:
+        offset = rng.expovariate(args.rate) + offset if args.arrival == 'poisson' else n / args.rate
+        if offset >= total:
+            return planned
+        planned.append((offset, rng.choices(ops, weights)[0]))
+        n += 1
+
+
+async def seed_job_ids(client: httpx.AsyncClient, load: Load):
+    """Start the id pool from the first pages of existing jobs"""
+    for page in range(1, 6):
+        try:
+            response = await client.get(f'{load.args.api_url}/api/v1/jobs', params={'page': page, 'limit': 100})
+            jobs = response.json().get('jobs', []) if response.status_code == 200 else []
+        except (httpx.HTTPError, ValueError):
+            return
+        load.job_ids.extend(job['job_id'] for job in jobs)
+        if len(jobs) < 100:
+            return
+
+
+async def drive(args, planned: List[tuple], load: Load):
+    """Send the planned requests open-loop and collect latencies"""
+    loop = asyncio.get_running_loop()
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout, pool=None), limits=limits) as client:
+        await seed_job_ids(client, load)
+        
+        async def send(op: str, intended: float, measured: bool):
+            request = load.request(op)
+            if request is None:
+                if measured:
+                    load.results[op]['skipped'] += 1
+                return
+            method, url, body = request
+            load.issued += 1
+            async with in_flight:
+                sent = loop.time()
+                error = None
+                try:
+                    response = await client.request(method, url, json=body)
+                    if response.status_code >= 400:
+                        error = str(response.status_code)
+                    elif op in ('push', 'push_batch'):
+                        load.remember(op, response.json())
+                except (httpx.HTTPError, ValueError) as e:
+                    error = type(e).__name__
+                end = loop.time()
+            load.record(op, measured, end - intended, end - sent, error, end)
+        
+        start = loop.time() + 0.1
+        tasks = []
+        for offset, op in planned:
+            intended = start + offset
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(op, intended, offset >= args.warmup)))
+        await asyncio.gather(*tasks)
+        return start + args.warmup
+
+
+def summarize(samples: Dict, seconds: float, per_op_messages: int = 1) -> dict:
+    latency, service = samples['latency'], samples['service']
+    errors = sum(samples['errors'].values())
+    total = len(latency) + errors
+    return {
+        'requests': total,
+        'ok': len(latency),
+        'errors': dict(samples['errors']),
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'skipped': samples['skipped'],
+        'throughput': round(len(latency) / seconds, 1) if seconds else 0.0,
+        'messages_per_second': round(len(latency) * per_op_messages / seconds, 1) if seconds else 0.0,
+        'p50_ms': ms(percentile(latency, 50)),
+        'p95_ms': ms(percentile(latency, 95)),
+        'p99_ms': ms(percentile(latency, 99)),
+        'max_ms': ms(max(latency)) if latency else None,
+        'service_p50_ms': ms(percentile(service, 50)),
+        'service_p99_ms': ms(percentile(service, 99)),
+    }
+
+
+def scrape(urls: List[str]) -> Dict[str, Dict[str, float]]:
+    """Counts of the SCRAPED families summed over the services' /metrics"""
+    totals = defaultdict(lambda: defaultdict(float))
+    for url in urls:
+        try:
+            text = httpx.get(f'{url}/metrics', timeout=10).text
+        except httpx.HTTPError:
+            continue
+        for family in text_string_to_metric_families(text):
+            label = SCRAPED.get(family.name)
+            if label is None:
+                continue
+            for sample in family.samples:
+                if sample.name in (f'{family.name}_count', f'{family.name}_total'):
+                    totals[family.name][sample.labels.get(label, '')] += sample.value
+    return totals
+
+
+def pg_stats() -> Optional[Dict[str, int]]:
+    """Database-wide counters from pg_stat_database (None if unreachable)"""
+    try:
+        conn = get_tcp_connection()
+    except Exception:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(
+            f"SELECT {', '.join(PG_STAT_COLUMNS)} FROM pg_stat_database WHERE datname = current_database()"
+        )
+        return dict(zip(PG_STAT_COLUMNS, cursor.fetchone()))
+    finally:
+        conn.close()
+
+
+def redis_commands() -> Optional[Dict[str, int]]:
+    """Calls per command from INFO commandstats (None if the server has no INFO)"""
+    try:
+        stats = get_redis_client().info('commandstats')
+    except RedisError:
+        return None
+    return {name.replace('cmdstat_', ''): value['calls'] for name, value in stats.items()}
+
+
+def delta(before: Optional[dict], after: Optional[dict]) -> Optional[dict]:
+    if before is None or after is None:
+        return None
+    return {key: after.get(key, 0) - before.get(key, 0) for key in after if after.get(key, 0) != before.get(key, 0)}
+
+
+def per_request(value, requests: int):
+    return round(value / requests, 3) if value is not None and requests else None
+
+
+def snapshot(args) -> dict:
+    return {'metrics': scrape([args.worker_url, args.api_url]), 'pg': pg_stats(), 'redis': redis_commands()}
+
+
+def resource_report(before: dict, after: dict, requests: int) -> dict:
+    metrics = {
+        name: delta(before['metrics'].get(name, {}), after['metrics'].get(name, {})) or {} for name in SCRAPED
+    }
+    statements = sum(metrics['db_query_duration_seconds'].values())
+    client_ops = sum(metrics['cache_operation_seconds'].values())
+    pg = delta(before['pg'], after['pg'])
+    redis_calls = delta(before['redis'], after['redis'])
+    if redis_calls is not None:
+        redis_calls.pop('info', None)  # the harness's own snapshots
+    commands = sum(redis_calls.values()) if redis_calls is not None else None
+    xacts = (pg.get('xact_commit', 0) + pg.get('xact_rollback', 0)) if pg is not None else None
+    
+    return {
+        'db': {
+            'statements': int(statements),
+            'statements_per_request': per_request(statements, requests),
+            'xact_per_request': per_request(xacts, requests),
+            'pg_stat_database': pg,
+        },
+        'redis': {
+            'client_ops': {op: int(count) for op, count in metrics['cache_operation_seconds'].items()},
+            'client_ops_per_request': per_request(client_ops, requests),
+            'lookups': {result: int(count) for result, count in metrics['cache_requests'].items()},
+            'commands': redis_calls,
+            'commands_per_request': per_request(commands, requests),
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_services(args) -> List[subprocess.Popen]:
+    """Run the worker (gunicorn, as in Dockerfile) and the API (uvicorn) single-process on the target ports"""
+    worker, api = urlparse(args.worker_url), urlparse(args.api_url)
+    commands = [
+        [sys.executable, '-m', 'gunicorn', '-w', '1', '--threads', str(args.worker_threads), '--timeout', '120',
+         '-b', f'{worker.hostname}:{worker.port}', 'src.worker_http:app'],
+        [sys.executable, '-m', 'uvicorn', 'src.api:app', '--host', api.hostname, '--port', str(api.port),
+         '--workers', '1', '--log-level', 'warning'],
+    ]
+    log = open(args.service_log, 'a') if args.service_log else subprocess.DEVNULL
+    processes = [subprocess.Popen(command, cwd=ROOT, stdout=log, stderr=log) for command in commands]
+    
+    deadline = time.monotonic() + 60
+    for url in (args.worker_url, args.api_url):
+        while True:
+            try:
+                if httpx.get(f'{url}/health', timeout=2).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline or any(process.poll() is not None for process in processes):
+                stop_services(processes)
+                raise RuntimeError(f"Service at {url} did not become healthy")
+            time.sleep(0.5)
+    return processes
+
+
+def stop_services(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    planned = schedule(args, rng)
+    processes = start_services(args) if args.start_services else []
+    try:
+        load = Load(args, rng)
+        before = snapshot(args)
+        started_at = datetime.now(timezone.utc)
+        measure_start = asyncio.run(drive(args, planned, load))
+        time.sleep(args.settle)  # backends report pg_stat counters when they go idle
+        after = snapshot(args)
+    finally:
+        stop_services(processes)
+    
+    seconds = (load.last_end - measure_start) if load.last_end else 0.0
+    ops = {op: summarize(samples, seconds, args.batch_size if op == 'push_batch' else 1)
+           for op, samples in sorted(load.results.items())}
+    combined = {'latency': [], 'service': [], 'errors': defaultdict(int), 'skipped': 0}
+    for samples in load.results.values():
+        combined['latency'] += samples['latency']
+        combined['service'] += samples['service']
+        combined['skipped'] += samples['skipped']
+        for code, count in samples['errors'].items():
+            combined['errors'][code] += count
+    overall = summarize(combined, seconds)
+    overall.pop('messages_per_second')
+    
+    # Op counts cover the warm-up too, so they are divided by every request sent
+    return {
+        'benchmark': 'loadgen',
+        'started_at': started_at.isoformat(),
+        'git_commit': git_commit(),
+        'config': {
+            key: getattr(args, key) for key in (
+                'worker_url', 'api_url', 'rate', 'duration', 'warmup', 'arrival', 'mix', 'max_in_flight',
+                'payload_bytes', 'batch_size', 'page_size', 'list_pages', 'tenants', 'seed',
+            )
+        },
+        'seconds': round(seconds, 3),
+        'offered_rate': round(len([1 for offset, _ in planned if offset >= args.warmup]) / args.duration, 1),
+        'all': overall,
+        'ops': ops,
+        **resource_report(before, after, load.issued),
+    }
+
+
+def compare(baseline: dict, report: dict, max_regression: Optional[float] = None) -> dict:
+    """
+    Per-metric change of a report against a baseline
+    
+    Returns:
+        Dict with 'changes' (metric -> baseline, current, change %) and the
+        'regressions' worse than max_regression percent
+    """
+    changes, regressions = {}, []
+    
+    def add(name: str, old, new, higher_is_better: bool):
+        if old is None or new is None:
+            return
+        change = round((new - old) / old * 100, 1) if old else None
+        changes[name] = {'baseline': old, 'current': new, 'change_pct': change}
+        worse = change is not None and (-change if higher_is_better else change)
+        if max_regression is not None and worse and worse > max_regression:
+            regressions.append(name)
+    
+    for op in ['all'] + sorted(set(baseline.get('ops', {})) & set(report.get('ops', {}))):
+        old = baseline['all'] if op == 'all' else baseline['ops'][op]
+        new = report['all'] if op == 'all' else report['ops'][op]
+        for metric, higher_is_better in COMPARED:
+            add(f'{op}.{metric}', old.get(metric), new.get(metric), higher_is_better)
+    for section, metric in COMPARED_PER_REQUEST:
+        add(f'{section}.{metric}', baseline.get(section, {}).get(metric), report.get(section, {}).get(metric), False)
+    
+    if baseline.get('config') != report.get('config'):
+        changes['config_differs'] = True
+    return {
+        'baseline_commit': baseline.get('git_commit'),
+        'current_commit': report.get('git_commit'),
+        'changes': changes,
+        'regressions': regressions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = commands.add_parser('run', help='generate load and write a report')
+    run_parser.add_argument('--worker-url', default='http://127.0.0.1:8080')
+    run_parser.add_argument('--api-url', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--start-services', action='store_true', help='run worker and API locally for the test')
+    run_parser.add_argument('--worker-threads', type=int, default=8, help='gunicorn threads with --start-services')
+    run_parser.add_argument('--service-log', help='append service output here with --start-services')
+    run_parser.add_argument('--rate', type=float, default=100.0, help='requests per second offered')
+    run_parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    run_parser.add_argument('--warmup', type=float, default=5.0, help='seconds of load before measuring')
+    run_parser.add_argument('--arrival', choices=['constant', 'poisson'], default='constant')
+    run_parser.add_argument('--mix', default=DEFAULT_MIX, help=f"operation=weight pairs ({', '.join(OPS)})")
+    run_parser.add_argument('--max-in-flight', type=int, default=64, help='concurrent requests (connections)')
+    run_parser.add_argument('--timeout', type=float, default=30.0, help='request timeout (seconds)')
+    run_parser.add_argument('--payload-bytes', type=int, default=256)
+    run_parser.add_argument('--batch-size', type=int, default=100, help='messages per push_batch request')
+    run_parser.add_argument('--page-size', type=int, default=10, help='list_jobs limit')
+    run_parser.add_argument('--list-pages', type=int, default=5, help='list_jobs pages drawn from 1..N')
+    run_parser.add_argument('--tenants', type=int, default=10, help='distinct tenant attributes on pushes')
+    run_parser.add_argument('--settle', type=float, default=11.0,
+                            help='seconds to wait before the final pg_stat_database snapshot')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--output', help='write the report here (default: stdout)')
+    run_parser.add_argument('--baseline', help='report to compare against')
+    run_parser.add_argument('--max-regression', type=float,
+                            help='exit 1 if a compared metric is worse than the baseline by more than this %%')
+    
+    compare_parser = commands.add_parser('compare', help='compare a report against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('report')
+    compare_parser.add_argument('--max-regression', type=float)
+    args = parser.parse_args()
+    
+    if args.command == 'run':
+        report = run(args)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+        baseline_path = args.baseline
+    else:
+        with open(args.report) as f:
+            report = json.load(f)
+        baseline_path = args.baseline
+    
+    if baseline_path:
+        with open(baseline_path) as f:
+            comparison = compare(json.load(f), report, args.max_regression)
+        print(json.dumps(comparison, indent=2), file=sys.stderr if args.command == 'run' and not args.output else sys.stdout)
+        if comparison['regressions']:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
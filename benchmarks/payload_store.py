@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Payload store benchmark: inline payloads vs the content-addressed store
+
+Writes the same message stream twice into a scratch schema: once the way
+the worker used to (payload inline in the job row and again in the
+message.received event) and once through src/payloads.py (one payloads row
+per distinct body, jobs/events carry the hash). Reports heap, TOAST and
+index bytes per layout. --duplicates sets the share of messages that are
+redeliveries of an earlier body.
+
+Usage:
+    python benchmarks/payload_store.py --messages 200000 --payload-bytes 4096 --duplicates 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import get_tcp_connection
+from src.payloads import encode_payload
+
+SCHEMA = 'bench_payload_store'
+
+TABLES = """
+CREATE TABLE inline_jobs (id BIGSERIAL PRIMARY KEY, job_id VARCHAR(255) NOT NULL, payload JSONB);
+CREATE TABLE inline_events (id BIGSERIAL PRIMARY KEY, job_id VARCHAR(255) NOT NULL, data JSONB);
+CREATE TABLE store_jobs (id BIGSERIAL PRIMARY KEY, job_id VARCHAR(255) NOT NULL, payload_hash VARCHAR(64));
+CREATE TABLE store_events (id BIGSERIAL PRIMARY KEY, job_id VARCHAR(255) NOT NULL, data JSONB);
+CREATE TABLE payloads (
+    hash VARCHAR(64) PRIMARY KEY, encoding VARCHAR(16) NOT NULL, size_bytes INTEGER NOT NULL, body BYTEA
+);
+ALTER TABLE payloads ALTER COLUMN body SET STORAGE EXTERNAL
+"""
+
+LAYOUTS = {
+    'inline': ('inline_jobs', 'inline_events'),
+    'store': ('store_jobs', 'store_events', 'payloads'),
+}
+
+# Readable JSON-ish text compresses like real message bodies, unlike random bytes
+WORDS = ['patient', 'visit', 'schedule', 'caregiver', 'status', 'note', 'address', 'medication', 'dose', 'time']
+
+
+def make_body(rng: random.Random, size: int) -> str:
+    fields = {}
+    length = 2
+    while length < size:
+        key = f"{rng.choice(WORDS)}_{len(fields)}"
+        fields[key] = " ".join(rng.choice(WORDS) for _ in range(8))
+        length += len(key) + len(fields[key]) + 8
+    return json.dumps(fields)
+
+
+def messages(count: int, payload_bytes: int, duplicates: float, seed: int):
+    rng = random.Random(seed)
+    bodies = []
+    for n in range(count):
+        if bodies and rng.random() < duplicates:
+            body = rng.choice(bodies)
+        else:
+            body = make_body(rng, payload_bytes)
+            bodies.append(body)
+        yield f"job-{n}", f"msg-{n}", {'data': body, 'attributes': {'source': 'bench'}}
+
+
+def write_batch(cursor, batch):
+    job_ids = [job_id for job_id, _, _ in batch]
+    cursor.execute(
+        "INSERT INTO inline_jobs (job_id, payload) SELECT * FROM unnest(%s::text[], %s::jsonb[])",
+        (job_ids, [json.dumps(payload) for _, _, payload in batch])
+    )
+    cursor.execute(
+        "INSERT INTO inline_events (job_id, data) SELECT * FROM unnest(%s::text[], %s::jsonb[])",
+        (job_ids, [json.dumps({'message_id': mid, 'payload': payload['data']}) for _, mid, payload in batch])
+    )
+    
+    encoded = [encode_payload(payload) for _, _, payload in batch]
+    unique = {item.hash: item for item in encoded}
+    cursor.execute(
+        "INSERT INTO payloads SELECT * FROM unnest(%s::text[], %s::text[], %s::int[], %s::bytea[]) "
+        "ON CONFLICT (hash) DO NOTHING",
+        (
+            list(unique), [item.encoding for item in unique.values()],
+            [item.size_bytes for item in unique.values()], [item.body for item in unique.values()]
+        )
+    )
+    cursor.execute(
+        "INSERT INTO store_jobs (job_id, payload_hash) SELECT * FROM unnest(%s::text[], %s::text[])",
+        (job_ids, [item.hash for item in encoded])
+    )
+    cursor.execute(
+        "INSERT INTO store_events (job_id, data) SELECT * FROM unnest(%s::text[], %s::jsonb[])",
+        (job_ids, [json.dumps({'message_id': mid, 'payload_hash': item.hash}) for (_, mid, _), item in zip(batch, encoded)])
+    )
+
+
+def sizes(cursor, table: str) -> dict:
+    cursor.execute(
+        "SELECT pg_relation_size(c.oid), coalesce(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0), "
+        "pg_indexes_size(c.oid), (SELECT avg(pg_column_size(t.*)) FROM " + table + " t) "
+        "FROM pg_class c WHERE c.oid = %s::regclass",
+        (table,)
+    )
+    heap, toast, indexes, row_width = cursor.fetchone()
+    return {'heap': heap, 'toast': toast, 'indexes': indexes, 'avg_row_bytes': round(float(row_width or 0), 1)}
+
+
+def run(count: int, payload_bytes: int, duplicates: float, batch: int, seed: int, keep: bool) -> dict:
+    conn = get_tcp_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        for statement in TABLES.split(';'):
+            cursor.execute(statement)
+        
+        pending = []
+        for message in messages(count, payload_bytes, duplicates, seed):
+            pending.append(message)
+            if len(pending) >= batch:
+                write_batch(cursor, pending)
+                pending = []
+        if pending:
+            write_batch(cursor, pending)
+        
+        for table in ('inline_jobs', 'inline_events', 'store_jobs', 'store_events', 'payloads'):
+            cursor.execute(f"VACUUM ANALYZE {table}")
+        
+        results = {}
+        for layout, tables in LAYOUTS.items():
+            per_table = {table: sizes(cursor, table) for table in tables}
+            results[layout] = {
+                'tables': per_table,
+                'total_bytes': sum(s['heap'] + s['toast'] + s['indexes'] for s in per_table.values()),
+            }
+        cursor.execute("SELECT count(*) FROM payloads")
+        distinct = cursor.fetchone()[0]
+    finally:
+        if not keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+    
+    return {
+        'messages': count,
+        'payload_bytes': payload_bytes,
+        'duplicates': duplicates,
+        'distinct_payloads': distinct,
+        'reduction': round(1 - results['store']['total_bytes'] / results['inline']['total_bytes'], 3),
+        **results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200_000)
+    parser.add_argument('--payload-bytes', type=int, default=4096, help='approximate body size')
+    parser.add_argument('--duplicates', type=float, default=0.2, help='share of redelivered bodies')
+    parser.add_argument('--batch', type=int, default=2000, help='messages per INSERT round')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--keep', action='store_true', help=f'keep the {SCHEMA} schema afterwards')
+    args = parser.parse_args()
+    
+    print(json.dumps(run(args.messages, args.payload_bytes, args.duplicates, args.batch, args.seed, args.keep), indent=2))
+
+
+if __name__ == '__main__':
+    main()
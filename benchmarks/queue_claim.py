@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Queue claim benchmark: concurrent workers claiming jobs from one table
+
+Seeds a scratch table with PENDING rows and lets N worker processes drain
+it the way src/queue_worker.py does (claim a batch in one UPDATE, work,
+finalize the batch), for each claim mode:
+
+    skip_locked   ... FOR UPDATE SKIP LOCKED (queue_worker)
+    blocking      ... FOR UPDATE (workers queue up behind each other's locks)
+
+Reports throughput, claim latency, empty claims, how evenly the work was
+spread over the workers (Jain's fairness index, 1.0 = perfectly even) and
+the share of jobs claimed in an earlier batch than an older job (FIFO
+inversions).
+
+Usage:
+    python benchmarks/queue_claim.py --jobs 50000 --workers 1,4,16 --batch 16
+    python benchmarks/queue_claim.py --jobs 5000 --workers 8 --work-ms 2   # with simulated work
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import get_tcp_connection
+
+SCHEMA = 'bench_queue_claim'
+
+TABLE = f"""
+CREATE TABLE {SCHEMA}.jobs (
+    id BIGSERIAL PRIMARY KEY,
+    status VARCHAR(50) NOT NULL DEFAULT 'PENDING',
+    payload_hash VARCHAR(64),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
+    claimed_by INTEGER,
+    claimed_seq BIGINT
+);
+CREATE SEQUENCE {SCHEMA}.claim_seq;
+CREATE INDEX ix_bench_jobs_pending_id ON {SCHEMA}.jobs (id) WHERE status = 'PENDING'
+"""
+
+# claimed_seq numbers the claims (one value per statement) for the FIFO check
+CLAIM_SQL = f"""
+UPDATE {SCHEMA}.jobs
+SET status = 'PROCESSING', started_at = now(), lease_expires_at = now() + interval '60 seconds',
+    claimed_by = %s, claimed_seq = (SELECT nextval('{SCHEMA}.claim_seq'))
+WHERE id IN (
+    SELECT id FROM {SCHEMA}.jobs WHERE status = 'PENDING' ORDER BY id LIMIT %s FOR UPDATE{{skip}}
+)
+RETURNING id
+"""
+
+FINALIZE_SQL = f"""
+UPDATE {SCHEMA}.jobs SET status = 'COMPLETED', lease_expires_at = NULL WHERE id = ANY(%s)
+"""
+
+MODES = {
+    'skip_locked': ' SKIP LOCKED',
+    'blocking': '',
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(number: int, mode: str, batch: int, work_ms: float, start, results):
+    conn = get_tcp_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    claim = CLAIM_SQL.format(skip=MODES[mode])
+    latencies, claimed, empty = [], 0, 0
+    
+    start.wait()
+    while True:
+        began = time.perf_counter()
+        cursor.execute(claim, (number, batch))
+        ids = [row[0] for row in cursor.fetchall()]
+        latencies.append(time.perf_counter() - began)
+        if not ids:
+            # A blocking claim can come back empty after waiting on rows another worker took
+            cursor.execute(f"SELECT 1 FROM {SCHEMA}.jobs WHERE status = 'PENDING' LIMIT 1")
+            if cursor.fetchone() is None:
+                break
+            empty += 1
+            continue
+        if work_ms:
+            time.sleep(work_ms / 1000 * len(ids))
+        cursor.execute(FINALIZE_SQL, (ids,))
+        claimed += len(ids)
+    
+    conn.close()
+    results.put({'worker': number, 'claimed': claimed, 'empty_claims': empty, 'latencies': latencies})
+
+
+def seed(cursor, jobs: int):
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    for statement in TABLE.split(';'):
+        cursor.execute(statement)
+    cursor.execute(
+        f"INSERT INTO {SCHEMA}.jobs (payload_hash) SELECT md5(n::text) || md5(n::text) FROM generate_series(1, %s) n",
+        (jobs,)
+    )
+    cursor.execute(f"VACUUM ANALYZE {SCHEMA}.jobs")
+
+
+def run_case(cursor, mode: str, workers: int, jobs: int, batch: int, work_ms: float) -> dict:
+    seed(cursor, jobs)
+    
+    context = multiprocessing.get_context('spawn')
+    start = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(n, mode, batch, work_ms, start, results)) for n in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    start.wait()
+    began = time.perf_counter()
+    stats = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    
+    cursor.execute(
+        f"SELECT count(*) FILTER (WHERE status = 'COMPLETED'), "
+        f"count(*) FILTER (WHERE older_claimed_later) FROM ("
+        f"  SELECT status, claimed_seq < max(claimed_seq) OVER (ORDER BY id ROWS UNBOUNDED PRECEDING) "
+        f"         AS older_claimed_later FROM {SCHEMA}.jobs"
+        f") ordered"
+    )
+    completed, inversions = cursor.fetchone()
+    
+    per_worker = [s['claimed'] for s in stats]
+    latencies = [latency for s in stats for latency in s['latencies']]
+    fairness = sum(per_worker) ** 2 / (len(per_worker) * sum(c * c for c in per_worker)) if any(per_worker) else 0
+    return {
+        'mode': mode,
+        'workers': workers,
+        'completed': completed,
+        'seconds': round(elapsed, 3),
+        'jobs_per_second': round(completed / elapsed, 1),
+        'claim_p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'claim_p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'empty_claims': sum(s['empty_claims'] for s in stats),
+        'jain_fairness': round(fairness, 4),
+        'per_worker_min': min(per_worker),
+        'per_worker_max': max(per_worker),
+        'fifo_inversion_share': round(inversions / completed, 4) if completed else None,
+    }
+
+
+def run(jobs: int, workers_list, modes, batch: int, work_ms: float, keep: bool) -> dict:
+    conn = get_tcp_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    
+    try:
+        results = [
+            run_case(cursor, mode, workers, jobs, batch, work_ms)
+            for mode in modes for workers in workers_list
+        ]
+    finally:
+        if not keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.close()
+    
+    return {'jobs': jobs, 'batch': batch, 'work_ms_per_job': work_ms, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=50_000)
+    parser.add_argument('--workers', default='1,4,16', help='comma-separated worker process counts')
+    parser.add_argument('--modes', default='skip_locked,blocking', help=f"comma-separated: {', '.join(MODES)}")
+    parser.add_argument('--batch', type=int, default=16, help='jobs per claim')
+    parser.add_argument('--work-ms', type=float, default=0.0, help='simulated work per job')
+    parser.add_argument('--keep', action='store_true', help=f'keep the {SCHEMA} schema afterwards')
+    args = parser.parse_args()
+    
+    workers_list = [int(n) for n in args.workers.split(',')]
+    modes = [mode for mode in args.modes.split(',') if mode]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode: {mode}")
+    
+    print(json.dumps(run(args.jobs, workers_list, modes, args.batch, args.work_ms, args.keep), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Bulk-load jobs or event logs (backfills, replays, imports) via COPY
+
+Input is NDJSON (.ndjson/.jsonl) or CSV with a header row, optionally gzipped;
+fields are the column names of the target table (see src/ingest.py).
+
+Usage:
+    python bulk_ingest.py jobs jobs.ndjson.gz
+    python bulk_ingest.py event_logs events.csv --on-conflict update
+"""
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.logging_config import get_logger
+from src.ingest import TARGETS, ingest, read_records
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('table', choices=sorted(TARGETS))
+    parser.add_argument('path', help='Input file')
+    parser.add_argument('--chunk-rows', type=int, default=50_000, help='Rows per transaction')
+    parser.add_argument('--on-conflict', choices=['skip', 'update'], default='skip')
+    parser.add_argument('--progress-every', type=int, default=100_000, help='Log progress every N rows')
+    args = parser.parse_args()
+    
+    try:
+        result = ingest(
+            args.table,
+            read_records(args.path),
+            chunk_rows=args.chunk_rows,
+            on_conflict=args.on_conflict,
+            progress_every=args.progress_every,
+            progress=lambda totals: print(
+                f"{totals['rows']} rows ({totals['rows_per_second']}/s)", file=sys.stderr
+            )
+        )
+        logger.info("✅ Ingest finished", **result)
+    except Exception as e:
+        logger.error(f"❌ Ingest failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
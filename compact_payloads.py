@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Move inline payloads of existing jobs, archived jobs and message.received
+events into the content-addressed payload store (src/payloads.py)
+
+Safe to run next to live traffic and to rerun. Run VACUUM (or repack the
+tables) afterwards to reclaim the space.
+"""
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.logging_config import get_logger
+from src.payloads import compact_payloads
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--table', action='append', choices=['jobs', 'jobs_archive', 'event_logs'],
+        help='Table to compact (repeatable; default all)'
+    )
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+    parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+    args = parser.parse_args()
+    
+    try:
+        result = compact_payloads(
+            tables=args.table or ('jobs', 'jobs_archive', 'event_logs'),
+            batch_size=args.batch_size,
+            pause_seconds=args.pause
+        )
+        logger.info("✅ Payload compaction finished", **result)
+    except Exception as e:
+        logger.error(f"❌ Payload compaction failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
@@ -10,7 +10,12 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.config import config
 from src.logging_config import get_logger
-from src.database import init_db
+from sqlalchemy import inspect
+
+from src.change_feed import sync_change_feed
+from src.database import init_db, get_engine
+from src.migrations import OPTIONAL_MIGRATIONS_DIR, baseline, migrate
+from src.partitions import run_maintenance
 
 logger = get_logger(__name__)
 
@@ -18,9 +23,19 @@ if __name__ == "__main__":
     logger.info("Starting database initialization...")
     
     try:
+        fresh = not inspect(get_engine()).has_table("jobs")
         init_db()
+        if fresh:
+            # create_all already built the migrated schema
+            baseline()
+            if config.database.native_uuid_ids:
+                baseline(directory=OPTIONAL_MIGRATIONS_DIR)
+        else:
+            migrate()
+        sync_change_feed()
+        run_maintenance(retention=False)
         logger.info("✅ Database initialized successfully!")
-        logger.info(f"Created tables: jobs, event_logs, system_metrics")
+        logger.info(f"Created tables: jobs, event_logs (partitioned), system_metrics")
     except Exception as e:
         logger.error(f"❌ Failed to initialize database: {e}", error=str(e), error_type=type(e).__name__)
         sys.exit(1)
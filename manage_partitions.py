@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Maintain event_logs partitions: pre-create future partitions and apply retention
+
+Run daily (cron / Cloud Scheduler). Settings: EVENT_PARTITION_INTERVAL,
+EVENT_PARTITION_PREMAKE, EVENT_RETENTION_DAYS, EVENT_RETENTION_ACTION,
+EVENT_ARCHIVE_DIR.
+"""
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.config import config
+from src.logging_config import get_logger
+from src.database import get_engine
+from src.partitions import expired_partitions, list_partitions, run_maintenance
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--no-retention', action='store_true', help='Only create partitions')
+    parser.add_argument('--list', action='store_true', help='List partitions and those past retention, then exit')
+    args = parser.parse_args()
+    
+    try:
+        if args.list:
+            with get_engine().connect() as conn:
+                expired = {p.name for p in expired_partitions(conn)}
+                with conn.begin():
+                    conn.exec_driver_sql("SET LOCAL TIME ZONE 'UTC'")
+                    partitions = list_partitions(conn)
+            for partition in partitions:
+                lower = partition.lower.isoformat() if partition.lower else 'MINVALUE'
+                upper = partition.upper.isoformat() if partition.upper else 'MAXVALUE'
+                marker = '  (expired)' if partition.name in expired else ''
+                print(f"{partition.name}  [{lower}, {upper}){marker}")
+            sys.exit(0)
+        
+        result = run_maintenance(retention=not args.no_retention)
+        logger.info(
+            "✅ Partition maintenance finished",
+            interval=config.partitions.interval,
+            retention_days=config.partitions.retention_days,
+            **result
+        )
+    except Exception as e:
+        logger.error(f"❌ Partition maintenance failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Apply pending schema migrations (migrations/NNNN_name.sql)
+"""
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.change_feed import sync_change_feed
+from src.logging_config import get_logger
+from src.migrations import OPTIONAL_MIGRATIONS_DIR, MIGRATIONS_DIR, migrate
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--target', help='Stop after this version (e.g. 0001)')
+    parser.add_argument('--dry-run', action='store_true', help='List pending migrations without applying them')
+    parser.add_argument('--optional', action='store_true', help='Apply the opt-in set in migrations/optional')
+    args = parser.parse_args()
+    
+    try:
+        directory = OPTIONAL_MIGRATIONS_DIR if args.optional else MIGRATIONS_DIR
+        versions = migrate(directory=directory, target=args.target, dry_run=args.dry_run)
+        logger.info("✅ Migrations up to date", versions=versions, dry_run=args.dry_run)
+        if not args.dry_run and not args.optional:
+            # Change feed triggers follow CHANGE_FEED_ENABLED, not a migration
+            sync_change_feed()
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
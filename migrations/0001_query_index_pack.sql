@@ -0,0 +1,39 @@
+-- migrate:no-transaction
+-- Index pack matched to the hot query paths; built CONCURRENTLY so writes
+-- continue during the migration. New indexes are created before the ones
+-- they replace are dropped.
+--
+-- Status is stored as the JobStatus member name ('COMPLETED', ...).
+
+-- Job listing: WHERE status = ? ORDER BY created_at DESC (id breaks ties for stable pages)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_status_created_at_id
+    ON jobs (status, created_at DESC, id);
+
+-- Average duration of completed jobs: index-only scan over completed rows
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_completed_duration
+    ON jobs (completed_at, started_at)
+    WHERE status = 'COMPLETED';
+
+-- Terminal jobs by age (retention / archival scans)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_terminal_updated_at
+    ON jobs (updated_at)
+    WHERE status IN ('COMPLETED', 'FAILED', 'DEAD_LETTER');
+
+-- Job event history: WHERE job_id = ? ORDER BY timestamp
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_logs_job_id_timestamp
+    ON event_logs (job_id, timestamp);
+
+-- Redundant: duplicate the primary keys
+DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_event_logs_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_system_metrics_id;
+
+-- Redundant: duplicate the UNIQUE constraints (schema.sql)
+DROP INDEX CONCURRENTLY IF EXISTS idx_jobs_job_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_event_logs_event_id;
+
+-- Redundant: prefixes of the composite indexes above
+DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_status;
+DROP INDEX CONCURRENTLY IF EXISTS idx_jobs_status;
+DROP INDEX CONCURRENTLY IF EXISTS ix_event_logs_job_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_event_logs_job_id;
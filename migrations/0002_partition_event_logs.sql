@@ -0,0 +1,57 @@
+-- Range-partition event_logs by timestamp
+--
+-- The existing table is attached as the event_logs_legacy partition covering
+-- everything before the next UTC midnight (or after its newest row), so no rows are copied (attaching
+-- validates the rows and builds the new primary key and unique constraint).
+-- src/partitions.py creates the partitions after it and applies retention;
+-- the legacy partition is dropped once its upper bound leaves the retention window.
+--
+-- Unique constraints on a partitioned table must include the partition key:
+-- the primary key becomes (id, timestamp) and event_id is unique per timestamp.
+
+DO $$
+DECLARE
+    idx record;
+    legacy_pkey name;
+    cutoff timestamptz := (date_trunc('day', now() AT TIME ZONE 'UTC') + interval '1 day') AT TIME ZONE 'UTC';
+BEGIN
+    -- Databases created from the current models are already partitioned
+    IF (SELECT relkind FROM pg_class WHERE oid = 'event_logs'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE event_logs RENAME TO event_logs_legacy;
+    FOR idx IN
+        SELECT indexname FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = 'event_logs_legacy'
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', idx.indexname,
+                       replace(idx.indexname, 'event_logs', 'event_logs_legacy'));
+    END LOOP;
+    ALTER TABLE event_logs_legacy ALTER COLUMN timestamp SET NOT NULL;
+    -- Cover future-dated rows too (clock skew), or the attach would fail
+    SELECT greatest(cutoff, (date_trunc('day', max(timestamp) AT TIME ZONE 'UTC') + interval '1 day') AT TIME ZONE 'UTC')
+    INTO cutoff FROM event_logs_legacy;
+    -- Replaced by the parent's (id, timestamp) key when attached
+    SELECT conname INTO legacy_pkey FROM pg_constraint
+    WHERE conrelid = 'event_logs_legacy'::regclass AND contype = 'p';
+    EXECUTE format('ALTER TABLE event_logs_legacy DROP CONSTRAINT %I', legacy_pkey);
+
+    CREATE TABLE event_logs (LIKE event_logs_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (timestamp);
+    -- Keep the id sequence alive when the legacy partition is dropped
+    ALTER SEQUENCE event_logs_id_seq OWNED BY event_logs.id;
+    ALTER TABLE event_logs ADD CONSTRAINT event_logs_pkey PRIMARY KEY (id, timestamp);
+    ALTER TABLE event_logs ADD CONSTRAINT uq_event_logs_event_id_timestamp UNIQUE (event_id, timestamp);
+    CREATE INDEX ix_event_logs_event_type ON event_logs (event_type);
+    CREATE INDEX ix_event_logs_job_id_timestamp ON event_logs (job_id, timestamp);
+    CREATE INDEX ix_event_logs_correlation_id ON event_logs (correlation_id);
+
+    EXECUTE format(
+        'ALTER TABLE event_logs ATTACH PARTITION event_logs_legacy FOR VALUES FROM (MINVALUE) TO (%L)',
+        cutoff
+    );
+END
+$$;
+
+-- Catches rows outside every range partition (e.g. if maintenance stops running)
+CREATE TABLE IF NOT EXISTS event_logs_default PARTITION OF event_logs DEFAULT;
@@ -0,0 +1,22 @@
+-- Cold storage for terminal jobs moved out of jobs by src/archival.py
+--
+-- jobs_archive mirrors jobs (LIKE keeps the status column type of whichever
+-- schema created jobs) plus archived_at. jobs_archive_stats keeps running
+-- aggregates of archived jobs so /api/v1/jobs/stats/summary stays complete
+-- without scanning the archive.
+
+CREATE TABLE jobs_archive (LIKE jobs INCLUDING DEFAULTS);
+ALTER TABLE jobs_archive ALTER COLUMN id DROP DEFAULT;
+ALTER TABLE jobs_archive ADD COLUMN archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE jobs_archive ADD CONSTRAINT jobs_archive_pkey PRIMARY KEY (id);
+CREATE UNIQUE INDEX ix_jobs_archive_job_id ON jobs_archive (job_id);
+CREATE INDEX ix_jobs_archive_archived_at ON jobs_archive (archived_at);
+
+CREATE TABLE jobs_archive_stats (
+    status VARCHAR(50) PRIMARY KEY,
+    job_count BIGINT NOT NULL DEFAULT 0,
+    duration_count BIGINT NOT NULL DEFAULT 0,
+    duration_seconds_total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    retries_total BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
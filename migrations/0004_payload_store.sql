@@ -0,0 +1,21 @@
+-- Content-addressed payload store (src/payloads.py)
+--
+-- Message bodies are stored once, keyed by the SHA-256 of their canonical
+-- JSON. jobs/jobs_archive reference them through payload_hash and
+-- message.received events through data->>'payload_hash'; the inline
+-- payload columns stay for rows written earlier (compact_payloads.py
+-- moves those into the store).
+
+CREATE TABLE payloads (
+    hash VARCHAR(64) PRIMARY KEY,
+    encoding VARCHAR(16) NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    body BYTEA,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Bodies above PAYLOAD_COMPRESS_THRESHOLD are already zlib-compressed
+ALTER TABLE payloads ALTER COLUMN body SET STORAGE EXTERNAL;
+
+ALTER TABLE jobs ADD COLUMN payload_hash VARCHAR(64);
+ALTER TABLE jobs_archive ADD COLUMN payload_hash VARCHAR(64);
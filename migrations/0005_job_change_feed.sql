@@ -0,0 +1,43 @@
+-- jobs change feed (src/change_feed.py)
+--
+-- One NOTIFY per statement (not per row) on channel job_changes with
+-- {"op", "ts", "job_ids"}; ids are split across notifications to stay
+-- well below the 8000-byte payload limit. Notifications are delivered on
+-- commit, so listeners never see rolled-back changes.
+
+CREATE OR REPLACE FUNCTION notify_job_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    message text;
+BEGIN
+    FOR message IN
+        SELECT json_build_object(
+            'op', lower(TG_OP),
+            'ts', extract(epoch FROM clock_timestamp()),
+            'job_ids', json_agg(job_id)
+        )::text
+        FROM (
+            SELECT job_id,
+                   sum(octet_length(job_id::text) + 3) OVER (ORDER BY job_id ROWS UNBOUNDED PRECEDING) / 7000 AS chunk
+            FROM changed
+        ) numbered
+        GROUP BY chunk
+    LOOP
+        PERFORM pg_notify('job_changes', message);
+    END LOOP;
+    RETURN NULL;
+END
+$$;
+
+-- Transition tables allow only one event per trigger
+CREATE TRIGGER jobs_change_feed_insert AFTER INSERT ON jobs
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_job_changes();
+
+CREATE TRIGGER jobs_change_feed_update AFTER UPDATE ON jobs
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_job_changes();
+
+CREATE TRIGGER jobs_change_feed_delete AFTER DELETE ON jobs
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_job_changes();
@@ -0,0 +1,20 @@
+-- Transactional outbox (src/outbox.py)
+--
+-- Written in the same transaction as the job change it belongs to;
+-- relays claim rows with FOR UPDATE SKIP LOCKED and delete them once
+-- delivered. Rows are short-lived, so the table stays small.
+
+CREATE TABLE outbox (
+    id BIGSERIAL PRIMARY KEY,
+    topic VARCHAR(100) NOT NULL,
+    payload JSON NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX ix_outbox_available_at_id ON outbox (available_at, id);
+
+-- High churn: vacuum well before the default 20% of dead rows
+ALTER TABLE outbox SET (autovacuum_vacuum_scale_factor = 0.01, autovacuum_vacuum_threshold = 1000);
@@ -0,0 +1,16 @@
+-- migrate:no-transaction
+-- Leases on PROCESSING jobs (src/leases.py)
+--
+-- The worker sets lease_expires_at when it takes a job and renews it while
+-- the handler runs; a job whose lease ran out belongs to a worker that died.
+-- The reaper finds those rows through a partial index that only holds
+-- PROCESSING jobs, so its scans stay small however large jobs grows.
+
+-- Nullable without a default: a catalog-only change, no table rewrite
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE jobs_archive ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+
+-- id is included so the reaper's candidate scan is index-only
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_processing_lease
+    ON jobs (lease_expires_at, id)
+    WHERE status = 'PROCESSING';
@@ -0,0 +1,11 @@
+-- migrate:no-transaction
+-- Pull-mode work queue on jobs (src/queue_worker.py)
+--
+-- Workers claim the oldest PENDING jobs with FOR UPDATE SKIP LOCKED. The
+-- partial index holds only PENDING rows, so a claim reads a few index
+-- pages at the head of the queue instead of walking the status index past
+-- every finished job.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_pending_id
+    ON jobs (id)
+    WHERE status = 'PENDING';
@@ -0,0 +1,17 @@
+-- migrate:no-transaction
+-- Job priority and lane-aware claims (src/lanes.py, src/queue_worker.py)
+--
+-- priority > 0 runs in the high lane, 0 in normal, < 0 in bulk. Pull
+-- workers claim per lane, highest priority first and FIFO within a
+-- priority, so the pending index is ordered the same way and replaces
+-- ix_jobs_pending_id from 0008.
+
+-- A constant default is stored in the catalog: no table rewrite
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE jobs_archive ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 0;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_pending_priority_id
+    ON jobs (priority DESC, id)
+    WHERE status = 'PENDING';
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_pending_id;
@@ -0,0 +1,18 @@
+-- migrate:no-transaction
+-- Make the jobs change feed opt-in (src/change_feed.py)
+--
+-- The statement-level NOTIFY triggers from 0005 serialize every commit that
+-- writes jobs on the global notify queue lock, even with the listener off.
+-- They are now created by change_feed.install_change_feed(), which
+-- migrate.py and init_database.py run only when CHANGE_FEED_ENABLED is set
+-- (and drop them otherwise). notify_job_changes() itself stays in place.
+
+DROP TRIGGER IF EXISTS jobs_change_feed_insert ON jobs;
+DROP TRIGGER IF EXISTS jobs_change_feed_update ON jobs;
+DROP TRIGGER IF EXISTS jobs_change_feed_delete ON jobs;
+
+-- Change feed resync: non-terminal jobs by updated_at; terminal ones are
+-- covered by ix_jobs_terminal_updated_at from 0001
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_active_updated_at
+    ON jobs (updated_at)
+    WHERE status NOT IN ('COMPLETED', 'FAILED', 'DEAD_LETTER');
@@ -0,0 +1,12 @@
+-- Leases for jobs that were PROCESSING before 0007 (src/leases.py)
+--
+-- The reaper matches lease_expires_at < now(), which is never true for NULL,
+-- so jobs stuck before leases existed were never recovered. Give each one a
+-- lease that ran out the default JOB_LEASE_SECONDS (60) after its last
+-- update: abandoned jobs are reaped on the next pass, a job still being
+-- worked on keeps a short grace period. The partial index on PROCESSING
+-- jobs (0007) finds the NULL leases without scanning jobs.
+
+UPDATE jobs
+SET lease_expires_at = coalesce(updated_at, started_at, created_at, now()) + interval '60 seconds'
+WHERE status = 'PROCESSING' AND lease_expires_at IS NULL;
@@ -0,0 +1,25 @@
+-- Store job_id / event_id as native uuid instead of VARCHAR(255)
+--
+-- 16-byte keys instead of 37+ bytes make the unique indexes smaller and
+-- comparisons cheaper. Apply with `python migrate.py --optional`, then set
+-- DB_NATIVE_UUID_IDS=true on every service. Rewrites the tables (event_logs
+-- partition by partition) under ACCESS EXCLUSIVE locks: run in a maintenance
+-- window. Aborts if any existing id is not a UUID (e.g. bulk-imported ids).
+
+DO $$
+DECLARE
+    pattern CONSTANT text := '^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$';
+BEGIN
+    IF EXISTS (SELECT 1 FROM jobs WHERE job_id !~ pattern)
+       OR EXISTS (SELECT 1 FROM jobs_archive WHERE job_id !~ pattern)
+       OR EXISTS (SELECT 1 FROM event_logs WHERE event_id !~ pattern OR job_id !~ pattern) THEN
+        RAISE EXCEPTION 'job_id/event_id values that are not UUIDs exist; rewrite or archive them first';
+    END IF;
+END
+$$;
+
+ALTER TABLE jobs ALTER COLUMN job_id TYPE uuid USING job_id::uuid;
+ALTER TABLE jobs_archive ALTER COLUMN job_id TYPE uuid USING job_id::uuid;
+ALTER TABLE event_logs
+    ALTER COLUMN event_id TYPE uuid USING event_id::uuid,
+    ALTER COLUMN job_id TYPE uuid USING job_id::uuid;
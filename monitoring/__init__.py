@@ -4,11 +4,15 @@ Monitoring package for CUIDA+Care Command Center
 from .cloud_monitoring import (
     CloudMonitoringExporter,
     get_monitoring_exporter,
-    export_golden_signals
+    export_golden_signals,
+    export_cache_hit_rates,
+    start_cache_metrics_exporter
 )
 
 __all__ = [
     'CloudMonitoringExporter',
     'get_monitoring_exporter',
-    'export_golden_signals'
+    'export_golden_signals',
+    'export_cache_hit_rates',
+    'start_cache_metrics_exporter'
 ]
@@ -2,8 +2,10 @@
 Cloud Monitoring integration for CUIDA+Care Command Center
 Exports custom metrics to Google Cloud Monitoring
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+import threading
+import time
 from google.cloud import monitoring_v3
 from google.api import metric_pb2 as ga_metric
 from google.api import label_pb2 as ga_label
@@ -81,15 +83,15 @@ class CloudMonitoringExporter:
                 )
             return None
     
-    def write_time_series(
+    def _series(
         self,
         metric_type: str,
         value: float,
         resource_type: str = "cloud_run_revision",
         resource_labels: Optional[Dict[str, str]] = None,
         metric_labels: Optional[Dict[str, str]] = None
-    ):
-        """Write a time series data point"""
+    ) -> monitoring_v3.TimeSeries:
+        """Build a time series holding one data point taken now"""
         full_metric_type = f"{self.metric_prefix}/{metric_type}"
         
         series = monitoring_v3.TimeSeries()
@@ -120,11 +122,25 @@ class CloudMonitoringExporter:
         interval = monitoring_v3.TimeInterval(
             {"end_time": {"seconds": seconds, "nanos": nanos}}
         )
+        # Ints go out as int64: INT64 metrics (active_jobs) reject double values
+        typed_value = {"int64_value": value} if isinstance(value, int) else {"double_value": value}
         point = monitoring_v3.Point({
             "interval": interval,
-            "value": {"double_value": value}
+            "value": typed_value
         })
         series.points = [point]
+        return series
+    
+    def write_time_series(
+        self,
+        metric_type: str,
+        value: float,
+        resource_type: str = "cloud_run_revision",
+        resource_labels: Optional[Dict[str, str]] = None,
+        metric_labels: Optional[Dict[str, str]] = None
+    ):
+        """Write a time series data point"""
+        series = self._series(metric_type, float(value), resource_type, resource_labels, metric_labels)
         
         try:
             self.client.create_time_series(
@@ -133,16 +149,34 @@ class CloudMonitoringExporter:
             )
             logger.debug(
                 "Wrote time series",
-                metric_type=full_metric_type,
+                metric_type=series.metric.type,
                 value=value
             )
         except Exception as e:
             logger.error(
                 "Failed to write time series",
-                metric_type=full_metric_type,
+                metric_type=series.metric.type,
                 error=str(e)
             )
     
+    def write_points(self, points: List[Tuple[str, float, Optional[Dict[str, str]]]]):
+        """
+        Write several series in one request, one point each
+        
+        Unlike write_time_series, failures are raised so callers can retry.
+        Cloud Monitoring rejects a request with two points for one series.
+        
+        Args:
+            points: (metric_type, value, metric_labels) per series
+        """
+        if not points:
+            return
+        self.client.create_time_series(
+            name=self.project_name,
+            time_series=[self._series(metric_type, value, metric_labels=labels) for metric_type, value, labels in points]
+        )
+        logger.debug("Wrote time series", series=len(points))
+    
     def initialize_cuida_care_metrics(self):
         """Initialize all CUIDA+Care custom metrics"""
         
@@ -194,7 +228,10 @@ class CloudMonitoringExporter:
                 "description": "Percentage of cache hits vs total requests",
                 "metric_kind": "GAUGE",
                 "value_type": "DOUBLE",
-                "labels": {"cache_type": "Type of cache (redis/local)"}
+                "labels": {
+                    "cache_type": "Type of cache (redis/local)",
+                    "family": "Cache key family (job/job_list/metrics/agg)"
+                }
             },
             # Job Queue Depth
             {
@@ -264,3 +301,58 @@ def export_golden_signals(
         cpu_util=cpu_utilization,
         mem_util=memory_utilization
     )
+
+
+# Last exported per-family counts, for windowed hit rates
+_last_cache_counts: Dict[str, Dict[str, int]] = {}
+_cache_exporter_thread: Optional[threading.Thread] = None
+
+
+def export_cache_hit_rates(family_stats: Dict[str, Dict[str, Any]]):
+    """
+    Export per-family cache hit rates to Cloud Monitoring
+    
+    Rates cover the window since the previous export; families with no
+    lookups in the window are skipped.
+    
+    Args:
+        family_stats: Output of src.cache.get_family_stats()
+    """
+    exporter = get_monitoring_exporter()
+    
+    for family, stats in family_stats.items():
+        last = _last_cache_counts.get(family, {'hits': 0, 'misses': 0})
+        hits = stats['hits'] - last['hits']
+        misses = stats['misses'] - last['misses']
+        _last_cache_counts[family] = {'hits': stats['hits'], 'misses': stats['misses']}
+        
+        if hits + misses <= 0:
+            continue
+        
+        exporter.write_time_series(
+            "cache_hit_rate",
+            hits / (hits + misses) * 100,
+            metric_labels={"cache_type": "redis", "family": family}
+        )
+
+
+def start_cache_metrics_exporter(interval_seconds: int = 60):
+    """Export per-family cache hit rates periodically from a daemon thread"""
+    global _cache_exporter_thread
+    
+    if _cache_exporter_thread is not None:
+        return
+    
+    from src.cache import get_family_stats
+    
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                export_cache_hit_rates(get_family_stats())
+            except Exception as e:
+                logger.warning("Failed to export cache hit rates", error=str(e))
+    
+    _cache_exporter_thread = threading.Thread(target=run, name="cache-metrics-exporter", daemon=True)
+    _cache_exporter_thread.start()
+    logger.info("Cache metrics exporter started", interval_seconds=interval_seconds)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Run the outbox relay as a standalone process
+
+Workers relay their own outbox rows in a background thread
+(OUTBOX_RELAY_ENABLED); run this to drain the outbox separately, e.g. with
+the in-process relay disabled or to work off a backlog.
+"""
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.logging_config import get_logger
+from src.outbox import relay_batch, run_relay, update_backlog_metrics
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help='Drain what is due, then exit')
+    parser.add_argument('--status', action='store_true', help='Print the backlog and exit')
+    args = parser.parse_args()
+    
+    try:
+        if args.status:
+            print(update_backlog_metrics())
+            sys.exit(0)
+        
+        if args.once:
+            total = 0
+            while True:
+                claimed = relay_batch()
+                total += claimed
+                if not claimed:
+                    break
+            logger.info("✅ Outbox drained", messages=total)
+        else:
+            logger.info("Outbox relay running")
+            run_relay()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error(f"❌ Outbox relay failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Publish messages to Pub/Sub in bulk (load tests, replays, backfills)
+
+Input is one message per line ('-' reads stdin), optionally gzipped: plain
+text, or NDJSON with {"data": ..., "attributes": {...}} per line. Messages
+go through the batching publisher in src/publisher.py; --rate paces them to
+a target messages per second. Prints published-per-second and publish
+latency when done. Set PUBSUB_EMULATOR_HOST to use the local emulator.
+
+Usage:
+    python publish_messages.py messages.txt --rate 500
+    seq 1 100000 | python publish_messages.py - --attribute source=loadtest
+    PUBSUB_EMULATOR_HOST=localhost:8085 python publish_messages.py events.ndjson.gz --format ndjson --create-topic
+"""
+import argparse
+import itertools
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.logging_config import get_logger
+from src.publisher import close_publisher, ensure_topic, publish_stream, read_messages
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help="Input file ('-' for stdin)")
+    parser.add_argument('--format', choices=['text', 'ndjson'], default='text')
+    parser.add_argument('--topic', help='Topic name (default: PUBSUB_TOPIC)')
+    parser.add_argument('--rate', type=float, help='Target messages per second (default: as fast as possible)')
+    parser.add_argument('--count', type=int, help='Stop after N messages')
+    parser.add_argument('--attribute', action='append', default=[], help='key=value added to every message')
+    parser.add_argument('--create-topic', action='store_true', help='Create the topic if missing (emulator)')
+    parser.add_argument('--progress-every', type=float, default=5.0, help='Seconds between progress lines')
+    args = parser.parse_args()
+    
+    attributes = {}
+    for item in args.attribute:
+        if '=' not in item:
+            parser.error(f"--attribute must be key=value, got {item!r}")
+        key, value = item.split('=', 1)
+        attributes[key] = value
+    
+    try:
+        if args.create_topic:
+            ensure_topic(args.topic)
+        messages = read_messages(args.path, args.format, attributes)
+        if args.count is not None:
+            messages = itertools.islice(messages, args.count)
+        
+        result = publish_stream(
+            messages,
+            rate=args.rate,
+            topic=args.topic,
+            progress_every=args.progress_every,
+            progress=lambda totals: print(
+                f"{totals['published']}/{totals['sent']} published ({totals['published_per_second']}/s)",
+                file=sys.stderr
+            )
+        )
+        close_publisher()
+        if result['failed']:
+            logger.error(f"❌ {result['failed']} messages failed to publish", **result)
+            sys.exit(1)
+        logger.info("✅ Publish finished", **result)
+    except Exception as e:
+        logger.error(f"❌ Publish failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
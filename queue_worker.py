@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Run pull-mode workers that claim PENDING jobs from the jobs table
+
+Each process claims jobs with FOR UPDATE SKIP LOCKED and runs up to
+QUEUE_CONCURRENCY of them at once; start as many processes per node as
+the handlers and the database allow. Outbox delivery and lease recovery
+run in the background of every process (OUTBOX_RELAY_ENABLED,
+LEASE_REAPER_ENABLED). Stop with SIGTERM or Ctrl-C: running jobs are
+finished and finalized first.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def run_worker(concurrency, claim_batch_size, metrics_port):
+    from prometheus_client import start_http_server
+    from src.leases import start_lease_reaper, stop_lease_reaper
+    from src.outbox import start_outbox_relay, stop_outbox_relay
+    from src.queue_worker import QueueWorker
+    
+    if metrics_port:
+        start_http_server(metrics_port)
+    
+    worker = QueueWorker(concurrency=concurrency, claim_batch_size=claim_batch_size)
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+    
+    start_outbox_relay()
+    start_lease_reaper()
+    try:
+        worker.run()
+    finally:
+        stop_lease_reaper()
+        stop_outbox_relay()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=1, help='Worker processes to start')
+    parser.add_argument('--concurrency', type=int, help='Jobs running at once per process')
+    parser.add_argument('--claim-batch-size', type=int, help='Maximum jobs per claim')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics (process n uses port + n)')
+    args = parser.parse_args()
+    
+    try:
+        if args.processes == 1:
+            run_worker(args.concurrency, args.claim_batch_size, args.metrics_port)
+            sys.exit(0)
+        
+        processes = [
+            multiprocessing.Process(
+                target=run_worker, name=f"queue-worker-{n}",
+                args=(args.concurrency, args.claim_batch_size, args.metrics_port and args.metrics_port + n)
+            )
+            for n in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        # Forward SIGTERM; Ctrl-C already reaches the whole process group
+        signal.signal(signal.SIGTERM, lambda signum, frame: [p.terminate() for p in processes])
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for process in processes:
+            process.join()
+    except Exception as e:
+        logger.error(f"❌ Queue worker failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Recover PROCESSING jobs whose lease expired (their worker died mid-job)
+
+Workers run the reaper in a background thread (LEASE_REAPER_ENABLED); run
+this from cron / Cloud Scheduler when that is disabled, or to clear a
+backlog. Settings: LEASE_REAPER_BATCH_SIZE.
+"""
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.logging_config import get_logger
+from src.leases import count_expired_leases, run_reaper
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, help='Jobs per transaction')
+    parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+    parser.add_argument('--dry-run', action='store_true', help='Only count expired leases')
+    args = parser.parse_args()
+    
+    try:
+        if args.dry_run:
+            print(f"{count_expired_leases()} PROCESSING jobs with an expired lease")
+            sys.exit(0)
+        
+        totals = run_reaper(batch_size=args.batch_size, max_batches=args.max_batches)
+        logger.info("✅ Lease reaper finished", **totals)
+    except Exception as e:
+        logger.error(f"❌ Lease reaper failed: {e}", error=str(e), error_type=type(e).__name__)
+        sys.exit(1)
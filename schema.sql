@@ -7,7 +7,9 @@ CREATE TABLE IF NOT EXISTS jobs (
     job_id VARCHAR(255) UNIQUE NOT NULL,
     message_id VARCHAR(255),
     status VARCHAR(50) NOT NULL DEFAULT 'pending',
+    priority SMALLINT NOT NULL DEFAULT 0,
     payload JSONB,
+    payload_hash VARCHAR(64),
     result JSONB,
     error_message TEXT,
     retry_count INTEGER DEFAULT 0,
@@ -16,34 +18,104 @@ CREATE TABLE IF NOT EXISTS jobs (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     started_at TIMESTAMP WITH TIME ZONE,
     completed_at TIMESTAMP WITH TIME ZONE,
+    lease_expires_at TIMESTAMP WITH TIME ZONE,
     source VARCHAR(100),
     correlation_id VARCHAR(255)
 );
 
-CREATE INDEX IF NOT EXISTS idx_jobs_job_id ON jobs(job_id);
+-- job_id is covered by its UNIQUE constraint; status by the composite index
 CREATE INDEX IF NOT EXISTS idx_jobs_message_id ON jobs(message_id);
-CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
 CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
 CREATE INDEX IF NOT EXISTS idx_jobs_correlation_id ON jobs(correlation_id);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created_at_id ON jobs(status, created_at DESC, id);
+CREATE INDEX IF NOT EXISTS ix_jobs_completed_duration ON jobs(completed_at, started_at)
+    WHERE status = 'COMPLETED';
+CREATE INDEX IF NOT EXISTS ix_jobs_terminal_updated_at ON jobs(updated_at)
+    WHERE status IN ('COMPLETED', 'FAILED', 'DEAD_LETTER');
+-- Change feed resync: the remaining jobs by updated_at (src/change_feed.py)
+CREATE INDEX IF NOT EXISTS ix_jobs_active_updated_at ON jobs(updated_at)
+    WHERE status NOT IN ('COMPLETED', 'FAILED', 'DEAD_LETTER');
+-- Expired PROCESSING leases, found by the reaper with an index-only scan (src/leases.py)
+CREATE INDEX IF NOT EXISTS ix_jobs_processing_lease ON jobs(lease_expires_at, id)
+    WHERE status = 'PROCESSING';
+-- Pull-mode queue: PENDING jobs by priority, then arrival (src/queue_worker.py)
+CREATE INDEX IF NOT EXISTS ix_jobs_pending_priority_id ON jobs(priority DESC, id)
+    WHERE status = 'PENDING';
 
--- Event logs table: audit trail
+-- Change feed: NOTIFY job_changes with the changed job ids (src/change_feed.py)
+CREATE OR REPLACE FUNCTION notify_job_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    message text;
+BEGIN
+    FOR message IN
+        SELECT json_build_object(
+            'op', lower(TG_OP),
+            'ts', extract(epoch FROM clock_timestamp()),
+            'job_ids', json_agg(job_id)
+        )::text
+        FROM (
+            SELECT job_id,
+                   sum(octet_length(job_id::text) + 3) OVER (ORDER BY job_id ROWS UNBOUNDED PRECEDING) / 7000 AS chunk
+            FROM changed
+        ) numbered
+        GROUP BY chunk
+    LOOP
+        PERFORM pg_notify('job_changes', message);
+    END LOOP;
+    RETURN NULL;
+END
+$$;
+
+-- The triggers calling it are created only when CHANGE_FEED_ENABLED is set
+-- (change_feed.install_change_feed, run by migrate.py)
+
+-- Payloads table: content-addressed message bodies (jobs.payload_hash)
+CREATE TABLE IF NOT EXISTS payloads (
+    hash VARCHAR(64) PRIMARY KEY,
+    encoding VARCHAR(16) NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    body BYTEA,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE payloads ALTER COLUMN body SET STORAGE EXTERNAL;
+
+-- Event logs table: audit trail, range-partitioned by timestamp
+-- (partitions are created and expired by manage_partitions.py)
 CREATE TABLE IF NOT EXISTS event_logs (
-    id SERIAL PRIMARY KEY,
-    event_id VARCHAR(255) UNIQUE NOT NULL,
+    id SERIAL,
+    event_id VARCHAR(255) NOT NULL,
     event_type VARCHAR(100) NOT NULL,
     job_id VARCHAR(255),
     data JSONB,
     event_metadata JSONB,
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    correlation_id VARCHAR(255)
-);
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    correlation_id VARCHAR(255),
+    PRIMARY KEY (id, timestamp),
+    CONSTRAINT uq_event_logs_event_id_timestamp UNIQUE (event_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS event_logs_default PARTITION OF event_logs DEFAULT;
 
-CREATE INDEX IF NOT EXISTS idx_event_logs_event_id ON event_logs(event_id);
 CREATE INDEX IF NOT EXISTS idx_event_logs_event_type ON event_logs(event_type);
-CREATE INDEX IF NOT EXISTS idx_event_logs_job_id ON event_logs(job_id);
-CREATE INDEX IF NOT EXISTS idx_event_logs_timestamp ON event_logs(timestamp);
+CREATE INDEX IF NOT EXISTS ix_event_logs_job_id_timestamp ON event_logs(job_id, timestamp);
 CREATE INDEX IF NOT EXISTS idx_event_logs_correlation_id ON event_logs(correlation_id);
 
+-- Outbox table: post-commit side effects of job changes (src/outbox.py)
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGSERIAL PRIMARY KEY,
+    topic VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_outbox_available_at_id ON outbox(available_at, id);
+ALTER TABLE outbox SET (autovacuum_vacuum_scale_factor = 0.01, autovacuum_vacuum_threshold = 1000);
+
 -- System metrics table: monitoring and observability
 CREATE TABLE IF NOT EXISTS system_metrics (
     id SERIAL PRIMARY KEY,
@@ -2,8 +2,10 @@
 FastAPI REST API for CUIDA+Care Command Center
 Provides endpoints to query jobs, metrics, and system statistics
 """
-from fastapi import FastAPI, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse
+import math
+import re
+from fastapi import FastAPI, HTTPException, Query, Depends, Header, Request
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -12,26 +14,46 @@ from sqlalchemy.orm import Session
 
 from .config import config
 from .logging_config import get_logger
-from .database import get_db_session, get_engine
-from .models import Job, EventLog, SystemMetric, JobStatus
+from .database import get_read_session, get_read_engine, get_engine
+from .models import Job, JobArchive, JobArchiveStats, EventLog, SystemMetric, JobStatus
+from .snapshots import encode_job, decode_job
+from .ids import is_uuid
+from .payloads import load_payload, load_payloads
+from .change_feed import start_change_feed, get_change_feed_status
 from .cache import (
-    get_cached_job, cache_job, get_cache_stats,
-    CacheKey, cache_get, cache_set
+    get_cached_job, cache_job, cache_jobs, get_cache_stats,
+    CacheKey, cache_get_or_compute, is_primary_pinned
 )
+from .ratelimit import check_rate_limit
+from .query_profiler import get_profile, explain_sample
+from .warmup import register_warmup_task, start_warmup, is_ready, get_warmup_status
 
 logger = get_logger(__name__)
 
 # Metrics (will be imported from prometheus_client if needed)
 try:
-    from prometheus_client import Counter
+    from prometheus_client import Counter, generate_latest, CONTENT_TYPE_LATEST
     cache_hits = Counter('api_cache_hits_total', 'Total cache hits')
     cache_misses = Counter('api_cache_misses_total', 'Total cache misses')
+    prometheus_enabled = True
 except ImportError:
     # Fallback if prometheus_client not available
     class DummyCounter:
         def inc(self): pass
     cache_hits = DummyCounter()
     cache_misses = DummyCounter()
+    prometheus_enabled = False
+
+# Cloud Monitoring integration
+try:
+    import sys
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from monitoring import start_cache_metrics_exporter
+    monitoring_enabled = True
+except ImportError as e:
+    monitoring_enabled = False
+    logger.warning("Cloud Monitoring not available", error=str(e))
 
 # FastAPI app
 app = FastAPI(
@@ -49,7 +71,8 @@ class JobResponse(BaseModel):
     job_id: str
     message_id: Optional[str] = None
     status: str
-    payload: Optional[Dict[str, Any]] = None
+    payload: Optional[Dict[str, Any]] = None  # only with include_payload=true
+    payload_hash: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
     retry_count: int = 0
@@ -60,6 +83,7 @@ class JobResponse(BaseModel):
     completed_at: Optional[datetime] = None
     source: Optional[str] = None
     correlation_id: Optional[str] = None
+    priority: int = 0
     
     class Config:
         from_attributes = True
@@ -90,24 +114,87 @@ class SystemHealthResponse(BaseModel):
     timestamp: datetime
 
 
+class CacheFamilyStats(BaseModel):
+    """Client-side cache stats for one key family"""
+    hits: int
+    misses: int
+    hit_rate: float
+
+
 class CacheStatsResponse(BaseModel):
     """Cache statistics response"""
     connected: bool
     hit_rate: float
+    hits: int
+    misses: int
+    families: Dict[str, CacheFamilyStats] = {}
     keyspace_hits: int
     keyspace_misses: int
     total_commands_processed: int
     connected_clients: int
     used_memory_human: str
+    circuit_state: Optional[str] = None
+    pool_in_use: Optional[int] = None
+    pool_max_connections: Optional[int] = None
+    change_feed: Optional[Dict[str, Any]] = None
+
+
+@app.on_event("startup")
+def start_background_tasks():
+    """Start warm-up, the job change feed and periodic Cloud Monitoring exports"""
+    start_warmup()
+    start_change_feed()
+    if monitoring_enabled:
+        start_cache_metrics_exporter(config.redis.stats_export_interval)
 
 
 # Dependency to get database session
-def get_db():
-    """Dependency to get database session"""
-    with get_db_session() as session:
+def get_db(x_correlation_id: Optional[str] = Header(None)):
+    """
+    Dependency to get a read-only database session
+    
+    Routed to a replica unless the caller's correlation id was written
+    recently, in which case it reads from the primary (read-your-writes).
+    """
+    prefer_primary = bool(x_correlation_id) and is_primary_pinned(x_correlation_id)
+    with get_read_session(prefer_primary=prefer_primary) as session:
         yield session
 
 
+def client_address(request: Request) -> Optional[str]:
+    """
+    Caller address as seen by the trusted proxies
+    
+    With RATE_LIMIT_TRUSTED_PROXY_HOPS proxies in front, the address the
+    outermost one appended to X-Forwarded-For (entries left of it are
+    client-supplied); otherwise the peer address.
+    """
+    hops = config.rate_limit.trusted_proxy_hops
+    if hops:
+        forwarded = [a.strip() for a in request.headers.get('x-forwarded-for', '').split(',') if a.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else None
+
+
+def rate_limit(request: Request):
+    """
+    Dependency applying the shared per-caller rate limit (source 'api')
+    
+    Callers are told apart by client address, or by the RATE_LIMIT_KEY_HEADER
+    header when a trusted gateway sets it.
+    """
+    key_header = config.rate_limit.key_header
+    tenant = (request.headers.get(key_header) if key_header else None) or client_address(request)
+    decision = check_rate_limit('api', 'api', tenant)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(decision.retry_after))}
+        )
+
+
 # Health & Status Endpoints
 @app.get("/", tags=["Health"])
 @app.get("/health", tags=["Health"])
@@ -121,6 +208,15 @@ def health():
     }
 
 
+@app.get("/readiness", tags=["Health"])
+def readiness():
+    """Readiness check - ready once startup warm-up has finished"""
+    warmup = get_warmup_status()
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": warmup})
+    return {"status": "ready", "warmup": warmup}
+
+
 @app.get("/status", response_model=SystemHealthResponse, tags=["Health"])
 def system_status():
     """
@@ -157,29 +253,183 @@ def system_status():
     )
 
 
+@app.get("/metrics", tags=["Monitoring"])
+def metrics():
+    """Prometheus metrics endpoint"""
+    if not prometheus_enabled:
+        raise HTTPException(status_code=501, detail="prometheus_client not installed")
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/cache/stats", response_model=CacheStatsResponse, tags=["Monitoring"])
 def cache_statistics():
     """
-    Get Redis cache statistics including hit rate and memory usage
+    Get Redis cache statistics including per-family hit rates and memory usage
     """
     try:
         stats = get_cache_stats()
         if not stats.get('connected'):
             raise HTTPException(status_code=503, detail="Cache not connected")
         
-        return CacheStatsResponse(**stats)
+        return CacheStatsResponse(**stats, change_feed=get_change_feed_status())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Failed to get cache stats", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/debug/queries", tags=["Monitoring"])
+def query_profile(
+    order_by: str = Query("total_seconds", pattern="^(total_seconds|p95_seconds|max_seconds|count)$"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """
+    Get per-fingerprint statement statistics from this process
+    """
+    return {'fingerprints': get_profile(order_by=order_by, limit=limit)}
+
+
+@app.get("/debug/queries/{fingerprint_id}/explain", tags=["Monitoring"])
+def query_explain(fingerprint_id: str):
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) on the sampled slowest statement of a fingerprint
+    
+    Disabled unless DB_PROFILER_EXPLAIN_ENABLED=true: the statement is re-executed.
+    """
+    if not config.database.profiler_explain_enabled:
+        raise HTTPException(status_code=403, detail="EXPLAIN capture disabled")
+    
+    try:
+        result = explain_sample(fingerprint_id, get_read_engine())
+    except Exception as e:
+        logger.error("EXPLAIN capture failed", fingerprint_id=fingerprint_id, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No slow sample for fingerprint {fingerprint_id}")
+    
+    return result
+
+
+# Cache loaders (open their own session: they may run as background refreshes)
+def _load_job_list(status: Optional[JobStatus], page: int, limit: int) -> Dict[str, Any]:
+    """Query one page of jobs"""
+    with get_read_session() as db:
+        query = db.query(Job)
+        
+        if status:
+            query = query.filter(Job.status == status)
+        
+        # Get total count
+        total = query.count()
+        
+        # Paginate
+        offset = (page - 1) * limit
+        jobs = query.order_by(desc(Job.created_at), Job.id).offset(offset).limit(limit).all()
+        
+        # Convert to response models through the snapshot encoding (as get_job
+        # does), which fills the defaults of bulk-ingested rows' NULL counters
+        job_responses = [JobResponse(**decode_job(encode_job(job))) for job in jobs]
+        
+        return JobListResponse(
+            total=total,
+            page=page,
+            limit=limit,
+            jobs=job_responses
+        ).dict()
+
+
+def _load_job_stats() -> Dict[str, Any]:
+    """Query aggregated job statistics (hot jobs plus the archive's running totals)"""
+    with get_read_session() as db:
+        # Count by status
+        status_counts = db.query(
+            Job.status,
+            func.count(Job.id)
+        ).group_by(Job.status).all()
+        
+        by_status = {status.value: count for status, count in status_counts}
+        
+        # Completed-job durations as sum and count so archived totals can be merged
+        duration_total, duration_count = db.query(
+            func.sum(
+                func.extract('epoch', Job.completed_at - Job.started_at)
+            ),
+            func.count(Job.id)
+        ).filter(
+            Job.status == JobStatus.COMPLETED,
+            Job.completed_at.isnot(None),
+            Job.started_at.isnot(None)
+        ).one()
+        duration_total = float(duration_total or 0)
+        
+        # Total retries
+        total_retries = db.query(func.sum(Job.retry_count)).scalar() or 0
+        
+        # Archived jobs (see src/archival.py)
+        for archived in db.query(JobArchiveStats).all():
+            status = JobStatus[archived.status].value
+            by_status[status] = by_status.get(status, 0) + archived.job_count
+            total_retries += archived.retries_total
+            if archived.status == JobStatus.COMPLETED.name:
+                duration_total += archived.duration_seconds_total
+                duration_count += archived.duration_count
+        
+        # Calculate success rate
+        completed = by_status.get('completed', 0)
+        failed = by_status.get('failed', 0)
+        total_finished = completed + failed
+        success_rate = (completed / total_finished * 100) if total_finished > 0 else 0.0
+        
+        return JobStatsResponse(
+            total_jobs=sum(by_status.values()),
+            by_status=by_status,
+            avg_duration_seconds=duration_total / duration_count if duration_count else None,
+            success_rate=round(success_rate, 2),
+            total_retries=total_retries
+        ).dict()
+
+
 # Job Endpoints
-@app.get("/api/v1/jobs", response_model=JobListResponse, tags=["Jobs"])
+def _resolve_payloads(jobs: List[Dict[str, Any]], include_payload: bool, db: Optional[Session] = None) -> List[Dict[str, Any]]:
+    """
+    Attach payloads to job dicts when requested, strip them otherwise
+    
+    Payloads are stored by hash (see src/payloads.py); rows written before
+    the payload store carry theirs inline.
+    """
+    if not include_payload:
+        return [{**job, 'payload': None} for job in jobs]
+    
+    hashes = [job['payload_hash'] for job in jobs if job.get('payload_hash') and job.get('payload') is None]
+    if not hashes:
+        return jobs
+    
+    if db is None:
+        with get_read_session() as session:
+            payloads = load_payloads(session, hashes)
+    else:
+        payloads = load_payloads(db, hashes)
+    
+    return [
+        {**job, 'payload': payloads.get(job.get('payload_hash'))} if job.get('payload') is None else job
+        for job in jobs
+    ]
+
+
+def _require_valid_id(job_id: str, detail: str):
+    """404 for ids a native uuid column could never hold (instead of a cast error)"""
+    if config.database.native_uuid_ids and not is_uuid(job_id):
+        raise HTTPException(status_code=404, detail=detail)
+
+
+@app.get("/api/v1/jobs", response_model=JobListResponse, tags=["Jobs"], dependencies=[Depends(rate_limit)])
 def list_jobs(
     status: Optional[str] = Query(None, description="Filter by status"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db)
+    include_payload: bool = Query(False, description="Resolve message payloads")
 ):
     """
     List jobs with pagination and optional status filter
@@ -187,178 +437,175 @@ def list_jobs(
     - **status**: Filter by job status (pending, processing, completed, failed, dead_letter)
     - **page**: Page number (starts at 1)
     - **limit**: Items per page (max 100)
+    - **include_payload**: Resolve each job's payload (omitted by default)
     """
-    # Try to get from cache first
-    cache_key = CacheKey.job_list(status, page, limit)
-    cached_result = cache_get(cache_key)
-    
-    if cached_result:
-        cache_hits.inc()
-        logger.debug("Cache hit for job list", status=status, page=page)
-        return cached_result
-    
-    cache_misses.inc()
-    
-    # Build query
-    query = db.query(Job)
-    
+    status_enum = None
     if status:
         try:
             status_enum = JobStatus(status)
-            query = query.filter(Job.status == status_enum)
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
     
-    # Get total count
-    total = query.count()
-    
-    # Paginate
-    offset = (page - 1) * limit
-    jobs = query.order_by(desc(Job.created_at)).offset(offset).limit(limit).all()
-    
-    # Convert to response models
-    job_responses = [JobResponse.from_orm(job) for job in jobs]
-    
-    result = JobListResponse(
-        total=total,
-        page=page,
-        limit=limit,
-        jobs=job_responses
+    # Single-flight, stale-while-revalidate read
+    cache_key = CacheKey.job_list(status, page, limit)
+    result, hit = cache_get_or_compute(
+        cache_key,
+        lambda: _load_job_list(status_enum, page, limit),
+        ttl=config.redis.ttl_job
     )
     
-    # Cache the result
-    cache_set(cache_key, result.dict(), ttl=config.redis.ttl_job)
+    if hit:
+        cache_hits.inc()
+        logger.debug("Cache hit for job list", status=status, page=page)
+    else:
+        cache_misses.inc()
     
-    return result
+    return {**result, 'jobs': _resolve_payloads(result['jobs'], include_payload)}
 
 
-@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
-def get_job(job_id: str, db: Session = Depends(get_db)):
+@app.get("/api/v1/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"], dependencies=[Depends(rate_limit)])
+def get_job(
+    job_id: str,
+    include_payload: bool = Query(False, description="Resolve the message payload"),
+    db: Session = Depends(get_db)
+):
     """
     Get a specific job by ID
     
     - **job_id**: Unique job identifier
+    - **include_payload**: Resolve the job's payload (omitted by default)
     """
-    # Try cache first
-    cached_job = get_cached_job(job_id)
+    _require_valid_id(job_id, f"Job {job_id} not found")
+    
+    # Try cache first (the worker writes snapshots through on every transition)
+    snapshot = get_cached_job(job_id)
     
-    if cached_job:
+    if snapshot:
         cache_hits.inc()
         logger.debug("Cache hit for job", job_id=job_id)
-        return JobResponse(**cached_job)
+        return JobResponse(**_resolve_payloads([snapshot], include_payload, db)[0])
     
     cache_misses.inc()
     
-    # Query database
+    # Query database, then the archive for old terminal jobs
     job = db.query(Job).filter(Job.job_id == job_id).first()
+    if not job:
+        job = db.query(JobArchive).filter(JobArchive.job_id == job_id).first()
     
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    # Cache the job
-    job_dict = {
-        'job_id': job.job_id,
-        'message_id': job.message_id,
-        'status': job.status.value,
-        'payload': job.payload,
-        'result': job.result,
-        'error_message': job.error_message,
-        'retry_count': job.retry_count,
-        'max_retries': job.max_retries,
-        'created_at': job.created_at.isoformat() if job.created_at else None,
-        'updated_at': job.updated_at.isoformat() if job.updated_at else None,
-        'started_at': job.started_at.isoformat() if job.started_at else None,
-        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
-        'source': job.source,
-        'correlation_id': job.correlation_id
-    }
-    cache_job(job_dict)
+    # Cache the canonical snapshot
+    snapshot = encode_job(job)
+    cache_job(snapshot)
     
-    return JobResponse.from_orm(job)
+    return JobResponse(**_resolve_payloads([decode_job(snapshot)], include_payload, db)[0])
 
 
-@app.get("/api/v1/jobs/stats/summary", response_model=JobStatsResponse, tags=["Jobs"])
-def job_statistics(db: Session = Depends(get_db)):
+@app.get(
+    "/api/v1/jobs/stats/summary", response_model=JobStatsResponse, tags=["Jobs"], dependencies=[Depends(rate_limit)]
+)
+def job_statistics():
     """
     Get aggregated job statistics
     
     Returns counts by status, success rate, and average duration
     """
-    # Try cache first
+    # Single-flight, stale-while-revalidate read (5 minute TTL)
     cache_key = CacheKey.aggregation("job_stats", "all")
-    cached_stats = cache_get(cache_key)
+    stats, hit = cache_get_or_compute(cache_key, _load_job_stats, ttl=config.redis.ttl_metrics)
     
-    if cached_stats:
+    if hit:
         cache_hits.inc()
-        return JobStatsResponse(**cached_stats)
-    
-    cache_misses.inc()
-    
-    # Query statistics
-    total_jobs = db.query(func.count(Job.id)).scalar()
-    
-    # Count by status
-    status_counts = db.query(
-        Job.status,
-        func.count(Job.id)
-    ).group_by(Job.status).all()
+    else:
+        cache_misses.inc()
     
-    by_status = {status.value: count for status, count in status_counts}
-    
-    # Calculate success rate
-    completed = by_status.get('completed', 0)
-    failed = by_status.get('failed', 0)
-    total_finished = completed + failed
-    success_rate = (completed / total_finished * 100) if total_finished > 0 else 0.0
-    
-    # Average duration for completed jobs
-    avg_duration = db.query(
-        func.avg(
-            func.extract('epoch', Job.completed_at - Job.started_at)
-        )
-    ).filter(
-        Job.status == JobStatus.COMPLETED,
-        Job.completed_at.isnot(None),
-        Job.started_at.isnot(None)
-    ).scalar()
-    
-    # Total retries
-    total_retries = db.query(func.sum(Job.retry_count)).scalar() or 0
-    
-    stats = JobStatsResponse(
-        total_jobs=total_jobs,
-        by_status=by_status,
-        avg_duration_seconds=float(avg_duration) if avg_duration else None,
-        success_rate=round(success_rate, 2),
-        total_retries=total_retries
-    )
-    
-    # Cache for 5 minutes
-    cache_set(cache_key, stats.dict(), ttl=config.redis.ttl_metrics)
-    
-    return stats
+    return JobStatsResponse(**stats)
+
+
+# Warm-up tasks: precompute the hottest keys on cold instances
+def _warm_job_stats():
+    cache_get_or_compute(CacheKey.aggregation("job_stats", "all"), _load_job_stats, ttl=config.redis.ttl_metrics)
+
+
+def _warm_job_lists():
+    limit = 10  # list_jobs default page size
+    for status in [None] + list(JobStatus):
+        for page in range(1, config.warmup.list_pages + 1):
+            cache_get_or_compute(
+                CacheKey.job_list(status.value if status else None, page, limit),
+                lambda status=status, page=page: _load_job_list(status, page, limit),
+                ttl=config.redis.ttl_job
+            )
+
+
+def _warm_recent_jobs():
+    with get_read_session() as db:
+        jobs = db.query(Job).order_by(desc(Job.created_at)).limit(config.warmup.recent_jobs).all()
+        snapshots = [encode_job(job) for job in jobs]
+    cache_jobs(snapshots)
+
+
+register_warmup_task("job_stats", _warm_job_stats)
+register_warmup_task("job_lists", _warm_job_lists)
+register_warmup_task("recent_jobs", _warm_recent_jobs)
+
 
+def _job_created_at(job_id: str, db: Session) -> Optional[datetime]:
+    """created_at of a job from its cached snapshot, else the jobs table"""
+    snapshot = get_cached_job(job_id)
+    if snapshot and snapshot.get('created_at'):
+        return datetime.fromisoformat(snapshot['created_at'])
+    created_at = db.query(Job.created_at).filter(Job.job_id == job_id).scalar()
+    if created_at is None:
+        created_at = db.query(JobArchive.created_at).filter(JobArchive.job_id == job_id).scalar()
+    return created_at
 
-@app.get("/api/v1/events/{job_id}", tags=["Events"])
-def get_job_events(job_id: str, db: Session = Depends(get_db)):
+
+@app.get("/api/v1/events/{job_id}", tags=["Events"], dependencies=[Depends(rate_limit)])
+def get_job_events(
+    job_id: str,
+    include_payload: bool = Query(False, description="Resolve payloads referenced by events"),
+    db: Session = Depends(get_db)
+):
     """
     Get all events for a specific job
     
     - **job_id**: Job identifier
+    - **include_payload**: Resolve payload_hash references in event data
     """
-    events = db.query(EventLog).filter(
-        EventLog.job_id == job_id
-    ).order_by(EventLog.timestamp).all()
+    _require_valid_id(job_id, f"No events found for job {job_id}")
+    
+    query = db.query(EventLog).filter(EventLog.job_id == job_id)
+    
+    # Events are written no earlier than their job: bounding timestamp by the
+    # job's created_at lets Postgres prune older event_logs partitions
+    created_at = _job_created_at(job_id, db)
+    if created_at:
+        query = query.filter(EventLog.timestamp >= created_at)
+    
+    events = query.order_by(EventLog.timestamp).all()
     
     if not events:
         raise HTTPException(status_code=404, detail=f"No events found for job {job_id}")
     
+    payloads = {}
+    if include_payload:
+        payloads = load_payloads(db, [
+            event.data.get('payload_hash') for event in events if isinstance(event.data, dict)
+        ])
+    
+    def event_data(data):
+        if isinstance(data, dict) and data.get('payload_hash') in payloads:
+            return {**data, 'payload': payloads[data['payload_hash']]}
+        return data
+    
     return [
         {
             'event_id': event.event_id,
             'event_type': event.event_type,
             'timestamp': event.timestamp.isoformat() if event.timestamp else None,
-            'data': event.data,
+            'data': event_data(event.data),
             'metadata': event.event_metadata,
             'correlation_id': event.correlation_id
         }
@@ -366,6 +613,24 @@ def get_job_events(job_id: str, db: Session = Depends(get_db)):
     ]
 
 
+@app.get("/api/v1/payloads/{payload_hash}", tags=["Jobs"], dependencies=[Depends(rate_limit)])
+def get_payload(payload_hash: str, db: Session = Depends(get_db)):
+    """
+    Get a stored message payload by its SHA-256 hash
+    
+    - **payload_hash**: payload_hash of a job or event
+    """
+    payload = None
+    if re.fullmatch(r"[0-9a-f]{64}", payload_hash):
+        payload = load_payload(db, payload_hash)
+    
+    if payload is None:
+        raise HTTPException(status_code=404, detail=f"Payload {payload_hash} not found")
+    
+    # Content-addressed: the body for a hash never changes
+    return JSONResponse(content=payload, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+
 # Exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -378,7 +643,8 @@ async def http_exception_handler(request, exc):
     )
     return JSONResponse(
         status_code=exc.status_code,
-        content={"error": exc.detail, "status_code": exc.status_code}
+        content={"error": exc.detail, "status_code": exc.status_code},
+        headers=getattr(exc, "headers", None)
     )
 
 
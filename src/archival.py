@@ -0,0 +1,176 @@
+"""
+Hot/cold archival of terminal jobs
+Moves old COMPLETED/DEAD_LETTER jobs from jobs to jobs_archive in small,
+throttled transactions and keeps jobs_archive_stats in step
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import text
+
+from .cache import invalidate_job_lists
+from .config import config
+from .database import get_engine
+from .logging_config import get_logger
+from .models import Job, JobStatus
+
+logger = get_logger(__name__)
+
+# Statuses that never change again (FAILED jobs stay hot: they may still be retried)
+ARCHIVABLE_STATUSES = (JobStatus.COMPLETED, JobStatus.DEAD_LETTER)
+
+# Prometheus metrics
+jobs_archived = Counter('jobs_archived_total', 'Jobs moved to jobs_archive', ['status'])
+archive_batch_duration = Histogram(
+    'archive_batch_duration_seconds', 'Duration of one archival transaction',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+_COLUMNS = ", ".join(column.name for column in Job.__table__.columns)
+_STATUS_FILTER = ", ".join(f"'{status.name}'" for status in ARCHIVABLE_STATUSES)
+
+# One batch: lock the oldest eligible rows (skipping rows a worker holds),
+# move them, and return per-status aggregates for jobs_archive_stats.
+# The status filter matches the ix_jobs_terminal_updated_at partial index.
+ARCHIVE_BATCH_SQL = f"""
+WITH batch AS (
+    SELECT id FROM jobs
+    WHERE status IN ({_STATUS_FILTER}) AND updated_at < :cutoff
+    ORDER BY updated_at
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+), moved AS (
+    DELETE FROM jobs WHERE id IN (SELECT id FROM batch)
+    RETURNING {_COLUMNS}
+), archived AS (
+    INSERT INTO jobs_archive ({_COLUMNS})
+    SELECT {_COLUMNS} FROM moved
+)
+SELECT
+    CAST(status AS VARCHAR) AS status,
+    count(*) AS job_count,
+    count(*) FILTER (WHERE completed_at IS NOT NULL AND started_at IS NOT NULL) AS duration_count,
+    coalesce(sum(extract(epoch FROM completed_at - started_at)), 0) AS duration_seconds_total,
+    coalesce(sum(retry_count), 0) AS retries_total
+FROM moved
+GROUP BY status
+"""
+
+UPSERT_STATS_SQL = """
+INSERT INTO jobs_archive_stats (status, job_count, duration_count, duration_seconds_total, retries_total, updated_at)
+VALUES (:status, :job_count, :duration_count, :duration_seconds_total, :retries_total, now())
+ON CONFLICT (status) DO UPDATE SET
+    job_count = jobs_archive_stats.job_count + EXCLUDED.job_count,
+    duration_count = jobs_archive_stats.duration_count + EXCLUDED.duration_count,
+    duration_seconds_total = jobs_archive_stats.duration_seconds_total + EXCLUDED.duration_seconds_total,
+    retries_total = jobs_archive_stats.retries_total + EXCLUDED.retries_total,
+    updated_at = now()
+"""
+
+
+def archive_cutoff(after_days: Optional[int] = None) -> datetime:
+    """updated_at before which terminal jobs are archived"""
+    days = config.archive.after_days if after_days is None else after_days
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def count_archivable(cutoff: datetime) -> int:
+    """Number of jobs the next run would move"""
+    with get_engine().connect() as conn:
+        return conn.execute(text(
+            f"SELECT count(*) FROM jobs WHERE status IN ({_STATUS_FILTER}) AND updated_at < :cutoff"
+        ), {'cutoff': cutoff}).scalar()
+
+
+def archive_batch(cutoff: datetime, batch_size: int) -> int:
+    """
+    Move one batch of terminal jobs to the archive in a single transaction
+    
+    Args:
+        cutoff: Archive jobs last updated before this time
+        batch_size: Maximum jobs to move
+        
+    Returns:
+        Number of jobs moved
+    """
+    start = time.perf_counter()
+    
+    with get_engine().begin() as conn:
+        rows = conn.execute(
+            text(ARCHIVE_BATCH_SQL), {'cutoff': cutoff, 'batch_size': batch_size}
+        ).mappings().all()
+        for row in rows:
+            conn.execute(text(UPSERT_STATS_SQL), dict(row))
+    
+    archive_batch_duration.observe(time.perf_counter() - start)
+    
+    moved = 0
+    for row in rows:
+        jobs_archived.labels(status=row['status']).inc(row['job_count'])
+        moved += row['job_count']
+    return moved
+
+
+def run_archival(
+    after_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    max_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Archive terminal jobs in throttled batches until none are left (or time runs out)
+    
+    Short transactions plus a pause between them keep lock hold times and
+    WAL bursts small next to the live workload.
+    
+    Args:
+        after_days: Age threshold (default ARCHIVE_AFTER_DAYS)
+        batch_size: Jobs per transaction (default ARCHIVE_BATCH_SIZE)
+        pause_seconds: Sleep between batches (default ARCHIVE_PAUSE_SECONDS)
+        max_seconds: Stop after this long; 0 = until drained (default ARCHIVE_MAX_SECONDS)
+        
+    Returns:
+        Dict with jobs moved, batches and elapsed seconds
+    """
+    batch_size = batch_size or config.archive.batch_size
+    pause_seconds = config.archive.pause_seconds if pause_seconds is None else pause_seconds
+    max_seconds = config.archive.max_seconds if max_seconds is None else max_seconds
+    cutoff = archive_cutoff(after_days)
+    
+    logger.info("Starting job archival", cutoff=cutoff.isoformat(), batch_size=batch_size)
+    
+    start = time.monotonic()
+    moved = 0
+    batches = 0
+    
+    while True:
+        count = archive_batch(cutoff, batch_size)
+        moved += count
+        batches += 1
+        
+        if count < batch_size:
+            break
+        if max_seconds and time.monotonic() - start >= max_seconds:
+            logger.info("Archival time budget reached", moved=moved)
+            break
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    
+    if moved:
+        # Archived jobs drop out of listings (they stay reachable by id)
+        invalidate_job_lists()
+    
+    elapsed = time.monotonic() - start
+    logger.info("Job archival complete", moved=moved, batches=batches, elapsed_seconds=round(elapsed, 2))
+    return {'moved': moved, 'batches': batches, 'elapsed_seconds': round(elapsed, 2), 'cutoff': cutoff.isoformat()}
+
+
+def get_archive_stats() -> List[Dict[str, Any]]:
+    """Per-status aggregates of archived jobs"""
+    with get_engine().connect() as conn:
+        return [dict(row) for row in conn.execute(text(
+            "SELECT status, job_count, duration_count, duration_seconds_total, retries_total "
+            "FROM jobs_archive_stats"
+        )).mappings()]
@@ -3,23 +3,204 @@ Redis cache layer for CUIDA+Care Worker
 Provides caching for jobs, metrics, and aggregations with configurable TTL
 """
 import json
-from typing import Optional, Any, Dict
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Any, Dict, Callable, List, Tuple
 from datetime import datetime, timedelta
 import redis
 from redis.exceptions import RedisError, ConnectionError, TimeoutError
+from prometheus_client import Counter, Gauge, Histogram
 
 from .config import config
 from .logging_config import get_logger
+from .snapshots import decode_job, snapshot_ttl
 
 logger = get_logger(__name__)
 
 # Global Redis client
 _redis_client: Optional[redis.Redis] = None
+_redis_client_lock = threading.Lock()
+
+# Marker for values stored by cache_get_or_compute (value + freshness metadata)
+_SWR_MARKER = "__swr__"
+
+# Compare-and-delete: only release a recompute lock we still own
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# GCRA bucket: the key holds the theoretical arrival time (TAT) in
+# microseconds of the Redis clock, so every instance shares one clock.
+# Grants up to ARGV[3] tokens at once; with none left, returns how long
+# until the next one (microseconds).
+_TAKE_TOKENS_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2]) * interval
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or 0), now)
+local granted = math.min(tonumber(ARGV[3]), math.floor((capacity - (tat - now)) / interval))
+if granted < 1 then
+    return {0, tat + interval - capacity - now}
+end
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], string.format('%.0f', tat), 'PX', math.ceil((tat - now) / 1000) + 1)
+return {granted, 0}
+"""
+_take_tokens_script = None
+
+# Job snapshot write that never replaces a newer snapshot: ARGV[3] is the
+# snapshot's updated_ts (epoch seconds, '' if unknown = unconditional write).
+# Equal timestamps overwrite so a refresh of the same row still lands.
+_SET_SNAPSHOT_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current and ARGV[3] ~= '' then
+    local ok, cached = pcall(cjson.decode, current)
+    if ok and type(cached) == 'table' then
+        local cached_ts = tonumber(cached['updated_ts'])
+        if cached_ts and cached_ts > tonumber(ARGV[3]) then
+            return 0
+        end
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+_set_snapshot_script = None
+
+# Per-key in-process single-flight locks: key -> [lock, waiters]
+_local_locks: Dict[str, list] = {}
+_local_locks_guard = threading.Lock()
+
+# Keys with a background refresh in flight in this process
+_refreshing: set = set()
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+
+# Returned by _execute when the breaker is open or the command failed
+_UNAVAILABLE = object()
+
+# Prometheus metrics
+circuit_state = Gauge('cache_circuit_state', 'Redis circuit breaker state (0=closed, 1=half_open, 2=open)')
+circuit_transitions = Counter('cache_circuit_transitions_total', 'Redis circuit breaker transitions', ['state'])
+circuit_rejections = Counter('cache_circuit_rejections_total', 'Cache operations skipped by open breaker', ['operation'])
+pool_in_use = Gauge('cache_pool_connections_in_use', 'Redis pool connections checked out')
+pool_max = Gauge('cache_pool_max_connections', 'Redis pool connection limit')
+pool_exhausted = Counter('cache_pool_exhausted_total', 'Redis pool checkouts that timed out waiting')
+cache_requests = Counter('cache_requests_total', 'Cache lookups by key family', ['family', 'result'])
+cache_errors = Counter('cache_errors_total', 'Failed cache operations by key family', ['family', 'operation'])
+cache_latency = Histogram(
+    'cache_operation_seconds', 'Cache operation latency by key family', ['family', 'operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+stale_snapshots = Counter('cache_stale_snapshots_total', 'Job snapshot writes skipped because the cached one is newer')
+cache_payload_bytes = Histogram(
+    'cache_payload_bytes', 'Cached payload size by key family', ['family', 'operation'],
+    buckets=(64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+)
+
+# Client-side hit/miss tallies per key family (for hit rates without INFO)
+_family_counts: Dict[str, Dict[str, int]] = {}
+_family_counts_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding the cache layer
+    
+    Closed: commands pass through. After failure_threshold consecutive
+    failures it opens and every command is skipped without touching the
+    network. After reset_timeout it goes half-open and lets a single probe
+    through; success closes it, failure re-opens it.
+    """
+    
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        circuit_state.set(0)
+    
+    @property
+    def state(self) -> str:
+        return self._state
+    
+    def _transition(self, state: str):
+        """Change state (caller holds the lock)"""
+        self._state = state
+        circuit_state.set(self._STATE_VALUES[state])
+        circuit_transitions.labels(state=state).inc()
+        logger.warning("Redis circuit breaker state changed", state=state, failures=self._failures)
+    
+    def allow_request(self) -> bool:
+        """Whether a command may be sent to Redis now"""
+        # Lock-free fast paths: healthy, or open and still cooling down
+        if self._state == self.CLOSED:
+            return True
+        if self._state == self.OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+            return False
+        
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+    
+    def record_success(self):
+        if self._state == self.CLOSED and self._failures == 0:
+            return
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+    
+    def release_probe(self):
+        """Let another probe through after one that ended without a verdict"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+_breaker = CircuitBreaker(
+    failure_threshold=config.redis.breaker_failure_threshold,
+    reset_timeout=config.redis.breaker_reset_timeout
+)
 
 
 def get_redis_client() -> redis.Redis:
     """
-    Get or create Redis client with connection pooling
+    Get or create Redis client with a bounded blocking connection pool
     
     Returns:
         redis.Redis: Connected Redis client
@@ -27,43 +208,116 @@ def get_redis_client() -> redis.Redis:
     global _redis_client
     
     if _redis_client is None:
-        try:
-            logger.info(
-                "Creating Redis client",
-                host=config.redis.host,
-                port=config.redis.port,
-                db=config.redis.db
-            )
-            
-            _redis_client = redis.Redis(
-                host=config.redis.host,
-                port=config.redis.port,
-                password=config.redis.password if config.redis.password else None,
-                db=config.redis.db,
-                socket_timeout=config.redis.socket_timeout,
-                socket_connect_timeout=config.redis.socket_timeout,
-                decode_responses=True,  # Auto-decode bytes to strings
-                health_check_interval=30,  # Health check every 30s
-                retry_on_timeout=True,
-                max_connections=10
-            )
-            
-            # Test connection
-            _redis_client.ping()
-            logger.info("Redis client connected successfully")
-            
-        except (ConnectionError, TimeoutError) as e:
-            logger.error(
-                "Failed to connect to Redis",
-                error=str(e),
-                host=config.redis.host,
-                port=config.redis.port
-            )
-            raise
+        with _redis_client_lock:
+            if _redis_client is not None:
+                return _redis_client
+            try:
+                logger.info(
+                    "Creating Redis client",
+                    host=config.redis.host,
+                    port=config.redis.port,
+                    db=config.redis.db,
+                    max_connections=config.redis.max_connections
+                )
+                
+                pool = redis.BlockingConnectionPool(
+                    max_connections=config.redis.max_connections,
+                    timeout=config.redis.pool_timeout,  # Bounded wait for a free connection
+                    host=config.redis.host,
+                    port=config.redis.port,
+                    password=config.redis.password if config.redis.password else None,
+                    db=config.redis.db,
+                    socket_timeout=config.redis.socket_timeout,
+                    socket_connect_timeout=config.redis.connect_timeout,
+                    decode_responses=True,  # Auto-decode bytes to strings
+                    health_check_interval=30,  # Health check every 30s
+                    retry_on_timeout=True
+                )
+                client = redis.Redis(connection_pool=pool)
+                
+                # Test connection before publishing the client
+                client.ping()
+                _redis_client = client
+                pool_max.set(pool.max_connections)
+                logger.info("Redis client connected successfully")
+                
+            except (ConnectionError, TimeoutError) as e:
+                logger.error(
+                    "Failed to connect to Redis",
+                    error=str(e),
+                    host=config.redis.host,
+                    port=config.redis.port
+                )
+                raise
     
     return _redis_client
 
 
+def _pool_connections_in_use() -> int:
+    """Connections currently checked out of the Redis pool"""
+    client = _redis_client
+    if client is None:
+        return 0
+    pool = client.connection_pool
+    return pool.max_connections - pool.pool.qsize()
+
+
+pool_in_use.set_function(_pool_connections_in_use)
+
+
+def _execute(
+    operation: str,
+    command: Callable[[redis.Redis], Any],
+    family: str = "other",
+    **log_context
+) -> Any:
+    """
+    Run a Redis command through the circuit breaker
+    
+    Args:
+        operation: Operation name for logs and metrics
+        command: Callable receiving the client
+        family: Key family label for metrics
+        **log_context: Extra fields for the failure log
+        
+    Returns:
+        Command result, or _UNAVAILABLE if skipped or failed
+    """
+    if not _breaker.allow_request():
+        circuit_rejections.labels(operation=operation).inc()
+        return _UNAVAILABLE
+    
+    start = time.perf_counter()
+    try:
+        result = command(get_redis_client())
+    except RedisError as e:
+        cache_errors.labels(family=family, operation=operation).inc()
+        if isinstance(e, ConnectionError) and "No connection available" in str(e):
+            # Pool saturation, not an outage: don't trip the breaker (but free a half-open probe slot)
+            pool_exhausted.inc()
+            _breaker.release_probe()
+        else:
+            _breaker.record_failure()
+        logger.error(f"Cache {operation} failed", error=str(e), **log_context)
+        return _UNAVAILABLE
+    except BaseException:
+        _breaker.release_probe()
+        raise
+    
+    cache_latency.labels(family=family, operation=operation).observe(time.perf_counter() - start)
+    _breaker.record_success()
+    return result
+
+
+def _record_lookup(family: str, hit: bool):
+    """Count a cache lookup for its key family"""
+    result = 'hit' if hit else 'miss'
+    cache_requests.labels(family=family, result=result).inc()
+    with _family_counts_lock:
+        counts = _family_counts.setdefault(family, {'hit': 0, 'miss': 0})
+        counts[result] += 1
+
+
 class CacheKey:
     """Cache key prefixes and builders"""
     
@@ -93,6 +347,56 @@ class CacheKey:
     def aggregation(agg_type: str, period: str = "hour") -> str:
         """Cache key for aggregations"""
         return f"{CacheKey.AGGREGATION}:{agg_type}:{period}"
+    
+    # Key families used for instrumentation labels
+    _FAMILIES = {
+        JOB: "job", METRICS: "metrics", AGGREGATION: "agg", "lock": "lock", "pin": "pin", "ratelimit": "ratelimit"
+    }
+    
+    @staticmethod
+    def family(key: str) -> str:
+        """Key family of a cache key (job, job_list, metrics, agg, lock, pin, ratelimit)"""
+        if key.startswith(f"{CacheKey.JOB_LIST}:"):
+            return "job_list"
+        return CacheKey._FAMILIES.get(key.split(":", 1)[0], "other")
+    
+    @staticmethod
+    def lock(key: str) -> str:
+        """Cache key for the recompute lock guarding another key"""
+        return f"lock:{key}"
+    
+    @staticmethod
+    def primary_pin(correlation_id: str) -> str:
+        """Cache key pinning a correlation id's reads to the primary"""
+        return f"pin:primary:{correlation_id}"
+    
+    @staticmethod
+    def rate_limit(key: str) -> str:
+        """Cache key of a rate limit bucket"""
+        return f"ratelimit:{key}"
+
+
+def _cache_get(key: str, record: bool) -> Optional[Any]:
+    """Get and decode a value, optionally counting the lookup"""
+    family = CacheKey.family(key)
+    value = _execute("get", lambda client: client.get(key), family=family, key=key)
+    
+    if value is _UNAVAILABLE:
+        return None
+    
+    if record:
+        _record_lookup(family, bool(value))
+    
+    if value:
+        cache_payload_bytes.labels(family=family, operation="get").observe(len(value.encode('utf-8')))
+        logger.debug("Cache hit", key=key)
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value
+    
+    logger.debug("Cache miss", key=key)
+    return None
 
 
 def cache_get(key: str) -> Optional[Any]:
@@ -105,23 +409,7 @@ def cache_get(key: str) -> Optional[Any]:
     Returns:
         Cached value or None if not found
     """
-    try:
-        client = get_redis_client()
-        value = client.get(key)
-        
-        if value:
-            logger.debug("Cache hit", key=key)
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                return value
-        
-        logger.debug("Cache miss", key=key)
-        return None
-        
-    except RedisError as e:
-        logger.error("Cache get failed", key=key, error=str(e))
-        return None
+    return _cache_get(key, record=True)
 
 
 def cache_set(key: str, value: Any, ttl: Optional[int] = None) -> bool:
@@ -136,24 +424,23 @@ def cache_set(key: str, value: Any, ttl: Optional[int] = None) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    try:
-        client = get_redis_client()
-        
-        # Serialize value to JSON
-        if not isinstance(value, str):
-            value = json.dumps(value, default=str)  # default=str handles datetime
-        
+    # Serialize value to JSON
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str)  # default=str handles datetime
+    
+    family = CacheKey.family(key)
+    cache_payload_bytes.labels(family=family, operation="set").observe(len(value.encode('utf-8')))
+    
+    def command(client):
         if ttl:
-            client.setex(key, ttl, value)
-        else:
-            client.set(key, value)
-        
-        logger.debug("Cache set", key=key, ttl=ttl)
-        return True
-        
-    except RedisError as e:
-        logger.error("Cache set failed", key=key, error=str(e))
+            return client.setex(key, ttl, value)
+        return client.set(key, value)
+    
+    if _execute("set", command, family=family, key=key) is _UNAVAILABLE:
         return False
+    
+    logger.debug("Cache set", key=key, ttl=ttl)
+    return True
 
 
 def cache_delete(key: str) -> bool:
@@ -166,15 +453,13 @@ def cache_delete(key: str) -> bool:
     Returns:
         True if key was deleted, False otherwise
     """
-    try:
-        client = get_redis_client()
-        deleted = client.delete(key)
-        logger.debug("Cache delete", key=key, deleted=bool(deleted))
-        return bool(deleted)
-        
-    except RedisError as e:
-        logger.error("Cache delete failed", key=key, error=str(e))
+    deleted = _execute("delete", lambda client: client.delete(key), family=CacheKey.family(key), key=key)
+    
+    if deleted is _UNAVAILABLE:
         return False
+    
+    logger.debug("Cache delete", key=key, deleted=bool(deleted))
+    return bool(deleted)
 
 
 def cache_invalidate_pattern(pattern: str) -> int:
@@ -187,38 +472,103 @@ def cache_invalidate_pattern(pattern: str) -> int:
     Returns:
         Number of keys deleted
     """
-    try:
-        client = get_redis_client()
+    def command(client):
         keys = client.keys(pattern)
-        
-        if keys:
-            deleted = client.delete(*keys)
-            logger.info("Cache invalidated", pattern=pattern, count=deleted)
-            return deleted
-        
+        return client.delete(*keys) if keys else 0
+    
+    deleted = _execute("invalidate", command, family=CacheKey.family(pattern), pattern=pattern)
+    
+    if deleted is _UNAVAILABLE:
         return 0
+    
+    if deleted:
+        logger.info("Cache invalidated", pattern=pattern, count=deleted)
+    return deleted
+
+
+def _snapshot_item(snapshot: Dict[str, Any]) -> Tuple[str, str, int, str]:
+    """Key, JSON value (with updated_ts for ordering), TTL and updated_ts argument of a snapshot"""
+    updated_ts = ''
+    try:
+        updated_ts = repr(datetime.fromisoformat(snapshot['updated_at']).timestamp())
+        snapshot = {**snapshot, 'updated_ts': float(updated_ts)}
+    except (KeyError, TypeError, ValueError):
+        pass
+    value = json.dumps(snapshot, default=str)
+    cache_payload_bytes.labels(family="job", operation="set").observe(len(value.encode('utf-8')))
+    return CacheKey.job(snapshot['job_id']), value, snapshot_ttl(snapshot.get('status')), updated_ts
+
+
+def _snapshot_writer(client):
+    global _set_snapshot_script
+    if _set_snapshot_script is None:
+        _set_snapshot_script = client.register_script(_SET_SNAPSHOT_SCRIPT)
+    return _set_snapshot_script
+
+
+def cache_job(snapshot: Dict[str, Any]) -> bool:
+    """
+    Cache a job snapshot with a status-dependent TTL
+    
+    Writes are ordered by updated_at: a snapshot older than the cached one
+    (late or retried delivery) is dropped instead of regressing the status.
+    
+    Args:
+        snapshot: Canonical job snapshot (see snapshots.encode_job)
         
-    except RedisError as e:
-        logger.error("Cache invalidate failed", pattern=pattern, error=str(e))
-        return 0
+    Returns:
+        True if the cache holds this snapshot or a newer one
+    """
+    if not snapshot.get('job_id'):
+        return False
+    
+    key, value, ttl, updated_ts = _snapshot_item(snapshot)
+    
+    def command(client):
+        return _snapshot_writer(client)(keys=[key], args=[value, ttl, updated_ts], client=client)
+    
+    written = _execute("set", command, family="job", key=key)
+    if written is _UNAVAILABLE:
+        return False
+    
+    if not written:
+        stale_snapshots.inc()
+        logger.debug("Stale job snapshot skipped", key=key, updated_at=snapshot.get('updated_at'))
+    return True
 
 
-def cache_job(job_dict: Dict[str, Any]) -> bool:
+def cache_jobs(snapshots: List[Dict[str, Any]]) -> bool:
     """
-    Cache a job with appropriate TTL
+    Cache many job snapshots in one pipelined round trip
+    
+    Ordered by updated_at like cache_job.
     
     Args:
-        job_dict: Job dictionary (from database model)
+        snapshots: Canonical job snapshots
         
     Returns:
-        True if cached successfully
+        True if cached successfully (stale snapshots count as done)
     """
-    job_id = job_dict.get('job_id')
-    if not job_id:
+    items = [_snapshot_item(s) for s in snapshots if s.get('job_id')]
+    if not items:
+        return True
+    
+    def command(client):
+        pipe = client.pipeline(transaction=False)
+        write = _snapshot_writer(client)
+        for key, value, ttl, updated_ts in items:
+            write(keys=[key], args=[value, ttl, updated_ts], client=pipe)
+        return pipe.execute()
+    
+    written = _execute("set_many", command, family="job", count=len(items))
+    if written is _UNAVAILABLE:
         return False
     
-    key = CacheKey.job(job_id)
-    return cache_set(key, job_dict, ttl=config.redis.ttl_job)
+    skipped = len(items) - sum(1 for result in written if result)
+    if skipped:
+        stale_snapshots.inc(skipped)
+    logger.debug("Cache set many", family="job", count=len(items), stale=skipped)
+    return True
 
 
 def get_cached_job(job_id: str) -> Optional[Dict[str, Any]]:
@@ -229,10 +579,63 @@ def get_cached_job(job_id: str) -> Optional[Dict[str, Any]]:
         job_id: Job ID
         
     Returns:
-        Job dictionary or None
+        Snapshot fields, or None if missing or not a current snapshot
     """
     key = CacheKey.job(job_id)
-    return cache_get(key)
+    return decode_job(cache_get(key))
+
+
+def get_cached_jobs(job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get many cached jobs in one round trip (not counted as hits/misses)
+    
+    Args:
+        job_ids: Job IDs
+        
+    Returns:
+        Dict mapping job ID to snapshot fields, for current snapshots only
+    """
+    if not job_ids:
+        return {}
+    
+    values = _execute(
+        "get_many", lambda client: client.mget([CacheKey.job(job_id) for job_id in job_ids]),
+        family="job", count=len(job_ids)
+    )
+    if values is _UNAVAILABLE:
+        return {}
+    
+    snapshots = {}
+    for job_id, value in zip(job_ids, values):
+        if not value:
+            continue
+        try:
+            snapshot = decode_job(json.loads(value))
+        except json.JSONDecodeError:
+            continue
+        if snapshot:
+            snapshots[job_id] = snapshot
+    return snapshots
+
+
+def invalidate_jobs(job_ids: List[str]) -> int:
+    """
+    Delete cached job snapshots (job lists are left alone)
+    
+    Args:
+        job_ids: Job IDs
+        
+    Returns:
+        Number of keys deleted
+    """
+    if not job_ids:
+        return 0
+    
+    deleted = _execute(
+        "delete_many", lambda client: client.delete(*[CacheKey.job(job_id) for job_id in job_ids]),
+        family="job", count=len(job_ids)
+    )
+    return 0 if deleted is _UNAVAILABLE else deleted
 
 
 def invalidate_job(job_id: str) -> bool:
@@ -250,11 +653,70 @@ def invalidate_job(job_id: str) -> bool:
     cache_delete(job_key)
     
     # Invalidate all job lists (they might contain this job)
-    cache_invalidate_pattern(f"{CacheKey.JOB_LIST}:*")
+    invalidate_job_lists()
     
     return True
 
 
+def invalidate_job_lists() -> int:
+    """
+    Invalidate all cached job list pages
+    
+    Returns:
+        Number of keys deleted
+    """
+    return cache_invalidate_pattern(f"{CacheKey.JOB_LIST}:*")
+
+
+def pin_primary(correlation_id: str, ttl: Optional[int] = None) -> bool:
+    """
+    Route reads for a correlation id to the primary for a while (read-your-writes)
+    
+    Args:
+        correlation_id: Correlation id of the write
+        ttl: Pin duration in seconds (default DB_PRIMARY_PIN_SECONDS)
+        
+    Returns:
+        True if pinned
+    """
+    ttl = ttl or config.database.primary_pin_seconds
+    return cache_set(CacheKey.primary_pin(correlation_id), "1", ttl=ttl)
+
+
+def is_primary_pinned(correlation_id: str) -> bool:
+    """Whether reads for a correlation id must go to the primary"""
+    return cache_get(CacheKey.primary_pin(correlation_id)) is not None
+
+
+def take_tokens(key: str, interval_us: int, burst: int, wanted: int = 1) -> Optional[Tuple[int, float]]:
+    """
+    Take up to `wanted` tokens from a shared GCRA rate limit bucket
+    
+    Args:
+        key: Limit key (source, or source:tenant)
+        interval_us: Microseconds per token (1 / rate)
+        burst: Tokens the bucket holds after idling
+        wanted: Tokens to take at once
+        
+    Returns:
+        (tokens granted, seconds until the next token when none were
+        granted), or None if Redis is unavailable
+    """
+    def command(client):
+        global _take_tokens_script
+        if _take_tokens_script is None:
+            _take_tokens_script = client.register_script(_TAKE_TOKENS_SCRIPT)
+        return _take_tokens_script(
+            keys=[CacheKey.rate_limit(key)], args=[interval_us, burst, wanted], client=client
+        )
+    
+    result = _execute("take_tokens", command, family="ratelimit", key=key)
+    if result is _UNAVAILABLE:
+        return None
+    granted, retry_after_us = result
+    return int(granted), max(int(retry_after_us), 0) / 1_000_000
+
+
 def cache_metrics(metric_name: str, value: Any, window: str = "1h") -> bool:
     """
     Cache metrics with short TTL
@@ -299,35 +761,277 @@ def get_cached_aggregation(agg_type: str, period: str = "hour") -> Optional[Any]
     return cache_get(key)
 
 
-def get_cache_stats() -> Dict[str, Any]:
+@contextmanager
+def _local_single_flight(key: str):
+    """Serialize recomputes of the same key within this process"""
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _local_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _local_locks[key]
+
+
+def _acquire_recompute_lock(key: str) -> Tuple[bool, Optional[str]]:
     """
-    Get cache statistics
+    Try to take the cross-instance recompute lock for a key
     
     Returns:
-        Dictionary with cache stats
+        (acquired, token). If Redis is unavailable the lock is treated as
+        acquired with no token, so the in-process lock alone applies.
+    """
+    token = uuid.uuid4().hex
+    acquired = _execute(
+        "lock",
+        lambda client: client.set(CacheKey.lock(key), token, nx=True, ex=config.redis.lock_ttl),
+        family="lock",
+        key=key
+    )
+    
+    if acquired is _UNAVAILABLE:
+        return True, None
+    if acquired:
+        return True, token
+    return False, None
+
+
+def _release_recompute_lock(key: str, token: Optional[str]):
+    """Release the recompute lock if we still own it"""
+    if not token:
+        return
+    _execute(
+        "unlock",
+        lambda client: client.eval(_RELEASE_LOCK_SCRIPT, 1, CacheKey.lock(key), token),
+        family="lock",
+        key=key
+    )
+
+
+def _get_envelope(key: str, record: bool = True) -> Optional[Dict[str, Any]]:
+    """Get a cache_get_or_compute envelope, ignoring plain legacy values"""
+    data = _cache_get(key, record)
+    if isinstance(data, dict) and data.get(_SWR_MARKER):
+        return data
+    return None
+
+
+def _set_envelope(key: str, value: Any, ttl: int, stale_ttl: int, delta: float) -> bool:
+    """Store value with its logical expiry and recompute cost"""
+    envelope = {
+        _SWR_MARKER: 1,
+        'value': value,
+        'expires_at': time.time() + ttl,
+        'delta': delta
+    }
+    # Physical TTL covers the stale window so stale values stay servable
+    return cache_set(key, envelope, ttl=ttl + stale_ttl)
+
+
+def _should_refresh(envelope: Dict[str, Any]) -> bool:
+    """
+    Decide whether a cached value needs recomputing
+    
+    Stale values always do. Fresh values are refreshed early with a
+    probability that grows as expiry approaches, scaled by how long the
+    value took to compute (XFetch), so one caller refreshes before the
+    herd arrives at expiry.
     """
+    now = time.time()
+    expires_at = envelope.get('expires_at', 0)
+    if now >= expires_at:
+        return True
+    beta = config.redis.early_refresh_beta
+    if beta <= 0:
+        return False
+    delta = envelope.get('delta', 0.0)
+    return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def _wait_for_peer(key: str) -> Optional[Dict[str, Any]]:
+    """Poll for a value another instance is recomputing"""
+    deadline = time.monotonic() + config.redis.lock_wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        envelope = _get_envelope(key, record=False)
+        if envelope is not None:
+            return envelope
+    return None
+
+
+def _recompute(key: str, loader: Callable[[], Any], ttl: int, stale_ttl: int, wait_for_peer: bool) -> Any:
+    """Run loader under the cross-instance lock and store the result"""
+    acquired, token = _acquire_recompute_lock(key)
+    
+    if not acquired:
+        if not wait_for_peer:
+            # Another instance is already refreshing this key
+            return None
+        envelope = _wait_for_peer(key)
+        if envelope is not None:
+            return envelope['value']
+        logger.warning("Timed out waiting for cache recompute, computing locally", key=key)
+    
     try:
-        client = get_redis_client()
-        info = client.info('stats')
-        
-        hits = info.get('keyspace_hits', 0)
-        misses = info.get('keyspace_misses', 0)
-        total_requests = hits + misses
-        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0.0
+        start = time.perf_counter()
+        value = loader()
+        delta = time.perf_counter() - start
+        _set_envelope(key, value, ttl, stale_ttl, delta)
+        return value
+    finally:
+        _release_recompute_lock(key, token)
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    """Get or create the background refresh executor"""
+    global _refresh_executor
+    
+    if _refresh_executor is None:
+        with _local_locks_guard:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(
+                    max_workers=config.redis.refresh_workers,
+                    thread_name_prefix="cache-refresh"
+                )
+    return _refresh_executor
+
+
+def _schedule_refresh(key: str, loader: Callable[[], Any], ttl: int, stale_ttl: int):
+    """Refresh a key in the background, at most once at a time per process"""
+    with _local_locks_guard:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    
+    def refresh():
+        try:
+            _recompute(key, loader, ttl, stale_ttl, wait_for_peer=False)
+        except Exception as e:
+            logger.warning("Background cache refresh failed", key=key, error=str(e))
+        finally:
+            with _local_locks_guard:
+                _refreshing.discard(key)
+    
+    _get_refresh_executor().submit(refresh)
+
+
+def cache_get_or_compute(
+    key: str,
+    loader: Callable[[], Any],
+    ttl: int,
+    stale_ttl: Optional[int] = None
+) -> Tuple[Any, bool]:
+    """
+    Cache-aside read with single-flight recompute and stale-while-revalidate
+    
+    Concurrent misses for the same key run loader once: an in-process lock
+    coalesces threads and a Redis lock coalesces instances. Values past
+    their TTL (or probabilistically close to it) are still returned while
+    one caller refreshes them in the background.
+    
+    Args:
+        key: Cache key
+        loader: Callable computing the value; must manage its own DB session
+            since it may run after the request finished
+        ttl: Freshness lifetime in seconds
+        stale_ttl: Extra seconds a stale value may be served (default from config)
         
-        return {
-            'connected': True,
-            'total_commands_processed': info.get('total_commands_processed', 0),
-            'keyspace_hits': hits,
-            'keyspace_misses': misses,
-            'hit_rate': round(hit_rate, 2),
-            'connected_clients': info.get('connected_clients', 0),
-            'used_memory_human': client.info('memory').get('used_memory_human', 'unknown')
+    Returns:
+        Tuple of (value, cache_hit)
+    """
+    if stale_ttl is None:
+        stale_ttl = config.redis.stale_ttl
+    
+    envelope = _get_envelope(key)
+    if envelope is not None:
+        if _should_refresh(envelope):
+            _schedule_refresh(key, loader, ttl, stale_ttl)
+        return envelope['value'], True
+    
+    with _local_single_flight(key):
+        # Another thread may have filled the key while we waited
+        envelope = _get_envelope(key, record=False)
+        if envelope is not None:
+            return envelope['value'], True
+        return _recompute(key, loader, ttl, stale_ttl, wait_for_peer=True), False
+
+
+def get_breaker_stats() -> Dict[str, Any]:
+    """
+    Get circuit breaker and connection pool state
+    
+    Returns:
+        Dictionary with breaker state and pool saturation
+    """
+    return {
+        'circuit_state': _breaker.state,
+        'pool_in_use': _pool_connections_in_use(),
+        'pool_max_connections': config.redis.max_connections
+    }
+
+
+def get_family_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get client-side hit/miss counts per key family since process start
+    
+    Returns:
+        Dictionary of family -> {hits, misses, hit_rate}
+    """
+    with _family_counts_lock:
+        counts = {family: dict(c) for family, c in _family_counts.items()}
+    
+    stats = {}
+    for family, c in counts.items():
+        total = c['hit'] + c['miss']
+        stats[family] = {
+            'hits': c['hit'],
+            'misses': c['miss'],
+            'hit_rate': round(c['hit'] / total * 100, 2) if total > 0 else 0.0
         }
-        
-    except RedisError as e:
-        logger.error("Failed to get cache stats", error=str(e))
-        return {'connected': False, 'error': str(e)}
+    return stats
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get cache statistics
+    
+    Hit rates are measured client-side per key family; server INFO (one
+    call) only contributes instance-level fields.
+    
+    Returns:
+        Dictionary with cache stats
+    """
+    families = get_family_stats()
+    hits = sum(f['hits'] for f in families.values())
+    misses = sum(f['misses'] for f in families.values())
+    total_requests = hits + misses
+    hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0.0
+    client_stats = {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hit_rate, 2),
+        'families': families
+    }
+    
+    info = _execute("info", lambda client: client.info())
+    
+    if info is _UNAVAILABLE:
+        return {'connected': False, 'error': 'cache unavailable', **client_stats, **get_breaker_stats()}
+    
+    return {
+        'connected': True,
+        'total_commands_processed': info.get('total_commands_processed', 0),
+        'keyspace_hits': info.get('keyspace_hits', 0),
+        'keyspace_misses': info.get('keyspace_misses', 0),
+        'connected_clients': info.get('connected_clients', 0),
+        'used_memory_human': info.get('used_memory_human', 'unknown'),
+        **client_stats,
+        **get_breaker_stats()
+    }
 
 
 def close_redis_connection():
@@ -337,4 +1041,5 @@ def close_redis_connection():
     if _redis_client:
         logger.info("Closing Redis connection")
         _redis_client.close()
+        _redis_client.connection_pool.disconnect()
         _redis_client = None
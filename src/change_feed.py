@@ -0,0 +1,389 @@
+"""
+jobs change feed for CUIDA+Care
+Statement-level triggers on jobs (installed by install_change_feed only when
+CHANGE_FEED_ENABLED is set) NOTIFY the changed job ids; one listener per
+deployment (elected with an advisory lock) refreshes or invalidates the
+matching Redis keys in batches, so writers other than the worker never leave
+stale snapshots behind
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import text
+
+from .cache import (
+    CacheKey, cache_delete, cache_get, cache_jobs, cache_set,
+    get_cached_jobs, invalidate_job_lists, invalidate_jobs
+)
+from .config import config
+from .database import get_connection, get_engine, get_tcp_connection
+from .logging_config import get_logger
+from .models import Job
+from .snapshots import encode_job
+
+logger = get_logger(__name__)
+
+CHANNEL = "job_changes"
+
+# Only the lock holder listens; the others retry in case it goes away
+_LEADER_LOCK_KEY = "job_change_feed"
+
+# Redis key holding when the last batch was applied (catch-up after failover)
+_SYNCED_KEY = "change_feed:synced"
+
+# Same definition as migrations/0005_job_change_feed.sql (baselined databases never ran it)
+_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION notify_job_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    message text;
+BEGIN
+    FOR message IN
+        SELECT json_build_object(
+            'op', lower(TG_OP),
+            'ts', extract(epoch FROM clock_timestamp()),
+            'job_ids', json_agg(job_id)
+        )::text
+        FROM (
+            SELECT job_id,
+                   sum(octet_length(job_id::text) + 3) OVER (ORDER BY job_id ROWS UNBOUNDED PRECEDING) / 7000 AS chunk
+            FROM changed
+        ) numbered
+        GROUP BY chunk
+    LOOP
+        PERFORM pg_notify('job_changes', message);
+    END LOOP;
+    RETURN NULL;
+END
+$$
+"""
+
+# UPDATE variant: rows whose only change is lease_expires_at (lease heartbeats,
+# see leases.renew_leases) are left out, so renewals never reach the listener
+_UPDATE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION notify_job_updates() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    message text;
+BEGIN
+    FOR message IN
+        SELECT json_build_object(
+            'op', 'update',
+            'ts', extract(epoch FROM clock_timestamp()),
+            'job_ids', json_agg(job_id)
+        )::text
+        FROM (
+            SELECT changed.job_id,
+                   sum(octet_length(changed.job_id::text) + 3)
+                       OVER (ORDER BY changed.job_id ROWS UNBOUNDED PRECEDING) / 7000 AS chunk
+            FROM changed JOIN previous USING (id)
+            WHERE to_jsonb(changed) - 'lease_expires_at' IS DISTINCT FROM to_jsonb(previous) - 'lease_expires_at'
+        ) numbered
+        GROUP BY chunk
+    LOOP
+        PERFORM pg_notify('job_changes', message);
+    END LOOP;
+    RETURN NULL;
+END
+$$
+"""
+
+# Trigger name -> (event, transition tables, function); transition tables allow only one event per trigger
+_TRIGGERS = {
+    'jobs_change_feed_insert': ('INSERT', 'NEW TABLE AS changed', 'notify_job_changes'),
+    'jobs_change_feed_update': ('UPDATE', 'OLD TABLE AS previous NEW TABLE AS changed', 'notify_job_updates'),
+    'jobs_change_feed_delete': ('DELETE', 'OLD TABLE AS changed', 'notify_job_changes'),
+}
+
+# Each branch matches one partial index on updated_at (ix_jobs_terminal_updated_at, ix_jobs_active_updated_at)
+_RESYNC_SQL = """
+SELECT job_id, updated_at FROM jobs
+WHERE status IN ('COMPLETED', 'FAILED', 'DEAD_LETTER') AND updated_at >= :since
+UNION ALL
+SELECT job_id, updated_at FROM jobs
+WHERE status NOT IN ('COMPLETED', 'FAILED', 'DEAD_LETTER') AND updated_at >= :since
+ORDER BY updated_at
+"""
+
+# Prometheus metrics
+feed_notifications = Counter('change_feed_notifications_total', 'Job change notifications received', ['op'])
+feed_keys = Counter('change_feed_keys_total', 'Cache keys updated by the change feed', ['action'])
+feed_lag = Histogram(
+    'change_feed_lag_seconds', 'Delay from a job change to its cache update',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+feed_leader = Gauge('change_feed_leader', 'Whether this process runs the change feed listener')
+
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+_stop = threading.Event()
+_status: Dict[str, Any] = {'state': 'stopped', 'last_batch_at': None}
+
+
+def parse_notification(payload: str) -> Optional[Dict[str, Any]]:
+    """Decode a job_changes payload ({"op", "ts", "job_ids"}); None if malformed"""
+    try:
+        message = json.loads(payload)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(message, dict) or not isinstance(message.get('job_ids'), list):
+        return None
+    return message
+
+
+def apply_changes(job_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    Bring the cached snapshots of changed jobs up to date
+    
+    Reads the current rows from the primary: present jobs are written
+    through, deleted (archived) ones are invalidated. Job lists and job
+    stats are dropped when a job appeared, disappeared or changed status.
+    Applying a batch after the notifying commit means the last write to a
+    key always reflects the latest committed row.
+    
+    Args:
+        job_ids: Changed job ids
+    
+    Returns:
+        Dict with refreshed, invalidated and lists_invalidated counts
+    """
+    job_ids = list(dict.fromkeys(job_ids))
+    if not job_ids:
+        return {'refreshed': 0, 'invalidated': 0, 'lists_invalidated': 0}
+    
+    with get_engine().connect() as conn:
+        snapshots = [
+            encode_job(job) for job in
+            conn.execute(Job.__table__.select().where(Job.job_id.in_(job_ids))).all()
+        ]
+    
+    cached = get_cached_jobs(job_ids)
+    current = {snapshot['job_id'] for snapshot in snapshots}
+    gone = [job_id for job_id in job_ids if job_id not in current]
+    
+    # Lists hold ids and statuses: only membership or status changes affect them
+    lists_dirty = bool(gone) or any(
+        cached.get(snapshot['job_id'], {}).get('status') != snapshot['status'] for snapshot in snapshots
+    )
+    
+    cache_jobs(snapshots)
+    invalidate_jobs(gone)
+    lists_invalidated = 0
+    if lists_dirty:
+        lists_invalidated = invalidate_job_lists()
+        cache_delete(CacheKey.aggregation("job_stats", "all"))
+    
+    feed_keys.labels(action='refreshed').inc(len(snapshots))
+    feed_keys.labels(action='invalidated').inc(len(gone))
+    return {'refreshed': len(snapshots), 'invalidated': len(gone), 'lists_invalidated': lists_invalidated}
+
+
+def resync(since: datetime) -> Dict[str, int]:
+    """
+    Refresh jobs updated since a point in time (notifications missed while
+    no listener was connected)
+    
+    Args:
+        since: Lower bound on jobs.updated_at
+    
+    Returns:
+        Totals of apply_changes over all batches
+    """
+    totals = {'refreshed': 0, 'invalidated': 0, 'lists_invalidated': 0}
+    with get_engine().connect() as conn:
+        job_ids = conn.execute(text(_RESYNC_SQL), {'since': since}).scalars().all()
+    
+    batch_size = config.change_feed.batch_size
+    for start in range(0, len(job_ids), batch_size):
+        for key, value in apply_changes(job_ids[start:start + batch_size]).items():
+            totals[key] += value
+    
+    logger.info("Change feed resync complete", since=since.isoformat(), jobs=len(job_ids), **totals)
+    return totals
+
+
+def install_change_feed(engine=None):
+    """Create the NOTIFY triggers on jobs (idempotent)"""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(_FUNCTION_SQL)
+        conn.exec_driver_sql(_UPDATE_FUNCTION_SQL)
+        for name, (operation, transitions, function) in _TRIGGERS.items():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name} ON jobs")
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {name} AFTER {operation} ON jobs "
+                f"REFERENCING {transitions} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+            )
+    logger.info("Change feed triggers installed", triggers=list(_TRIGGERS))
+
+
+def uninstall_change_feed(engine=None):
+    """Drop the NOTIFY triggers so writes to jobs skip the notify queue lock"""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        for name in _TRIGGERS:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name} ON jobs")
+    logger.info("Change feed triggers removed", triggers=list(_TRIGGERS))
+
+
+def sync_change_feed(engine=None) -> bool:
+    """
+    Install or drop the triggers to match CHANGE_FEED_ENABLED
+    
+    Returns:
+        Whether the triggers are installed
+    """
+    if config.change_feed.enabled:
+        install_change_feed(engine)
+        return True
+    uninstall_change_feed(engine)
+    return False
+
+
+def _connect():
+    """Dedicated connection outside the pool (LISTEN and the leader lock are session state)"""
+    connect = get_connection if config.database.instance_connection_name else get_tcp_connection
+    conn = connect()
+    conn.autocommit = True
+    # pg8000 keeps only the last 100 notifications by default
+    conn.notifications = deque()
+    return conn
+
+
+def _try_lead(cursor) -> bool:
+    cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (_LEADER_LOCK_KEY,))
+    return bool(cursor.fetchone()[0])
+
+
+def _catch_up():
+    """Resync from the previous leader's last batch (bounded by the job TTL)"""
+    synced = cache_get(_SYNCED_KEY)
+    if not synced:
+        return
+    earliest = datetime.now(timezone.utc) - timedelta(seconds=config.redis.ttl_job)
+    since = datetime.fromtimestamp(float(synced), timezone.utc) - timedelta(
+        seconds=config.change_feed.resync_margin_seconds
+    )
+    resync(max(since, earliest))
+
+
+def _drain(conn, cursor, pending: Set[str], change_times: List[float]):
+    """Pull notifications off the socket (pg8000 reads them while running a statement)"""
+    cursor.execute("SELECT 1")
+    while conn.notifications:
+        _, _, payload = conn.notifications.popleft()
+        message = parse_notification(payload)
+        if message is None:
+            logger.warning("Malformed change notification", payload=payload[:200])
+            continue
+        feed_notifications.labels(op=message.get('op', 'unknown')).inc()
+        pending.update(message['job_ids'])
+        if message.get('ts'):
+            change_times.append(float(message['ts']))
+
+
+def _listen(conn):
+    settings = config.change_feed
+    cursor = conn.cursor()
+    cursor.execute(f"LISTEN {CHANNEL}")
+    _catch_up()
+    
+    pending: Set[str] = set()
+    change_times: List[float] = []
+    batch_started = None
+    
+    while not _stop.is_set():
+        _drain(conn, cursor, pending, change_times)
+        if pending and batch_started is None:
+            batch_started = time.monotonic()
+        
+        due = batch_started is not None and (
+            len(pending) >= settings.batch_size or time.monotonic() - batch_started >= settings.batch_seconds
+        )
+        if due:
+            batch_at = time.time()
+            ids = list(pending)
+            for start in range(0, len(ids), settings.batch_size):
+                apply_changes(ids[start:start + settings.batch_size])
+            now = time.time()
+            for changed in change_times:
+                feed_lag.observe(max(now - changed, 0))
+            cache_set(_SYNCED_KEY, batch_at, ttl=config.redis.ttl_job)
+            _status['last_batch_at'] = datetime.now(timezone.utc).isoformat()
+            pending.clear()
+            change_times.clear()
+            batch_started = None
+        
+        _stop.wait(settings.poll_seconds)
+
+
+def _run():
+    backoff = 1.0
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = _connect()
+            if not _try_lead(conn.cursor()):
+                _status['state'] = 'standby'
+                conn.close()
+                conn = None
+                _stop.wait(config.change_feed.standby_retry_seconds)
+                continue
+            
+            _status['state'] = 'leader'
+            feed_leader.set(1)
+            logger.info("Change feed listener started", channel=CHANNEL)
+            backoff = 1.0
+            _listen(conn)
+        except Exception as e:
+            _status['state'] = 'reconnecting'
+            logger.error("Change feed listener failed", error=str(e), error_type=type(e).__name__)
+            _stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+        finally:
+            feed_leader.set(0)
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+    
+    _status['state'] = 'stopped'
+
+
+def start_change_feed():
+    """Start the listener thread once per process (no-op unless CHANGE_FEED_ENABLED)"""
+    global _thread
+    
+    if not config.change_feed.enabled:
+        return
+    
+    with _thread_lock:
+        if _thread is not None:
+            return
+        _stop.clear()
+        _thread = threading.Thread(target=_run, name="change-feed", daemon=True)
+        _thread.start()
+
+
+def stop_change_feed(timeout: float = 5.0):
+    """Stop the listener thread (closing its connection releases the leader lock)"""
+    global _thread
+    
+    with _thread_lock:
+        thread, _thread = _thread, None
+    if thread is None:
+        return
+    _stop.set()
+    thread.join(timeout)
+
+
+def get_change_feed_status() -> Dict[str, Any]:
+    """Listener state (stopped, standby, leader, reconnecting) and last batch time"""
+    return {'enabled': config.change_feed.enabled, **_status}
@@ -2,10 +2,20 @@
 Configuration management for CUIDA+Care Worker
 """
 import os
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 from dataclasses import dataclass
 
 
+def _parse_pairs(raw: str, cast: Callable) -> Dict[str, object]:
+    """Parse 'name=value,name=value' settings"""
+    pairs = {}
+    for item in raw.split(','):
+        if '=' in item:
+            name, value = item.split('=', 1)
+            pairs[name.strip()] = cast(value.strip())
+    return pairs
+
+
 @dataclass
 class DatabaseConfig:
     """Cloud SQL PostgreSQL configuration"""
@@ -17,12 +27,50 @@ class DatabaseConfig:
     user: str = os.getenv('DB_USER', 'app_user')
     password: str = os.getenv('DB_PASSWORD', 'CuidaCare2025!Secure')
     
+    # Direct TCP connection (used when CLOUD_SQL_CONNECTION_NAME is empty, e.g. local Postgres)
+    host: str = os.getenv('DB_HOST', 'localhost')
+    port: int = int(os.getenv('DB_PORT', '5432'))
+    
+    # Read replicas for read-only traffic: Cloud SQL instance connection names
+    # (connector) or host[:port] entries (direct TCP), comma-separated
+    replica_connection_names: str = os.getenv('DB_REPLICA_CONNECTION_NAMES', '')
+    replica_hosts: str = os.getenv('DB_REPLICA_HOSTS', '')
+    replica_max_lag_seconds: float = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '5'))
+    replica_lag_check_interval: float = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '10'))
+    replica_pool_size: int = int(os.getenv('DB_REPLICA_POOL_SIZE', '5'))
+    primary_pin_seconds: int = int(os.getenv('DB_PRIMARY_PIN_SECONDS', '15'))  # read-your-writes window
+    
+    # Cloud SQL Connector certificate refresh: 'background' or 'lazy' (better when CPU is throttled)
+    connector_refresh_strategy: str = os.getenv('DB_CONNECTOR_REFRESH_STRATEGY', 'background')
+    
     # Connection pool settings
     pool_size: int = int(os.getenv('DB_POOL_SIZE', '5'))
     max_overflow: int = int(os.getenv('DB_MAX_OVERFLOW', '10'))
     pool_timeout: int = int(os.getenv('DB_POOL_TIMEOUT', '30'))
     pool_recycle: int = int(os.getenv('DB_POOL_RECYCLE', '1800'))
     
+    # Query profiler
+    slow_query_seconds: float = float(os.getenv('DB_SLOW_QUERY_SECONDS', '1.0'))
+    profiler_sample_seconds: float = float(os.getenv('DB_PROFILER_SAMPLE_SECONDS', '0.1'))  # keep for EXPLAIN
+    profiler_max_fingerprints: int = int(os.getenv('DB_PROFILER_MAX_FINGERPRINTS', '500'))
+    profiler_explain_enabled: bool = os.getenv('DB_PROFILER_EXPLAIN_ENABLED', 'false').lower() == 'true'
+    
+    # job_id/event_id stored as native uuid (after migrations/optional/0001_native_uuid_ids.sql)
+    native_uuid_ids: bool = os.getenv('DB_NATIVE_UUID_IDS', 'false').lower() == 'true'
+    
+    # Pool autotuning: 'off', 'recommend' (metrics + logs) or 'adjust' (resize at runtime)
+    pool_autotune: str = os.getenv('DB_POOL_AUTOTUNE', 'off')
+    pool_autotune_interval: int = int(os.getenv('DB_POOL_AUTOTUNE_INTERVAL', '60'))
+    server_max_connections: int = int(os.getenv('DB_SERVER_MAX_CONNECTIONS', '100'))  # Cloud SQL max_connections
+    reserved_connections: int = int(os.getenv('DB_RESERVED_CONNECTIONS', '10'))  # admin, migrations
+    max_instances: int = int(os.getenv('DB_MAX_INSTANCES', '10'))  # Cloud Run max_instance_count
+    
+    @property
+    def replica_targets(self) -> List[str]:
+        """Configured replica targets (connection names take precedence over hosts)"""
+        raw = self.replica_connection_names or self.replica_hosts
+        return [target.strip() for target in raw.split(',') if target.strip()]
+    
     @property
     def connection_string(self) -> str:
         """PostgreSQL connection string for Cloud SQL Connector"""
@@ -37,6 +85,17 @@ class PubSubConfig:
     dlq_topic_name: str = os.getenv('PUBSUB_DLQ_TOPIC', 'hello-topic-dlq')
     subscription_name: str = os.getenv('PUBSUB_SUBSCRIPTION', 'hello-sub')
     max_retry_attempts: int = int(os.getenv('PUBSUB_MAX_RETRIES', '3'))
+    
+    # Bulk push endpoint (/pubsub/push/batch)
+    push_batch_max_messages: int = int(os.getenv('PUSH_BATCH_MAX_MESSAGES', '1000'))  # per request
+    push_batch_concurrency: int = int(os.getenv('PUSH_BATCH_CONCURRENCY', '8'))  # messages processed at once
+    
+    # Publisher batching (a batch is sent when any limit is reached) and flow control
+    publish_max_messages: int = int(os.getenv('PUBSUB_PUBLISH_MAX_MESSAGES', '100'))
+    publish_max_bytes: int = int(os.getenv('PUBSUB_PUBLISH_MAX_BYTES', str(1024 * 1024)))
+    publish_max_latency: float = float(os.getenv('PUBSUB_PUBLISH_MAX_LATENCY', '0.01'))  # seconds
+    flow_max_messages: int = int(os.getenv('PUBSUB_FLOW_MAX_MESSAGES', '1000'))  # in flight before publish() blocks
+    flow_max_bytes: int = int(os.getenv('PUBSUB_FLOW_MAX_BYTES', str(10 * 1024 * 1024)))
 
 
 @dataclass
@@ -47,11 +106,163 @@ class RedisConfig:
     password: str = os.getenv('REDIS_PASSWORD', '')
     db: int = int(os.getenv('REDIS_DB', '0'))
     socket_timeout: int = int(os.getenv('REDIS_SOCKET_TIMEOUT', '5'))
+    connect_timeout: float = float(os.getenv('REDIS_CONNECT_TIMEOUT', '1.0'))
+    
+    # Connection pool: block up to pool_timeout for a free connection
+    max_connections: int = int(os.getenv('REDIS_MAX_CONNECTIONS', '20'))
+    pool_timeout: float = float(os.getenv('REDIS_POOL_TIMEOUT', '0.5'))
+    
+    # Circuit breaker: open after N consecutive failures, probe again after reset timeout
+    breaker_failure_threshold: int = int(os.getenv('REDIS_BREAKER_FAILURES', '3'))
+    breaker_reset_timeout: float = float(os.getenv('REDIS_BREAKER_RESET', '30'))
     
     # TTL configurations (in seconds)
-    ttl_job: int = int(os.getenv('REDIS_TTL_JOB', '3600'))  # 1 hour
+    ttl_job: int = int(os.getenv('REDIS_TTL_JOB', '3600'))  # 1 hour (terminal jobs)
+    ttl_job_active: int = int(os.getenv('REDIS_TTL_JOB_ACTIVE', '30'))  # jobs still pending/processing
     ttl_metrics: int = int(os.getenv('REDIS_TTL_METRICS', '300'))  # 5 minutes
     ttl_aggregations: int = int(os.getenv('REDIS_TTL_AGG', '600'))  # 10 minutes
+    
+    # Cache-aside / stale-while-revalidate settings
+    stale_ttl: int = int(os.getenv('REDIS_STALE_TTL', '120'))  # serve stale up to 2 minutes past TTL
+    lock_ttl: int = int(os.getenv('REDIS_LOCK_TTL', '30'))  # recompute lock lifetime (seconds)
+    lock_wait: float = float(os.getenv('REDIS_LOCK_WAIT', '2.0'))  # wait for another instance's recompute
+    early_refresh_beta: float = float(os.getenv('REDIS_EARLY_REFRESH_BETA', '1.0'))  # 0 disables early refresh
+    refresh_workers: int = int(os.getenv('REDIS_REFRESH_WORKERS', '4'))
+    
+    # Per-family hit rate export to Cloud Monitoring (seconds)
+    stats_export_interval: int = int(os.getenv('REDIS_STATS_EXPORT_INTERVAL', '60'))
+
+
+@dataclass
+class WarmupConfig:
+    """Startup warm-up configuration"""
+    enabled: bool = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+    budget_seconds: float = float(os.getenv('WARMUP_BUDGET_SECONDS', '10'))
+    db_connections: int = int(os.getenv('WARMUP_DB_CONNECTIONS', '0'))  # 0 = DB_POOL_SIZE
+    redis_connections: int = int(os.getenv('WARMUP_REDIS_CONNECTIONS', '4'))
+    list_pages: int = int(os.getenv('WARMUP_LIST_PAGES', '1'))  # first pages per status
+    recent_jobs: int = int(os.getenv('WARMUP_RECENT_JOBS', '50'))
+
+
+@dataclass
+class PartitionConfig:
+    """event_logs partition management configuration"""
+    interval: str = os.getenv('EVENT_PARTITION_INTERVAL', 'day')  # day or week
+    premake: int = int(os.getenv('EVENT_PARTITION_PREMAKE', '7'))  # future partitions kept ready
+    retention_days: int = int(os.getenv('EVENT_RETENTION_DAYS', '90'))  # 0 = keep forever
+    retention_action: str = os.getenv('EVENT_RETENTION_ACTION', 'drop')  # drop or detach
+    archive_dir: str = os.getenv('EVENT_ARCHIVE_DIR', '')  # gzip CSV copy before drop/detach
+
+
+@dataclass
+class ArchiveConfig:
+    """Terminal job archival configuration"""
+    after_days: int = int(os.getenv('ARCHIVE_AFTER_DAYS', '30'))  # by updated_at
+    batch_size: int = int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))
+    pause_seconds: float = float(os.getenv('ARCHIVE_PAUSE_SECONDS', '0.1'))  # between batches
+    max_seconds: float = float(os.getenv('ARCHIVE_MAX_SECONDS', '0'))  # 0 = until drained
+
+
+@dataclass
+class PayloadConfig:
+    """Content-addressed payload store configuration"""
+    compress_threshold: int = int(os.getenv('PAYLOAD_COMPRESS_THRESHOLD', '1024'))  # bytes; zlib above
+    compress_level: int = int(os.getenv('PAYLOAD_COMPRESS_LEVEL', '6'))
+    blob_dir: str = os.getenv('PAYLOAD_BLOB_DIR', '')  # local/mounted directory for large bodies
+    blob_threshold: int = int(os.getenv('PAYLOAD_BLOB_THRESHOLD', str(256 * 1024)))  # bytes; blob dir above
+    cache_size: int = int(os.getenv('PAYLOAD_CACHE_SIZE', '1024'))  # resolved payloads kept in process
+
+
+@dataclass
+class ChangeFeedConfig:
+    """jobs change feed (LISTEN/NOTIFY) configuration"""
+    enabled: bool = os.getenv('CHANGE_FEED_ENABLED', 'false').lower() == 'true'
+    poll_seconds: float = float(os.getenv('CHANGE_FEED_POLL_SECONDS', '0.2'))  # notification drain interval
+    batch_seconds: float = float(os.getenv('CHANGE_FEED_BATCH_SECONDS', '0.5'))  # max wait before applying
+    batch_size: int = int(os.getenv('CHANGE_FEED_BATCH_SIZE', '500'))  # job ids per cache update
+    resync_margin_seconds: float = float(os.getenv('CHANGE_FEED_RESYNC_MARGIN', '5'))  # catch-up overlap
+    standby_retry_seconds: float = float(os.getenv('CHANGE_FEED_STANDBY_RETRY', '10'))  # leader lock retry
+
+
+@dataclass
+class OutboxConfig:
+    """Transactional outbox relay configuration"""
+    relay_enabled: bool = os.getenv('OUTBOX_RELAY_ENABLED', 'true').lower() == 'true'  # in-process relay
+    batch_size: int = int(os.getenv('OUTBOX_BATCH_SIZE', '200'))
+    poll_seconds: float = float(os.getenv('OUTBOX_POLL_SECONDS', '0.5'))  # idle wait between claims
+    max_attempts: int = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))  # then the message is dropped
+    retry_base_seconds: float = float(os.getenv('OUTBOX_RETRY_BASE_SECONDS', '1'))
+    retry_max_seconds: float = float(os.getenv('OUTBOX_RETRY_MAX_SECONDS', '300'))
+    claim_seconds: float = float(os.getenv('OUTBOX_CLAIM_SECONDS', '60'))  # hold on groups delivered after commit
+    backlog_interval_seconds: float = float(os.getenv('OUTBOX_BACKLOG_INTERVAL', '15'))  # backlog gauges
+
+
+@dataclass
+class LeaseConfig:
+    """PROCESSING job leases and the reaper that recovers expired ones"""
+    lease_seconds: float = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+    renew_seconds: float = float(os.getenv('JOB_LEASE_RENEW_SECONDS', '20'))  # heartbeat while a handler runs
+    reaper_enabled: bool = os.getenv('LEASE_REAPER_ENABLED', 'true').lower() == 'true'  # in-process reaper
+    reaper_interval_seconds: float = float(os.getenv('LEASE_REAPER_INTERVAL', '30'))
+    reaper_batch_size: int = int(os.getenv('LEASE_REAPER_BATCH_SIZE', '100'))
+
+
+@dataclass
+class QueueConfig:
+    """Pull-mode worker claiming PENDING jobs from the jobs table"""
+    concurrency: int = int(os.getenv('QUEUE_CONCURRENCY', '8'))  # jobs running at once per process
+    claim_batch_size: int = int(os.getenv('QUEUE_CLAIM_BATCH_SIZE', '16'))
+    poll_seconds: float = float(os.getenv('QUEUE_POLL_SECONDS', '0.5'))  # idle wait when nothing is pending
+    finalize_batch_size: int = int(os.getenv('QUEUE_FINALIZE_BATCH_SIZE', '50'))
+    finalize_seconds: float = float(os.getenv('QUEUE_FINALIZE_SECONDS', '0.2'))  # max wait before a partial batch
+
+
+@dataclass
+class LaneConfig:
+    """Priority lanes of the pull and push workers: high (priority > 0), normal (0), bulk (< 0)"""
+    weights_spec: str = os.getenv('QUEUE_LANE_WEIGHTS', 'high=8,normal=4,bulk=1')  # share of dispatches
+    concurrency_spec: str = os.getenv('QUEUE_LANE_CONCURRENCY', 'high=8,normal=8,bulk=2')  # running jobs per lane
+    # Push requests running at once per lane (lanes left out are uncapped); over it the request gets 429
+    push_concurrency_spec: str = os.getenv('PUSH_LANE_CONCURRENCY', 'bulk=2')
+    # Priority of jobs created without one, by source
+    source_priorities_spec: str = os.getenv('QUEUE_SOURCE_PRIORITIES', 'api=1,backfill=-1,bulk=-1')
+    
+    @property
+    def weights(self) -> Dict[str, float]:
+        return _parse_pairs(self.weights_spec, float)
+    
+    @property
+    def concurrency(self) -> Dict[str, int]:
+        return _parse_pairs(self.concurrency_spec, int)
+    
+    @property
+    def push_concurrency(self) -> Dict[str, int]:
+        return _parse_pairs(self.push_concurrency_spec, int)
+    
+    @property
+    def source_priorities(self) -> Dict[str, int]:
+        return _parse_pairs(self.source_priorities_spec, int)
+
+
+@dataclass
+class RateLimitConfig:
+    """Per-source rate limiting (GCRA buckets in Redis, shared by all instances)"""
+    enabled: bool = os.getenv('RATE_LIMIT_ENABLED', 'false').lower() == 'true'
+    # Requests per second per limit key, by source ('default' for the rest; 0 = unlimited)
+    rates_spec: str = os.getenv('RATE_LIMIT_RATES', 'default=500,api=100')
+    burst_seconds: float = float(os.getenv('RATE_LIMIT_BURST_SECONDS', '2'))  # bucket depth in seconds of rate
+    key_attribute: str = os.getenv('RATE_LIMIT_KEY_ATTRIBUTE', 'tenant')  # message attribute splitting a source
+    # API callers: header naming the tenant, only when a trusted gateway authenticates callers and sets it
+    # (unset by default: clients could pick a fresh bucket per request); else keyed by client address
+    key_header: str = os.getenv('RATE_LIMIT_KEY_HEADER', '')
+    # Proxies appending to X-Forwarded-For in front of the API (1 on Cloud Run, 2 behind an external LB)
+    trusted_proxy_hops: int = int(os.getenv('RATE_LIMIT_TRUSTED_PROXY_HOPS', '0'))
+    local_batch: int = int(os.getenv('RATE_LIMIT_LOCAL_BATCH', '10'))  # tokens taken per Redis round trip
+    fail_open: bool = os.getenv('RATE_LIMIT_FAIL_OPEN', 'true').lower() == 'true'  # allow when Redis is down
+    
+    @property
+    def rates(self) -> Dict[str, float]:
+        return _parse_pairs(self.rates_spec, float)
 
 
 @dataclass
@@ -74,6 +285,16 @@ class AppConfig:
     pubsub: PubSubConfig = None
     logging: LoggingConfig = None
     redis: RedisConfig = None
+    warmup: WarmupConfig = None
+    partitions: PartitionConfig = None
+    archive: ArchiveConfig = None
+    payloads: PayloadConfig = None
+    change_feed: ChangeFeedConfig = None
+    outbox: OutboxConfig = None
+    leases: LeaseConfig = None
+    queue: QueueConfig = None
+    lanes: LaneConfig = None
+    rate_limit: RateLimitConfig = None
     
     def __post_init__(self):
         if self.database is None:
@@ -84,6 +305,26 @@ class AppConfig:
             self.logging = LoggingConfig()
         if self.redis is None:
             self.redis = RedisConfig()
+        if self.warmup is None:
+            self.warmup = WarmupConfig()
+        if self.partitions is None:
+            self.partitions = PartitionConfig()
+        if self.archive is None:
+            self.archive = ArchiveConfig()
+        if self.payloads is None:
+            self.payloads = PayloadConfig()
+        if self.change_feed is None:
+            self.change_feed = ChangeFeedConfig()
+        if self.outbox is None:
+            self.outbox = OutboxConfig()
+        if self.leases is None:
+            self.leases = LeaseConfig()
+        if self.queue is None:
+            self.queue = QueueConfig()
+        if self.lanes is None:
+            self.lanes = LaneConfig()
+        if self.rate_limit is None:
+            self.rate_limit = RateLimitConfig()
 
 
 # Global config instance
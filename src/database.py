@@ -1,39 +1,110 @@
 """
 Database connection management with Cloud SQL Connector
 """
-from typing import Optional
+import itertools
+import threading
+import time
+from typing import List, Optional
 from contextlib import contextmanager
-from sqlalchemy import create_engine, Engine, event
+from sqlalchemy import create_engine, Engine, event, text
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 from sqlalchemy.pool import NullPool
 from google.cloud.sql.connector import Connector
 import pg8000
+from prometheus_client import Counter, Gauge, Histogram
 
 from .config import config
 from .logging_config import get_logger
+from .pool_telemetry import InstrumentedQueuePool, install_pool_telemetry
+from .query_profiler import install_query_profiler
 
 logger = get_logger(__name__)
 
+# Prometheus metrics
+db_connect_seconds = Histogram(
+    'db_connect_seconds', 'Time to open a new database connection', ['method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+db_connect_errors = Counter('db_connect_errors_total', 'Failed database connection attempts', ['method'])
+db_read_routing = Counter('db_read_routing_total', 'Read-only sessions by routing target', ['target'])
+db_replica_lag = Gauge('db_replica_lag_seconds', 'Replication lag per replica (-1 = unreachable)', ['replica'])
+
+# Replication lag: zero when the replica has replayed everything it received
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
 # SQLAlchemy base for models
 Base = declarative_base()
 
-# Global engine and session factory
+# Global engine, session factory and Cloud SQL Connector
 _engine: Optional[Engine] = None
 _SessionLocal: Optional[sessionmaker] = None
+_connector: Optional[Connector] = None
+_connector_lock = threading.Lock()
+_replicas: Optional[List["ReplicaEngine"]] = None
+_replicas_lock = threading.Lock()
+_replica_cursor = itertools.count()
+_ReadSession = sessionmaker(autocommit=False, autoflush=False)
 
 
-def get_connection():
-    """Create a database connection using Cloud SQL Connector"""
-    connector = Connector()
+def get_connector() -> Connector:
+    """
+    Get or create the process-wide Cloud SQL Connector
     
-    conn = connector.connect(
+    One connector caches the instance metadata and ephemeral certificate
+    and runs a single refresh, shared by every pooled connection.
+    """
+    global _connector
+    
+    if _connector is None:
+        with _connector_lock:
+            if _connector is None:
+                logger.info(
+                    "Creating Cloud SQL Connector",
+                    refresh_strategy=config.database.connector_refresh_strategy
+                )
+                _connector = Connector(refresh_strategy=config.database.connector_refresh_strategy)
+    
+    return _connector
+
+
+def _timed_connect(method: str, connect):
+    """Open a connection, recording its latency"""
+    start = time.perf_counter()
+    try:
+        return connect()
+    except Exception:
+        db_connect_errors.labels(method=method).inc()
+        raise
+    finally:
+        db_connect_seconds.labels(method=method).observe(time.perf_counter() - start)
+
+
+def get_connection():
+    """Create a database connection using the shared Cloud SQL Connector"""
+    return _timed_connect("connector", lambda: get_connector().connect(
         config.database.instance_connection_name,
         "pg8000",
         user=config.database.user,
         password=config.database.password,
         db=config.database.database_name
-    )
-    return conn
+    ))
+
+
+def get_tcp_connection():
+    """Create a direct TCP database connection (local Postgres or private IP)"""
+    return _timed_connect("tcp", lambda: pg8000.dbapi.connect(
+        host=config.database.host,
+        port=config.database.port,
+        user=config.database.user,
+        password=config.database.password,
+        database=config.database.database_name
+    ))
 
 
 def get_engine() -> Engine:
@@ -41,14 +112,15 @@ def get_engine() -> Engine:
     global _engine
     
     if _engine is None:
-        # Try Cloud SQL Connector first, fallback to direct TCP
+        # Try Cloud SQL Connector first, fallback to direct TCP.
+        # Connections come from a creator on both paths so connect time is measured.
         if config.database.instance_connection_name:
             logger.info(
                 "Creating database engine with Cloud SQL Connector",
                 instance=config.database.instance_connection_name,
                 database=config.database.database_name
             )
-            connection_string = "postgresql+pg8000://"
+            creator = get_connection
         else:
             logger.info(
                 "Creating database engine with direct TCP connection",
@@ -56,41 +128,26 @@ def get_engine() -> Engine:
                 port=config.database.port,
                 database=config.database.database_name
             )
-            connection_string = f"postgresql+pg8000://{config.database.user}:{config.database.password}@{config.database.host}:{config.database.port}/{config.database.database_name}"
+            creator = get_tcp_connection
         
-        # Use creator only for Cloud SQL Connector
         engine_kwargs = {
+            "poolclass": InstrumentedQueuePool,
             "pool_size": config.database.pool_size,
             "max_overflow": config.database.max_overflow,
             "pool_timeout": config.database.pool_timeout,
             "pool_recycle": config.database.pool_recycle,
             "pool_pre_ping": True,  # Enable connection health checks
-            "echo": config.debug  # Log SQL queries in debug mode
+            "echo": config.debug,  # Log SQL queries in debug mode
+            "creator": creator
         }
         
-        if config.database.instance_connection_name:
-            engine_kwargs["creator"] = get_connection
-        
-        _engine = create_engine(connection_string, **engine_kwargs)
+        _engine = create_engine("postgresql+pg8000://", **engine_kwargs)
         
-        # Log slow queries
-        @event.listens_for(_engine, "before_cursor_execute")
-        def receive_before_cursor_execute(conn, cursor, statement, params, context, executemany):
-            import time
-            conn.info.setdefault('query_start_time', []).append(time.time())
+        # Pool wait/saturation/age metrics and optional autotuning
+        install_pool_telemetry(_engine)
         
-        @event.listens_for(_engine, "after_cursor_execute")
-        def receive_after_cursor_execute(conn, cursor, statement, params, context, executemany):
-            import time
-            start_time = conn.info.get('query_start_time', [None]).pop(-1)
-            if start_time is not None:
-                total = time.time() - start_time
-                if total > 1.0:  # Log queries taking > 1 second
-                    logger.warning(
-                        "Slow query detected",
-                        duration_seconds=total,
-                        query=statement[:200]
-                    )
+        # Per-fingerprint latency/rows metrics and slow query log
+        install_query_profiler(_engine)
         
         logger.info("Database engine created successfully")
     
@@ -139,17 +196,171 @@ def get_db_session():
         session.close()
 
 
+class ReplicaEngine:
+    """A read replica engine with its last observed replication lag"""
+    
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.lag: Optional[float] = None
+        self._checked_at = 0.0
+        self._check_lock = threading.Lock()
+    
+    def refresh_lag(self):
+        """Re-measure lag if the last check is older than the check interval"""
+        if time.monotonic() - self._checked_at < config.database.replica_lag_check_interval:
+            return
+        # One thread measures; the others keep using the last known value
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            with self.engine.connect() as conn:
+                self.lag = float(conn.execute(REPLICA_LAG_SQL).scalar())
+            db_replica_lag.labels(replica=self.name).set(self.lag)
+        except Exception as e:
+            self.lag = None
+            db_replica_lag.labels(replica=self.name).set(-1)
+            logger.warning("Replica lag check failed", replica=self.name, error=str(e))
+        finally:
+            self._checked_at = time.monotonic()
+            self._check_lock.release()
+    
+    def is_healthy(self) -> bool:
+        """Reachable and within the allowed lag"""
+        self.refresh_lag()
+        return self.lag is not None and self.lag <= config.database.replica_max_lag_seconds
+
+
+def _create_replica_engine(target: str) -> Engine:
+    """Create an engine for one replica target"""
+    if config.database.replica_connection_names:
+        creator = lambda: _timed_connect("replica_connector", lambda: get_connector().connect(
+            target,
+            "pg8000",
+            user=config.database.user,
+            password=config.database.password,
+            db=config.database.database_name
+        ))
+    else:
+        host, _, port = target.partition(':')
+        creator = lambda: _timed_connect("replica_tcp", lambda: pg8000.dbapi.connect(
+            host=host,
+            port=int(port) if port else config.database.port,
+            user=config.database.user,
+            password=config.database.password,
+            database=config.database.database_name
+        ))
+    
+    engine = create_engine(
+        "postgresql+pg8000://",
+        creator=creator,
+        pool_size=config.database.replica_pool_size,
+        max_overflow=config.database.max_overflow,
+        pool_timeout=config.database.pool_timeout,
+        pool_recycle=config.database.pool_recycle,
+        pool_pre_ping=True,
+        echo=config.debug
+    )
+    install_query_profiler(engine)
+    return engine
+
+
+def get_replica_engines() -> List[ReplicaEngine]:
+    """Get or create engines for the configured read replicas"""
+    global _replicas
+    
+    if _replicas is None:
+        with _replicas_lock:
+            if _replicas is None:
+                targets = config.database.replica_targets
+                if targets:
+                    logger.info("Creating read replica engines", replicas=targets)
+                _replicas = [ReplicaEngine(target, _create_replica_engine(target)) for target in targets]
+    
+    return _replicas
+
+
+def get_read_engine(prefer_primary: bool = False) -> Engine:
+    """
+    Pick an engine for read-only work
+    
+    Round-robins across replicas within DB_REPLICA_MAX_LAG_SECONDS; falls
+    back to the primary when none qualifies, or when prefer_primary is set
+    (read-your-writes).
+    
+    Args:
+        prefer_primary: Route to the primary regardless of replicas
+        
+    Returns:
+        Engine to read from
+    """
+    replicas = get_replica_engines()
+    if not replicas:
+        db_read_routing.labels(target='primary').inc()
+        return get_engine()
+    if prefer_primary:
+        db_read_routing.labels(target='primary_pinned').inc()
+        return get_engine()
+    
+    start = next(_replica_cursor)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if replica.is_healthy():
+            db_read_routing.labels(target='replica').inc()
+            return replica.engine
+    
+    db_read_routing.labels(target='primary_fallback').inc()
+    return get_engine()
+
+
+@contextmanager
+def get_read_session(prefer_primary: bool = False):
+    """
+    Context manager for read-only sessions, routed to a replica when possible
+    
+    The transaction is rolled back at the end; nothing is ever written.
+    
+    Usage:
+        with get_read_session() as session:
+            result = session.query(Model).all()
+    """
+    session = _ReadSession(bind=get_read_engine(prefer_primary))
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
 def init_db():
-    """Initialize database tables (create all tables defined in models)"""
+    """Initialize database tables (create all tables defined in models), event_logs partitions and change feed triggers"""
+    from . import models  # noqa: F401  (registers the tables on Base.metadata)
+    from .change_feed import sync_change_feed
+    from .partitions import is_partitioned, run_maintenance
+    
     engine = get_engine()
     logger.info("Initializing database tables")
     Base.metadata.create_all(bind=engine)
+    
+    # create_all leaves event_logs with only its DEFAULT partition
+    with engine.connect() as conn:
+        partitioned = is_partitioned(conn)
+    if partitioned:
+        run_maintenance(retention=False)
+    
+    # The change feed triggers follow CHANGE_FEED_ENABLED, not the models
+    sync_change_feed(engine)
     logger.info("Database tables initialized")
 
 
 def close_db_connections():
-    """Close all database connections (call on shutdown)"""
-    global _engine, _SessionLocal
+    """Close all database connections and the connector (call on shutdown)"""
+    global _engine, _SessionLocal, _connector, _replicas
+    
+    if _replicas:
+        for replica in _replicas:
+            replica.engine.dispose()
+        _replicas = None
     
     if _engine:
         logger.info("Closing database connections")
@@ -157,3 +368,7 @@ def close_db_connections():
         _engine = None
         _SessionLocal = None
         logger.info("Database connections closed")
+    
+    if _connector:
+        _connector.close()
+        _connector = None
@@ -0,0 +1,68 @@
+"""
+Time-ordered identifiers
+UUIDv7 (RFC 9562) keeps new job/event ids clustered at the right edge of
+their B-tree indexes instead of scattering inserts like uuid4
+"""
+import os
+import re
+import threading
+import time
+import uuid
+
+_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a UUIDv7
+    
+    48-bit Unix millisecond timestamp, then a 12-bit counter (randomly
+    seeded each millisecond, RFC 9562 method 1) so ids generated by this
+    process in the same millisecond still sort in creation order, then
+    62 random bits.
+    
+    Returns:
+        UUID instance
+    """
+    global _last_ms, _counter
+    
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = int.from_bytes(os.urandom(2), "big") & 0x7FF  # leave headroom for increments
+        else:
+            # Same millisecond (or clock stepped back): keep ordering by counting
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms += 1
+                _counter = 0
+        timestamp_ms = _last_ms
+        counter = _counter
+    
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= counter << 64
+    value |= 0b10 << 62
+    value |= random_bits
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """New time-ordered id in canonical string form (job_id, event_id, correlation_id)"""
+    return str(uuid7())
+
+
+def is_uuid(value: str) -> bool:
+    """True if value is a canonical UUID string"""
+    return bool(value) and bool(_UUID.match(value))
+
+
+def uuid7_timestamp(value: str) -> float:
+    """Unix timestamp (seconds) embedded in a UUIDv7 string"""
+    return (uuid.UUID(value).int >> 80) / 1000
@@ -0,0 +1,305 @@
+"""
+Bulk ingest for jobs and event_logs
+Streams records through COPY into a temporary staging table and merges
+them with INSERT ... ON CONFLICT, one bounded chunk per transaction
+"""
+import csv
+import gzip
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter
+
+from .database import get_engine
+from .lanes import job_priority
+from .logging_config import get_logger
+from .models import JobStatus
+from .partitions import ensure_partitions_for_range
+from .payloads import store_payloads
+
+logger = get_logger(__name__)
+
+# Prometheus metrics
+ingest_rows = Counter('ingest_rows_total', 'Rows processed by bulk ingest', ['table', 'outcome'])
+
+# Bytes per COPY data message sent to the server
+COPY_BUFFER_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class IngestTarget:
+    """How records for one table are staged and merged"""
+    table: str
+    columns: Tuple[str, ...]
+    conflict_columns: Tuple[str, ...]
+    json_columns: Tuple[str, ...]
+    now_columns: Tuple[str, ...]  # NULL -> now() on merge
+
+
+TARGETS = {
+    'jobs': IngestTarget(
+        table='jobs',
+        columns=(
+            'job_id', 'message_id', 'status', 'payload', 'payload_hash', 'result', 'error_message',
+            'retry_count', 'max_retries', 'created_at', 'updated_at', 'started_at',
+            'completed_at', 'source', 'correlation_id', 'priority'
+        ),
+        conflict_columns=('job_id',),
+        json_columns=('payload', 'result'),
+        now_columns=('created_at', 'updated_at'),
+    ),
+    'event_logs': IngestTarget(
+        table='event_logs',
+        columns=('event_id', 'event_type', 'job_id', 'data', 'event_metadata', 'timestamp', 'correlation_id'),
+        conflict_columns=('event_id', 'timestamp'),
+        json_columns=('data', 'event_metadata'),
+        now_columns=('timestamp',),
+    ),
+}
+
+
+def _status_name(value: Any) -> str:
+    """Accept JobStatus, its value ('completed') or its name ('COMPLETED')"""
+    if isinstance(value, JobStatus):
+        return value.name
+    try:
+        return JobStatus(value).name
+    except ValueError:
+        return JobStatus[value].name
+
+
+def _csv_field(value: Any) -> str:
+    """Render one CSV field: unquoted empty is NULL, everything else is quoted"""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Enum):
+        value = value.name
+    else:
+        value = str(value)
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _csv_line(target: IngestTarget, record: Dict[str, Any]) -> str:
+    values = []
+    for column in target.columns:
+        value = record.get(column)
+        if column == 'status' and value is not None:
+            value = _status_name(value)
+        elif column == 'priority':
+            value = job_priority(record.get('source'), value)  # NOT NULL: fall back to the source default
+        elif column in target.json_columns and isinstance(value, str):
+            value = json.loads(value)  # validate early: a bad row fails its chunk
+        values.append(_csv_field(value))
+    return ','.join(values) + '\n'
+
+
+def _copy_chunks(lines: Iterable[str]) -> Iterator[bytes]:
+    """Batch CSV lines into COPY data messages of about COPY_BUFFER_BYTES"""
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= COPY_BUFFER_BYTES:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _merge_sql(target: IngestTarget, stage: str, on_conflict: str) -> str:
+    columns = ", ".join(target.columns)
+    select = ", ".join(
+        f"coalesce({column}, now())" if column in target.now_columns else column
+        for column in target.columns
+    )
+    conflict = ", ".join(target.conflict_columns)
+    
+    if on_conflict == 'update':
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}" for column in target.columns if column not in target.conflict_columns
+        )
+        action = f"DO UPDATE SET {updates}"
+    else:
+        action = "DO NOTHING"
+    
+    # DISTINCT ON keeps the last duplicate within a chunk (ON CONFLICT cannot touch a row twice)
+    return (
+        f"INSERT INTO {target.table} ({columns}) "
+        f"SELECT DISTINCT ON ({conflict}) {select} FROM {stage} ORDER BY {conflict}, _seq DESC "
+        f"ON CONFLICT ({conflict}) {action}"
+    )
+
+
+def ingest(
+    table: str,
+    records: Iterable[Dict[str, Any]],
+    chunk_rows: int = 50_000,
+    on_conflict: str = 'skip',
+    progress_every: int = 100_000,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Bulk load records into jobs or event_logs
+    
+    Records are consumed lazily; at most one chunk is in flight, so memory
+    stays bounded regardless of input size. Each chunk is COPYed (CSV) into
+    a temporary staging table and merged in its own transaction, so a
+    failure loses at most the current chunk and a rerun with
+    on_conflict='skip' resumes safely.
+    
+    Args:
+        table: 'jobs' or 'event_logs'
+        records: Dicts keyed by column name (see TARGETS); JSON columns may be
+            dicts/lists or JSON strings, timestamps datetimes or ISO strings.
+            Job payloads go to the payload store and are referenced by hash
+        chunk_rows: Rows per transaction
+        on_conflict: 'skip' existing rows or 'update' them
+        progress_every: Log progress every this many rows
+        progress: Optional callback receiving the running totals
+        
+    Returns:
+        Dict with rows read, inserted/updated, skipped, chunks and rows per second
+    """
+    target = TARGETS[table]
+    if on_conflict not in ('skip', 'update'):
+        raise ValueError("on_conflict must be 'skip' or 'update'")
+    
+    stage = f"ingest_stage_{table}"
+    columns = ", ".join(target.columns)
+    merge_sql = _merge_sql(target, stage, on_conflict)
+    
+    totals = {'table': table, 'rows': 0, 'merged': 0, 'skipped': 0, 'chunks': 0}
+    start = time.perf_counter()
+    next_report = progress_every
+    records = iter(records)
+    
+    with get_engine().connect() as conn:
+        raw = conn.connection.dbapi_connection
+        # End pool_pre_ping's implicit transaction; each chunk commits on its own
+        raw.rollback()
+        cursor = raw.cursor()
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {stage} AS "
+            f"SELECT {columns} FROM {target.table} WITH NO DATA"
+        )
+        cursor.execute(f"ALTER TABLE {stage} ADD COLUMN IF NOT EXISTS _seq BIGSERIAL")
+        raw.commit()
+        
+        try:
+            while True:
+                chunk = list(islice(records, chunk_rows))
+                if not chunk:
+                    break
+                
+                if table == 'event_logs':
+                    _ensure_event_partitions(chunk)
+                else:
+                    chunk = _store_job_payloads(chunk)
+                
+                lines = (_csv_line(target, record) for record in chunk)
+                cursor.execute(f"TRUNCATE {stage}")
+                cursor.execute(f"COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)", stream=_copy_chunks(lines))
+                cursor.execute(merge_sql)
+                merged = max(cursor.rowcount, 0)
+                raw.commit()
+                
+                totals['rows'] += len(chunk)
+                totals['merged'] += merged
+                totals['skipped'] += len(chunk) - merged
+                totals['chunks'] += 1
+                ingest_rows.labels(table=table, outcome='merged').inc(merged)
+                ingest_rows.labels(table=table, outcome='skipped').inc(len(chunk) - merged)
+                
+                if totals['rows'] >= next_report:
+                    next_report += progress_every
+                    _report(totals, start, progress)
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {stage}")
+            raw.commit()
+    
+    _report(totals, start, progress, done=True)
+    return totals
+
+
+def _store_job_payloads(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Move inline job payloads into the payload store, replacing them with
+    payload_hash (own transaction: an unreferenced payload is harmless)
+    """
+    pending = [record for record in chunk if record.get('payload') is not None]
+    if not pending:
+        return chunk
+    
+    payloads = [
+        json.loads(record['payload']) if isinstance(record['payload'], str) else record['payload']
+        for record in pending
+    ]
+    with get_engine().begin() as conn:
+        hashes = iter(store_payloads(conn, payloads))
+    
+    return [
+        {**record, 'payload': None, 'payload_hash': next(hashes)} if record.get('payload') is not None else record
+        for record in chunk
+    ]
+
+
+def _ensure_event_partitions(chunk: List[Dict[str, Any]]):
+    """Create the partitions a chunk of historical events lands in"""
+    timestamps = [
+        value if isinstance(value, datetime) else datetime.fromisoformat(value)
+        for value in (record.get('timestamp') for record in chunk) if value
+    ]
+    # Naive timestamps are stored as UTC (the server time zone)
+    timestamps = [ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc) for ts in timestamps]
+    if timestamps:
+        ensure_partitions_for_range(min(timestamps), max(timestamps))
+
+
+def _report(totals: Dict[str, Any], start: float, progress: Optional[Callable], done: bool = False):
+    elapsed = time.perf_counter() - start
+    totals['seconds'] = round(elapsed, 2)
+    totals['rows_per_second'] = round(totals['rows'] / elapsed, 1) if elapsed else None
+    logger.info("Ingest complete" if done else "Ingest progress", **totals)
+    if progress:
+        progress(dict(totals))
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from an NDJSON (.ndjson/.jsonl) or CSV-with-header file
+    
+    Files ending in .gz are decompressed on the fly. Empty CSV fields are
+    read as NULL.
+    
+    Args:
+        path: Input file
+        
+    Yields:
+        One dict per record
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    name = path[:-3] if path.endswith('.gz') else path
+    
+    with opener(path, 'rt', encoding='utf-8', newline='') as handle:
+        if name.endswith('.csv'):
+            for row in csv.DictReader(handle):
+                yield {key: (value if value != '' else None) for key, value in row.items()}
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
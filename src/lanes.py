@@ -0,0 +1,204 @@
+"""
+Priority lanes for the pull and push workers
+Jobs fall into three lanes by priority: high (> 0), normal (0) and bulk
+(< 0). The pull worker claims and buffers jobs per lane and LaneScheduler
+picks the next job to run by weighted fair share (stride scheduling) under
+per-lane concurrency caps, so a bulk backfill cannot starve interactive
+jobs. The push worker has nothing to pick from (each request brings its own
+message), so LaneGate caps each lane at admission instead.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+
+from .config import config
+from .models import Job
+
+LANE_HIGH = "high"
+LANE_NORMAL = "normal"
+LANE_BULK = "bulk"
+LANES = (LANE_HIGH, LANE_NORMAL, LANE_BULK)
+
+# jobs.priority is a SMALLINT
+PRIORITY_MIN, PRIORITY_MAX = -32768, 32767
+
+# Prometheus metrics
+lane_waiting = Gauge('queue_lane_waiting', 'Claimed jobs waiting for a slot', ['lane'])
+lane_running = Gauge('queue_lane_running', 'Jobs running', ['lane'])
+push_lane_running = Gauge('push_lane_running', 'Push requests running', ['lane'])
+push_lane_rejected = Counter('push_lane_rejected_total', 'Push requests refused because their lane was full', ['lane'])
+
+
+def lane_for(priority: Optional[int]) -> str:
+    """Lane of a job priority"""
+    if priority and priority > 0:
+        return LANE_HIGH
+    if priority and priority < 0:
+        return LANE_BULK
+    return LANE_NORMAL
+
+
+def lane_filter(lane: str):
+    """WHERE clause selecting the jobs of a lane"""
+    if lane == LANE_HIGH:
+        return Job.priority > 0
+    if lane == LANE_BULK:
+        return Job.priority < 0
+    return Job.priority == 0
+
+
+def job_priority(source: Optional[str], requested: Any = None) -> int:
+    """
+    Priority for a new job: the requested one if valid, else the source default
+    
+    Args:
+        source: Job source (pubsub, api, bulk, ...)
+        requested: Priority asked for by the producer (e.g. a message attribute)
+    
+    Returns:
+        Priority clamped to the column range
+    """
+    if requested is not None and requested != '':
+        try:
+            return max(PRIORITY_MIN, min(PRIORITY_MAX, int(requested)))
+        except (TypeError, ValueError):
+            pass
+    return config.lanes.source_priorities.get(source or '', 0)
+
+
+@dataclass
+class Lane:
+    """One lane's buffer and scheduling state"""
+    name: str
+    weight: float
+    max_concurrency: int
+    waiting: Deque[Tuple[float, Any]] = field(default_factory=deque)
+    running: int = 0
+    pass_value: float = 0.0  # virtual time of the lane's next dispatch
+
+
+class LaneScheduler:
+    """
+    Weighted fair dequeueing across lanes
+    
+    Each dispatch advances a lane's pass by 1/weight and the lane with the
+    lowest pass goes next, so busy lanes share dispatches in proportion to
+    their weights. A lane that was idle restarts at the current virtual
+    time instead of cashing in credit for the time it had no work. Lanes at
+    their concurrency cap are skipped until a job finishes.
+    
+    Not thread-safe: the worker's loop thread owns it.
+    """
+    
+    def __init__(self, weights: Optional[Dict[str, float]] = None, concurrency: Optional[Dict[str, int]] = None):
+        weights = config.lanes.weights if weights is None else weights
+        concurrency = config.lanes.concurrency if concurrency is None else concurrency
+        self.lanes = {
+            name: Lane(name, max(float(weights.get(name, 1)), 0.001), max(int(concurrency.get(name, 1)), 1))
+            for name in LANES
+        }
+        self._virtual_time = 0.0
+    
+    def room(self, name: str) -> int:
+        """How many more jobs the lane should buffer (up to its concurrency cap)"""
+        lane = self.lanes[name]
+        return max(lane.max_concurrency - len(lane.waiting), 0)
+    
+    def push(self, name: str, item: Any):
+        """Buffer a claimed job in its lane"""
+        lane = self.lanes[name]
+        if not lane.waiting and not lane.running:
+            lane.pass_value = max(lane.pass_value, self._virtual_time)
+        lane.waiting.append((time.monotonic(), item))
+        lane_waiting.labels(lane=name).set(len(lane.waiting))
+    
+    def pop(self) -> Optional[Tuple[str, Any, float]]:
+        """
+        Take the next job to run
+        
+        Returns:
+            (lane name, item, seconds buffered), or None when every lane is
+            empty or at its cap
+        """
+        eligible = [
+            lane for lane in self.lanes.values() if lane.waiting and lane.running < lane.max_concurrency
+        ]
+        if not eligible:
+            return None
+        
+        lane = min(eligible, key=lambda candidate: candidate.pass_value)
+        self._virtual_time = lane.pass_value
+        lane.pass_value += 1.0 / lane.weight
+        queued_at, item = lane.waiting.popleft()
+        lane.running += 1
+        lane_waiting.labels(lane=lane.name).set(len(lane.waiting))
+        lane_running.labels(lane=lane.name).set(lane.running)
+        return lane.name, item, time.monotonic() - queued_at
+    
+    def done(self, name: str):
+        """Release the slot of a finished job"""
+        lane = self.lanes[name]
+        lane.running -= 1
+        lane_running.labels(lane=name).set(lane.running)
+    
+    def drain(self) -> List[Any]:
+        """Empty every lane's buffer, returning the jobs that never started"""
+        items = []
+        for lane in self.lanes.values():
+            items.extend(item for _, item in lane.waiting)
+            lane.waiting.clear()
+            lane_waiting.labels(lane=lane.name).set(0)
+        return items
+    
+    def waiting(self) -> int:
+        """Buffered jobs over all lanes"""
+        return sum(len(lane.waiting) for lane in self.lanes.values())
+    
+    def status(self) -> Dict[str, Dict[str, int]]:
+        """Waiting and running jobs per lane"""
+        return {name: {'waiting': len(lane.waiting), 'running': lane.running} for name, lane in self.lanes.items()}
+
+
+class LaneGate:
+    """
+    Per-lane admission for the push worker
+    
+    Each lane admits at most its cap of requests at once; lanes without a
+    cap are bounded only by the server's threads. A request over its lane's
+    cap is refused rather than queued (Pub/Sub redelivers it later), so a
+    bulk flood leaves the remaining threads to the other lanes.
+    
+    Thread-safe.
+    """
+    
+    def __init__(self, caps: Optional[Dict[str, int]] = None):
+        caps = config.lanes.push_concurrency if caps is None else caps
+        self.caps = {name: int(caps[name]) for name in LANES if int(caps.get(name, 0)) > 0}
+        self._running = {name: 0 for name in LANES}
+        self._lock = threading.Lock()
+    
+    def try_acquire(self, name: str) -> bool:
+        """Take a slot in the lane; False (and nothing taken) when it is full"""
+        with self._lock:
+            cap = self.caps.get(name)
+            if cap is not None and self._running[name] >= cap:
+                push_lane_rejected.labels(lane=name).inc()
+                return False
+            self._running[name] += 1
+            push_lane_running.labels(lane=name).set(self._running[name])
+        return True
+    
+    def release(self, name: str):
+        """Give back a slot taken with try_acquire"""
+        with self._lock:
+            self._running[name] -= 1
+            push_lane_running.labels(lane=name).set(self._running[name])
+    
+    def status(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Running requests and cap (None = uncapped) per lane"""
+        with self._lock:
+            return {name: {'running': self._running[name], 'cap': self.caps.get(name)} for name in LANES}
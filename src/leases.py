@@ -0,0 +1,312 @@
+"""
+Leases on PROCESSING jobs
+A worker that takes a job sets lease_expires_at and renews it while the
+handler runs. If the worker dies (scale-in, gunicorn timeout) the lease
+runs out, and the reaper requeues or fails the job in small SKIP LOCKED
+batches found through the ix_jobs_processing_lease partial index.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterable, Optional, Set
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import func, insert, text, update
+
+from .config import config
+from .database import get_engine
+from .ids import new_id
+from .logging_config import get_logger
+from .models import EventLog, Job, JobStatus
+from .outbox import TOPIC_JOB_LISTS, TOPIC_JOB_SNAPSHOT, enqueue_many, notify_relay
+from .snapshots import encode_job
+
+logger = get_logger(__name__)
+
+# Sources whose broker redelivers a message the worker never acknowledged:
+# the redelivery becomes a new job, so the abandoned one is failed, not requeued
+REDELIVERED_SOURCES = frozenset({'pubsub'})
+
+LEASE_EXPIRED_MESSAGE = "Lease expired: the worker processing this job stopped responding"
+
+# Prometheus metrics
+jobs_reaped = Counter('jobs_reaped_total', 'PROCESSING jobs recovered after their lease expired', ['status'])
+lease_renewals = Counter('job_lease_renewals_total', 'Job lease renewals', ['result'])  # renewed, lost, error
+leases_held = Gauge('job_leases_held', 'Job leases this process is renewing')
+
+# Candidates come from an index-only scan of the partial index (MATERIALIZED
+# keeps the planner from folding it into the locking scan); the outer query
+# locks them, skipping rows another reaper or a finishing worker holds, and
+# re-checks the lease in case it was renewed in between.
+CLAIM_EXPIRED_SQL = text("""
+    WITH candidates AS MATERIALIZED (
+        SELECT id FROM jobs
+        WHERE status = 'PROCESSING' AND lease_expires_at < now()
+        ORDER BY lease_expires_at
+        LIMIT :batch_size
+    )
+    SELECT jobs.id, jobs.job_id, jobs.source, jobs.retry_count, jobs.max_retries, jobs.correlation_id,
+           jobs.lease_expires_at
+    FROM jobs JOIN candidates USING (id)
+    WHERE jobs.status = 'PROCESSING' AND jobs.lease_expires_at < now()
+    FOR UPDATE OF jobs SKIP LOCKED
+""")
+
+COUNT_EXPIRED_SQL = text(
+    "SELECT count(*) FROM jobs WHERE status = 'PROCESSING' AND lease_expires_at < now()"
+)
+
+# job_id -> number of holders in this process, renewed together by the heartbeat
+_held: Dict[str, int] = {}
+_held_lock = threading.Lock()
+_heartbeat: Optional[threading.Thread] = None
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def lease_expiry():
+    """SQL expression for a lease taken now (database clock, like the reaper's)"""
+    return func.now() + timedelta(seconds=config.leases.lease_seconds)
+
+
+def renew_leases(job_ids: Iterable[str]) -> Set[str]:
+    """
+    Extend the leases of jobs that are still PROCESSING
+    
+    updated_at is left alone: a renewal is not a change to the job.
+    
+    Args:
+        job_ids: Jobs this process is working on
+    
+    Returns:
+        The job ids whose lease was renewed; the others were reaped or finished
+    """
+    job_ids = list(job_ids)
+    if not job_ids:
+        return set()
+    
+    with get_engine().begin() as conn:
+        renewed = set(conn.execute(
+            update(Job)
+            .where(Job.job_id.in_(job_ids), Job.status == JobStatus.PROCESSING)
+            .values(lease_expires_at=lease_expiry(), updated_at=Job.updated_at)
+            .returning(Job.job_id)
+        ).scalars())
+    
+    lease_renewals.labels(result='renewed').inc(len(renewed))
+    lease_renewals.labels(result='lost').inc(len(job_ids) - len(renewed))
+    return {str(job_id) for job_id in renewed}
+
+
+def _run_heartbeat():
+    while True:
+        time.sleep(config.leases.renew_seconds)
+        with _held_lock:
+            job_ids = list(_held)
+        if not job_ids:
+            continue
+        try:
+            lost = set(job_ids) - renew_leases(job_ids)
+            if lost:
+                logger.warning("Job leases lost", job_ids=sorted(lost))
+        except Exception as e:
+            lease_renewals.labels(result='error').inc(len(job_ids))
+            logger.error("Job lease renewal failed", jobs=len(job_ids), error=str(e))
+
+
+def _ensure_heartbeat():
+    global _heartbeat
+    
+    with _held_lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_run_heartbeat, name="lease-heartbeat", daemon=True)
+            _heartbeat.start()
+
+
+def acquire_lease(job_id: str):
+    """
+    Start renewing a job's lease in this process
+    
+    One heartbeat thread per process renews every held lease in a single
+    statement each JOB_LEASE_RENEW_SECONDS, so long handlers keep their job
+    and a dead process stops renewing.
+    
+    Args:
+        job_id: PROCESSING job whose lease was taken with lease_expiry()
+    """
+    _ensure_heartbeat()
+    with _held_lock:
+        _held[job_id] = _held.get(job_id, 0) + 1
+        leases_held.set(len(_held))
+
+
+def release_lease(job_id: str):
+    """Stop renewing a job's lease (the job is finished or handed back)"""
+    with _held_lock:
+        if job_id not in _held:
+            return
+        _held[job_id] -= 1
+        if not _held[job_id]:
+            del _held[job_id]
+        leases_held.set(len(_held))
+
+
+@contextmanager
+def hold_lease(job_id: str):
+    """Keep a job's lease alive while the block runs (see acquire_lease)"""
+    acquire_lease(job_id)
+    try:
+        yield
+    finally:
+        release_lease(job_id)
+
+
+def _reaped_status(row) -> JobStatus:
+    # Bulk-ingested rows may carry NULL counters (the model defaults are 0 and 3)
+    max_retries = row.max_retries if row.max_retries is not None else 3
+    if (row.retry_count or 0) + 1 >= max_retries:
+        return JobStatus.DEAD_LETTER
+    if row.source in REDELIVERED_SOURCES:
+        return JobStatus.FAILED
+    return JobStatus.PENDING
+
+
+def reap_expired_leases(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Recover one batch of PROCESSING jobs whose lease ran out
+    
+    Jobs go back to PENDING while they have retries left, unless their
+    broker redelivers the message (then FAILED), and to DEAD_LETTER once
+    retries are exhausted. Each recovery is logged as a job.lease_expired
+    event; cache updates go through the outbox in the same transaction.
+    
+    Args:
+        batch_size: Jobs per transaction (defaults to LEASE_REAPER_BATCH_SIZE)
+    
+    Returns:
+        Dict mapping the new status to the number of jobs moved there
+    """
+    batch_size = batch_size or config.leases.reaper_batch_size
+    
+    with get_engine().begin() as conn:
+        rows = conn.execute(CLAIM_EXPIRED_SQL, {'batch_size': batch_size}).all()
+        if not rows:
+            return {}
+        
+        by_status = defaultdict(list)
+        for row in rows:
+            by_status[_reaped_status(row)].append(row)
+        
+        snapshots = []
+        for status, group in by_status.items():
+            values = {
+                'status': status,
+                'lease_expires_at': None,
+                'retry_count': func.coalesce(Job.retry_count, 0) + 1,
+                'error_message': LEASE_EXPIRED_MESSAGE,
+            }
+            if status == JobStatus.PENDING:
+                values['started_at'] = None
+            result = conn.execute(
+                update(Job).where(Job.id.in_([row.id for row in group])).values(**values)
+                .returning(*Job.__table__.columns)
+            )
+            snapshots.extend(encode_job(job) for job in result)
+        
+        conn.execute(insert(EventLog.__table__), [
+            {
+                'event_id': new_id(),
+                'event_type': 'job.lease_expired',
+                'job_id': row.job_id,
+                'data': {
+                    'status': status.value,
+                    'lease_expires_at': row.lease_expires_at.isoformat(),
+                    'retry_count': (row.retry_count or 0) + 1,
+                },
+                'correlation_id': row.correlation_id,
+            }
+            for status, group in by_status.items() for row in group
+        ])
+        
+        enqueue_many(conn, TOPIC_JOB_SNAPSHOT, snapshots)
+        enqueue_many(conn, TOPIC_JOB_LISTS, [{'job_ids': [snapshot['job_id'] for snapshot in snapshots]}])
+    
+    notify_relay()
+    
+    counts = {}
+    for status, group in by_status.items():
+        jobs_reaped.labels(status=status.value).inc(len(group))
+        counts[status.value] = len(group)
+    logger.warning("Recovered jobs with expired leases", **counts)
+    return counts
+
+
+def run_reaper(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> Dict[str, int]:
+    """
+    Reap expired leases batch by batch until none are left
+    
+    Args:
+        batch_size: Jobs per transaction (defaults to LEASE_REAPER_BATCH_SIZE)
+        max_batches: Stop after this many batches (default: until drained)
+    
+    Returns:
+        Totals per new status
+    """
+    batch_size = batch_size or config.leases.reaper_batch_size
+    totals: Dict[str, int] = defaultdict(int)
+    batches = 0
+    
+    while max_batches is None or batches < max_batches:
+        counts = reap_expired_leases(batch_size)
+        batches += 1
+        for status, count in counts.items():
+            totals[status] += count
+        if sum(counts.values()) < batch_size:
+            break
+    
+    return dict(totals)
+
+
+def count_expired_leases() -> int:
+    """PROCESSING jobs whose lease has run out"""
+    with get_engine().connect() as conn:
+        return conn.execute(COUNT_EXPIRED_SQL).scalar()
+
+
+def _run():
+    while not _stop.wait(config.leases.reaper_interval_seconds):
+        try:
+            run_reaper()
+        except Exception as e:
+            logger.error("Lease reaper failed", error=str(e), error_type=type(e).__name__)
+
+
+def start_lease_reaper():
+    """Run the reaper in a daemon thread once per process (no-op unless LEASE_REAPER_ENABLED)"""
+    global _thread
+    
+    if not config.leases.reaper_enabled:
+        return
+    
+    with _thread_lock:
+        if _thread is not None:
+            return
+        _stop.clear()
+        _thread = threading.Thread(target=_run, name="lease-reaper", daemon=True)
+        _thread.start()
+
+
+def stop_lease_reaper(timeout: float = 5.0):
+    """Stop the reaper thread after its current batch"""
+    global _thread
+    
+    with _thread_lock:
+        thread, _thread = _thread, None
+    if thread is None:
+        return
+    _stop.set()
+    thread.join(timeout)
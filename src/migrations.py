@@ -0,0 +1,269 @@
+"""
+Versioned SQL migrations
+Applies migrations/NNNN_name.sql files in order and records them in schema_migrations
+"""
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import Engine, text
+
+from .database import get_engine
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# Opt-in migrations; recorded as "optional/NNNN" so they never collide with the main sequence
+OPTIONAL_MIGRATIONS_DIR = os.path.join(MIGRATIONS_DIR, 'optional')
+
+# First-line header for migrations that cannot run inside a transaction
+# (CREATE/DROP INDEX CONCURRENTLY); each statement then runs in autocommit
+NO_TRANSACTION_HEADER = "-- migrate:no-transaction"
+
+_FILENAME = re.compile(r"^(\d{4})_([\w-]+)\.sql$")
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(16) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum VARCHAR(64) NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@dataclass
+class Migration:
+    """One migration file"""
+    version: str
+    name: str
+    path: str
+    sql: str
+    
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+    
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION_HEADER)
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Split a SQL script into statements
+    
+    pg8000 prepares each execute() as a single statement, so scripts are
+    split on semicolons outside quotes, comments and dollar-quoted bodies.
+    
+    Args:
+        sql: SQL script
+        
+    Returns:
+        List of statements without trailing semicolons
+    """
+    statements = []
+    current = []
+    i = 0
+    length = len(sql)
+    
+    while i < length:
+        char = sql[i]
+        
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end == -1 else end + 1
+            current.append("\n")
+            continue
+        
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+            current.append(" ")
+            continue
+        
+        if char == "'":
+            end = i + 1
+            while end < length:
+                if sql[end] == "'" and sql.startswith("''", end):
+                    end += 2
+                    continue
+                if sql[end] == "'":
+                    break
+                end += 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        
+        if char == "$":
+            tag = re.match(r"\$(?:[A-Za-z_]\w*)?\$", sql[i:])
+            if tag:
+                end = sql.find(tag.group(0), i + len(tag.group(0)))
+                end = length if end == -1 else end + len(tag.group(0))
+                current.append(sql[i:end])
+                i = end
+                continue
+        
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+            i += 1
+            continue
+        
+        current.append(char)
+        i += 1
+    
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """
+    Load migration files sorted by version
+    
+    Args:
+        directory: Directory holding NNNN_name.sql files
+        
+    Returns:
+        Migrations in version order
+    """
+    namespace = "" if os.path.abspath(directory) == MIGRATIONS_DIR else os.path.basename(os.path.abspath(directory)) + "/"
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8") as handle:
+            sql = handle.read()
+        migrations.append(Migration(version=namespace + match.group(1), name=match.group(2), path=path, sql=sql))
+    return migrations
+
+
+def get_applied(engine: Engine) -> dict:
+    """Get applied migration checksums by version"""
+    with engine.begin() as conn:
+        conn.execute(text(SCHEMA_MIGRATIONS_DDL))
+        rows = conn.execute(text("SELECT version, checksum FROM schema_migrations")).all()
+    return {version: checksum for version, checksum in rows}
+
+
+def apply_migration(engine: Engine, migration: Migration):
+    """
+    Apply one migration and record it
+    
+    Transactional migrations are all-or-nothing. No-transaction migrations
+    run statement by statement; they must be idempotent (IF [NOT] EXISTS)
+    so a failed run can simply be retried. A failed CREATE INDEX
+    CONCURRENTLY leaves an INVALID index behind that IF NOT EXISTS will
+    skip: drop it before retrying.
+    """
+    statements = split_statements(migration.sql)
+    record = text(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (:version, :name, :checksum)"
+    )
+    params = {'version': migration.version, 'name': migration.name, 'checksum': migration.checksum}
+    
+    logger.info(
+        "Applying migration",
+        version=migration.version,
+        migration=migration.name,
+        statements=len(statements),
+        transactional=migration.transactional
+    )
+    
+    if migration.transactional:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            conn.execute(record, params)
+    else:
+        with engine.connect() as conn:
+            # pool_pre_ping leaves pg8000 inside an implicit transaction; end it
+            # before switching to autocommit
+            conn.connection.dbapi_connection.rollback()
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            conn.execute(record, params)
+
+
+def baseline(engine: Optional[Engine] = None, directory: str = MIGRATIONS_DIR) -> List[str]:
+    """
+    Record every migration as applied without running it
+    
+    For databases just created from the current models (create_all), which
+    already have the schema the migrations would produce.
+    
+    Returns:
+        Versions recorded
+    """
+    engine = engine or get_engine()
+    applied = get_applied(engine)
+    recorded = []
+    
+    with engine.begin() as conn:
+        for migration in load_migrations(directory):
+            if migration.version in applied:
+                continue
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, checksum) VALUES (:version, :name, :checksum)"),
+                {'version': migration.version, 'name': migration.name, 'checksum': migration.checksum}
+            )
+            recorded.append(migration.version)
+    
+    logger.info("Baselined migrations", versions=recorded)
+    return recorded
+
+
+def migrate(
+    engine: Optional[Engine] = None,
+    directory: str = MIGRATIONS_DIR,
+    target: Optional[str] = None,
+    dry_run: bool = False
+) -> List[str]:
+    """
+    Apply pending migrations in order
+    
+    Args:
+        engine: Engine to migrate (defaults to the primary)
+        directory: Migrations directory
+        target: Stop after this version
+        dry_run: Only report pending migrations
+        
+    Returns:
+        Versions applied (or pending, for a dry run)
+        
+    Raises:
+        RuntimeError: If an applied migration's file has changed
+    """
+    engine = engine or get_engine()
+    applied = get_applied(engine)
+    done = []
+    
+    for migration in load_migrations(directory):
+        if target and migration.version > target:
+            break
+        
+        checksum = applied.get(migration.version)
+        if checksum is not None:
+            if checksum != migration.checksum:
+                raise RuntimeError(
+                    f"Migration {migration.version}_{migration.name} changed after it was applied"
+                )
+            continue
+        
+        if not dry_run:
+            apply_migration(engine, migration)
+        done.append(migration.version)
+    
+    logger.info("Migrations complete" if not dry_run else "Pending migrations", versions=done)
+    return done
@@ -2,13 +2,22 @@
 Database models for CUIDA+Care Worker
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Enum as SQLEnum
+from sqlalchemy import (
+    Column, Integer, BigInteger, SmallInteger, Float, String, DateTime, Text, JSON, LargeBinary, Index,
+    UniqueConstraint, Uuid, DDL, Enum as SQLEnum, event, text
+)
 from sqlalchemy.sql import func
 import enum
 
+from .config import config
 from .database import Base
 
 
+def id_type():
+    """Column type for job_id/event_id: VARCHAR, or native uuid once migrated (DB_NATIVE_UUID_IDS)"""
+    return Uuid(as_uuid=False) if config.database.native_uuid_ids else String(255)
+
+
 class JobStatus(str, enum.Enum):
     """Job execution status"""
     PENDING = "pending"
@@ -23,13 +32,15 @@ class Job(Base):
     """Job execution tracking"""
     __tablename__ = "jobs"
     
-    id = Column(Integer, primary_key=True, index=True)
-    job_id = Column(String(255), unique=True, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    job_id = Column(id_type(), unique=True, index=True, nullable=False)
     message_id = Column(String(255), index=True)
     
-    status = Column(SQLEnum(JobStatus), default=JobStatus.PENDING, index=True)
+    status = Column(SQLEnum(JobStatus), default=JobStatus.PENDING)
+    priority = Column(SmallInteger, nullable=False, default=0, server_default=text('0'))  # lane, see src/lanes.py
     
-    payload = Column(JSON, nullable=True)
+    payload = Column(JSON, nullable=True)  # inline body of rows written before the payload store
+    payload_hash = Column(String(64), nullable=True)  # payloads.hash
     result = Column(JSON, nullable=True)
     error_message = Column(Text, nullable=True)
     
@@ -40,40 +51,186 @@ class Job(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # PROCESSING only, renewed by the worker
     
     # Metadata
     source = Column(String(100), nullable=True)  # pubsub, api, scheduled, etc.
     correlation_id = Column(String(255), index=True, nullable=True)
     
+    # Fetch server-generated timestamps via RETURNING so snapshots need no extra SELECT
+    __mapper_args__ = {"eager_defaults": True}
+    
+    # Kept in sync with migrations/0001_query_index_pack.sql
+    __table_args__ = (
+        Index('ix_jobs_status_created_at_id', status, created_at.desc(), id),
+        Index(
+            'ix_jobs_completed_duration', completed_at, started_at,
+            postgresql_where=text("status = 'COMPLETED'")
+        ),
+        Index(
+            'ix_jobs_terminal_updated_at', updated_at,
+            postgresql_where=text("status IN ('COMPLETED', 'FAILED', 'DEAD_LETTER')")
+        ),
+        # Kept in sync with migrations/0010_change_feed_opt_in.sql
+        Index(
+            'ix_jobs_active_updated_at', updated_at,
+            postgresql_where=text("status NOT IN ('COMPLETED', 'FAILED', 'DEAD_LETTER')")
+        ),
+        # Kept in sync with migrations/0007_job_leases.sql
+        Index(
+            'ix_jobs_processing_lease', lease_expires_at, id,
+            postgresql_where=text("status = 'PROCESSING'")
+        ),
+        # Kept in sync with migrations/0009_job_priority.sql
+        Index(
+            'ix_jobs_pending_priority_id', priority.desc(), id,
+            postgresql_where=text("status = 'PENDING'")
+        ),
+    )
+    
     def __repr__(self):
         return f"<Job(id={self.id}, job_id={self.job_id}, status={self.status})>"
 
 
+class JobArchive(Base):
+    """Terminal jobs moved out of the hot jobs table (see src/archival.py)"""
+    __tablename__ = "jobs_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    job_id = Column(id_type(), unique=True, index=True, nullable=False)
+    message_id = Column(String(255))
+    
+    status = Column(SQLEnum(JobStatus))
+    priority = Column(SmallInteger, nullable=False, default=0, server_default=text('0'))
+    
+    payload = Column(JSON, nullable=True)
+    payload_hash = Column(String(64), nullable=True)
+    result = Column(JSON, nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    retry_count = Column(Integer, default=0)
+    max_retries = Column(Integer, default=3)
+    
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
+    source = Column(String(100), nullable=True)
+    correlation_id = Column(String(255), nullable=True)
+    
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<JobArchive(id={self.id}, job_id={self.job_id}, status={self.status})>"
+
+
+class JobArchiveStats(Base):
+    """Running aggregates of archived jobs per status (keeps job stats complete)"""
+    __tablename__ = "jobs_archive_stats"
+    
+    status = Column(String(50), primary_key=True)  # JobStatus member name
+    job_count = Column(BigInteger, nullable=False, default=0)
+    duration_count = Column(BigInteger, nullable=False, default=0)
+    duration_seconds_total = Column(Float, nullable=False, default=0)
+    retries_total = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<JobArchiveStats(status={self.status}, job_count={self.job_count})>"
+
+
+class Payload(Base):
+    """Content-addressed message bodies referenced by jobs and events (see src/payloads.py)"""
+    __tablename__ = "payloads"
+    
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the canonical JSON
+    encoding = Column(String(16), nullable=False)  # json or zlib
+    size_bytes = Column(Integer, nullable=False)  # canonical JSON length before compression
+    body = Column(LargeBinary, nullable=True)  # NULL when the body lives in PAYLOAD_BLOB_DIR
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<Payload(hash={self.hash}, encoding={self.encoding}, size_bytes={self.size_bytes})>"
+
+
+# Compressed bodies gain nothing from TOAST compression (kept in sync with migrations/0004)
+event.listen(
+    Payload.__table__, 'after_create',
+    DDL("ALTER TABLE payloads ALTER COLUMN body SET STORAGE EXTERNAL")
+)
+
+
 class EventLog(Base):
-    """Event audit log"""
+    """Event audit log (range-partitioned by timestamp, see src/partitions.py)"""
     __tablename__ = "event_logs"
     
-    id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(String(255), unique=True, index=True, nullable=False)
+    # Unique constraints on a partitioned table must include the partition key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(id_type(), nullable=False)
     
     event_type = Column(String(100), index=True, nullable=False)  # message.received, job.started, etc.
-    job_id = Column(String(255), index=True, nullable=True)
+    job_id = Column(id_type(), nullable=True)
     
     data = Column(JSON, nullable=True)
     event_metadata = Column(JSON, nullable=True)  # Renamed from 'metadata' to avoid SQLAlchemy conflict
     
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     correlation_id = Column(String(255), index=True, nullable=True)
     
+    __table_args__ = (
+        UniqueConstraint('event_id', 'timestamp', name='uq_event_logs_event_id_timestamp'),
+        Index('ix_event_logs_job_id_timestamp', job_id, timestamp),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
+    
     def __repr__(self):
         return f"<EventLog(id={self.id}, event_type={self.event_type}, timestamp={self.timestamp})>"
 
 
+# Inserts never fail for lack of a range partition (kept in sync with migrations/0002)
+event.listen(
+    EventLog.__table__, 'after_create',
+    DDL("CREATE TABLE IF NOT EXISTS event_logs_default PARTITION OF event_logs DEFAULT")
+)
+
+
+class OutboxMessage(Base):
+    """Side effect recorded with a job change, delivered after commit (see src/outbox.py)"""
+    __tablename__ = "outbox"
+    
+    id = Column(BigInteger, primary_key=True)
+    topic = Column(String(100), nullable=False)  # job.snapshot, job.lists_changed, job.metrics
+    payload = Column(JSON, nullable=False)
+    
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index('ix_outbox_available_at_id', available_at, id),
+    )
+    
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, topic={self.topic}, attempts={self.attempts})>"
+
+
+# High churn: vacuum well before the default 20% of dead rows (kept in sync with migrations/0006)
+event.listen(
+    OutboxMessage.__table__, 'after_create',
+    DDL("ALTER TABLE outbox SET (autovacuum_vacuum_scale_factor = 0.01, autovacuum_vacuum_threshold = 1000)")
+)
+
+
 class SystemMetric(Base):
     """System metrics for monitoring"""
     __tablename__ = "system_metrics"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     
     metric_name = Column(String(100), index=True, nullable=False)
     metric_value = Column(JSON, nullable=False)  # Can store int, float, dict, etc.
@@ -0,0 +1,339 @@
+"""
+Transactional outbox for CUIDA+Care
+Side effects of a job change (cache write-through, list invalidation,
+Cloud Monitoring exports) are written to the outbox table in the same
+transaction as the change; a relay delivers them after commit, in batches
+and at least once
+"""
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .cache import cache_jobs, invalidate_job_lists
+from .config import config
+from .database import get_engine
+from .logging_config import get_logger
+from .models import OutboxMessage
+
+logger = get_logger(__name__)
+
+# Topics written by the worker
+TOPIC_JOB_SNAPSHOT = "job.snapshot"
+TOPIC_JOB_LISTS = "job.lists_changed"
+TOPIC_JOB_METRICS = "job.metrics"
+
+# Prometheus metrics
+outbox_delivered = Counter('outbox_delivered_total', 'Outbox messages processed', ['topic', 'outcome'])
+outbox_backlog = Gauge('outbox_backlog', 'Outbox messages waiting for delivery')
+outbox_oldest_age = Gauge('outbox_oldest_age_seconds', 'Age of the oldest undelivered outbox message')
+outbox_delivery_lag = Histogram(
+    'outbox_delivery_lag_seconds', 'Enqueue-to-delivery delay of outbox messages', ['topic'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+# Claim a batch; SKIP LOCKED lets several relays drain the table side by side
+CLAIM_SQL = text("""
+    SELECT id, topic, payload, attempts, extract(epoch FROM created_at) AS created
+    FROM outbox
+    WHERE available_at <= now()
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+""")
+
+# Hide a group delivered after commit from other relays until it is settled
+HOLD_SQL = text("""
+    UPDATE outbox
+    SET available_at = now() + make_interval(secs => :seconds)
+    WHERE id = ANY(:ids)
+""")
+
+RETRY_SQL = text("""
+    UPDATE outbox
+    SET attempts = attempts + 1,
+        available_at = now() + make_interval(secs => :delay),
+        last_error = :error
+    WHERE id = ANY(:ids)
+""")
+
+BACKLOG_SQL = text("SELECT count(*), extract(epoch FROM now() - min(created_at)) FROM outbox")
+
+# topic -> handler receiving the payloads of one batch, in commit order
+_handlers: Dict[str, Callable[[List[Dict[str, Any]]], None]] = {}
+# Topics delivered outside the claim transaction
+_after_commit: Set[str] = set()
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+def register_handler(
+    topic: str,
+    handler: Callable[[List[Dict[str, Any]]], None],
+    after_commit: bool = False
+):
+    """
+    Register the delivery function for a topic
+    
+    Handlers get every payload of the topic in a batch and raise to have
+    the whole group retried; they must tolerate redelivery.
+    
+    Args:
+        topic: Outbox topic
+        handler: Callable taking a list of payloads
+        after_commit: Deliver after the claim transaction is released (slow
+            network calls); the group stays hidden from other relays for
+            OUTBOX_CLAIM_SECONDS meanwhile
+    """
+    _handlers[topic] = handler
+    if after_commit:
+        _after_commit.add(topic)
+    else:
+        _after_commit.discard(topic)
+
+
+def enqueue(session: Session, topic: str, payload: Dict[str, Any]):
+    """
+    Add a message to the outbox inside the caller's transaction
+    
+    Args:
+        session: Session whose commit publishes the message
+        topic: Outbox topic
+        payload: JSON-serializable payload
+    """
+    session.add(OutboxMessage(topic=topic, payload=payload))
+
+
+def enqueue_many(db: Union[Session, Connection], topic: str, payloads: Iterable[Dict[str, Any]]):
+    """
+    Add several messages of one topic inside the caller's transaction
+    
+    Args:
+        db: Session or connection whose commit publishes the messages
+        topic: Outbox topic
+        payloads: JSON-serializable payloads
+    """
+    rows = [{'topic': topic, 'payload': payload} for payload in payloads]
+    if rows:
+        # RETURNING makes SQLAlchemy batch the rows into multi-row INSERTs
+        # ("insertmanyvalues"); without it pg8000 sends one INSERT per row
+        db.execute(insert(OutboxMessage.__table__).returning(OutboxMessage.__table__.c.id), rows)
+
+
+def notify_relay():
+    """Wake this process's relay after a commit (no I/O)"""
+    _wakeup.set()
+
+
+# Built-in handlers
+def _deliver_snapshots(payloads: List[Dict[str, Any]]):
+    # Several changes to one job in a batch: the last committed snapshot wins
+    latest = {snapshot['job_id']: snapshot for snapshot in payloads}
+    if not cache_jobs(list(latest.values())):
+        raise RuntimeError("cache unavailable")
+
+
+def _deliver_list_invalidation(payloads: List[Dict[str, Any]]):
+    invalidate_job_lists()
+
+
+def _deliver_job_metrics(payloads: List[Dict[str, Any]]):
+    root = os.path.join(os.path.dirname(__file__), '..')
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    from monitoring import get_monitoring_exporter
+    
+    # One point per series per batch: Cloud Monitoring rejects points on a
+    # series written closer together than its sampling period
+    durations = defaultdict(list)
+    for payload in payloads:
+        durations[payload['status']].append(payload['duration_seconds'] * 1000)
+    points = [
+        ("job_processing_latency", sum(values) / len(values), {"status": status})
+        for status, values in durations.items()
+    ]
+    points.append(("active_jobs", int(payloads[-1]['active_jobs']), None))
+    get_monitoring_exporter().write_points(points)
+
+
+register_handler(TOPIC_JOB_SNAPSHOT, _deliver_snapshots)
+register_handler(TOPIC_JOB_LISTS, _deliver_list_invalidation)
+register_handler(TOPIC_JOB_METRICS, _deliver_job_metrics, after_commit=True)
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(config.outbox.retry_base_seconds * (2 ** attempts), config.outbox.retry_max_seconds)
+
+
+def _deliver(topic: str, group: list) -> Optional[Exception]:
+    """Run a topic's handler on its group of rows; returns the failure, if any"""
+    handler = _handlers.get(topic)
+    try:
+        if handler is None:
+            raise LookupError(f"no handler for topic {topic}")
+        handler([row.payload for row in group])
+    except Exception as e:
+        return e
+    return None
+
+
+def _settle(conn: Connection, topic: str, group: list, error: Optional[Exception], now: float) -> List[int]:
+    """
+    Record a group's delivery result
+    
+    Failed groups are rescheduled with backoff, or dropped after
+    OUTBOX_MAX_ATTEMPTS.
+    
+    Returns:
+        Ids to delete (delivered or dropped)
+    """
+    if error is None:
+        outbox_delivered.labels(topic=topic, outcome='delivered').inc(len(group))
+        for row in group:
+            outbox_delivery_lag.labels(topic=topic).observe(max(now - float(row.created), 0))
+        return [row.id for row in group]
+    
+    attempts = max(row.attempts for row in group) + 1
+    if attempts >= config.outbox.max_attempts:
+        outbox_delivered.labels(topic=topic, outcome='dropped').inc(len(group))
+        logger.error("Outbox delivery abandoned", topic=topic, messages=len(group), error=str(error))
+        return [row.id for row in group]
+    
+    conn.execute(RETRY_SQL, {
+        'ids': [row.id for row in group], 'delay': _retry_delay(attempts), 'error': str(error)[:1000]
+    })
+    outbox_delivered.labels(topic=topic, outcome='retry').inc(len(group))
+    logger.warning("Outbox delivery failed", topic=topic, messages=len(group), attempts=attempts, error=str(error))
+    return []
+
+
+def relay_batch(batch_size: Optional[int] = None) -> int:
+    """
+    Claim and deliver one batch of outbox messages
+    
+    Delivered messages are deleted in the claiming transaction; failed
+    groups are rescheduled with exponential backoff and dropped after
+    OUTBOX_MAX_ATTEMPTS. A relay dying mid-batch rolls back its claim, so
+    the batch is delivered again (at least once). Topics registered with
+    after_commit are held for OUTBOX_CLAIM_SECONDS by the claim, delivered
+    once it has committed (no row locks or pooled connection held during
+    the call) and settled in a second short transaction.
+    
+    Args:
+        batch_size: Messages per batch (defaults to OUTBOX_BATCH_SIZE)
+    
+    Returns:
+        Number of messages claimed
+    """
+    batch_size = batch_size or config.outbox.batch_size
+    deferred = []
+    
+    with get_engine().begin() as conn:
+        rows = conn.execute(CLAIM_SQL, {'batch_size': batch_size}).all()
+        if not rows:
+            return 0
+        
+        by_topic = defaultdict(list)
+        for row in rows:
+            by_topic[row.topic].append(row)
+        
+        settled = []
+        now = time.time()
+        # Registration order: cache updates go out before slower exports
+        order = {topic: n for n, topic in enumerate(_handlers)}
+        for topic, group in sorted(by_topic.items(), key=lambda item: order.get(item[0], len(order))):
+            if topic in _after_commit:
+                conn.execute(HOLD_SQL, {'ids': [row.id for row in group], 'seconds': config.outbox.claim_seconds})
+                deferred.append((topic, group))
+                continue
+            settled.extend(_settle(conn, topic, group, _deliver(topic, group), now))
+        
+        if settled:
+            conn.execute(text("DELETE FROM outbox WHERE id = ANY(:ids)"), {'ids': settled})
+    
+    if deferred:
+        results = [(topic, group, _deliver(topic, group)) for topic, group in deferred]
+        now = time.time()
+        with get_engine().begin() as conn:
+            settled = []
+            for topic, group, error in results:
+                settled.extend(_settle(conn, topic, group, error, now))
+            if settled:
+                conn.execute(text("DELETE FROM outbox WHERE id = ANY(:ids)"), {'ids': settled})
+    
+    return len(rows)
+
+
+def update_backlog_metrics() -> Dict[str, Any]:
+    """Refresh the backlog gauges; returns the backlog size and oldest message age"""
+    with get_engine().connect() as conn:
+        count, oldest = conn.execute(BACKLOG_SQL).one()
+    outbox_backlog.set(count)
+    outbox_oldest_age.set(float(oldest or 0))
+    return {'backlog': count, 'oldest_age_seconds': float(oldest or 0)}
+
+
+def run_relay(stop: Optional[threading.Event] = None):
+    """
+    Drain the outbox until stopped: full batches back to back, then wait for
+    a wakeup (a commit in this process) or OUTBOX_POLL_SECONDS
+    
+    Args:
+        stop: Event ending the loop (defaults to the module's stop event)
+    """
+    stop = stop or _stop
+    last_backlog_check = 0.0
+    
+    while not stop.is_set():
+        try:
+            claimed = relay_batch()
+            if time.monotonic() - last_backlog_check >= config.outbox.backlog_interval_seconds:
+                update_backlog_metrics()
+                last_backlog_check = time.monotonic()
+        except Exception as e:
+            logger.error("Outbox relay failed", error=str(e), error_type=type(e).__name__)
+            claimed = 0
+            stop.wait(config.outbox.poll_seconds)
+        
+        if claimed < config.outbox.batch_size:
+            _wakeup.wait(config.outbox.poll_seconds)
+            _wakeup.clear()
+
+
+def start_outbox_relay():
+    """Run the relay in a daemon thread once per process (no-op unless OUTBOX_RELAY_ENABLED)"""
+    global _thread
+    
+    if not config.outbox.relay_enabled:
+        return
+    
+    with _thread_lock:
+        if _thread is not None:
+            return
+        _stop.clear()
+        _thread = threading.Thread(target=run_relay, name="outbox-relay", daemon=True)
+        _thread.start()
+    logger.info("Outbox relay started", batch_size=config.outbox.batch_size)
+
+
+def stop_outbox_relay(timeout: float = 5.0):
+    """Stop the relay thread after its current batch"""
+    global _thread
+    
+    with _thread_lock:
+        thread, _thread = _thread, None
+    if thread is None:
+        return
+    _stop.set()
+    _wakeup.set()
+    thread.join(timeout)
@@ -0,0 +1,366 @@
+"""
+event_logs partition management
+Pre-creates time-range partitions and applies the retention policy
+(optional gzip CSV archive, detach, drop)
+"""
+import gzip
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .config import config
+from .database import get_engine
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PARENT = "event_logs"
+DEFAULT_PARTITION = "event_logs_default"
+
+# Serializes maintenance across instances (worker startup, cron CLI)
+_ADVISORY_LOCK_KEY = "event_logs_partitions"
+
+# Prometheus metrics
+partition_operations = Counter(
+    'event_partition_operations_total', 'Partition maintenance operations', ['operation']
+)
+partition_count = Gauge('event_partitions', 'Attached event_logs range partitions')
+default_partition_rows = Gauge(
+    'event_partition_default_rows', 'Estimated rows in the event_logs DEFAULT partition'
+)
+
+_BOUND = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+@dataclass
+class Partition:
+    """One attached range partition; None bounds are MINVALUE/MAXVALUE"""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def period_start(moment: datetime, interval: Optional[str] = None) -> datetime:
+    """Start (UTC midnight, Monday for weeks) of the period containing moment"""
+    interval = interval or config.partitions.interval
+    start = moment.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def next_period(start: datetime, interval: Optional[str] = None) -> datetime:
+    """Start of the period after the one starting at start"""
+    interval = interval or config.partitions.interval
+    return start + timedelta(days=7 if interval == "week" else 1)
+
+
+def partition_name(start: datetime) -> str:
+    """Partition name for a lower bound (event_logs_p20260119)"""
+    name = f"{PARENT}_p{start:%Y%m%d}"
+    if start.hour or start.minute:
+        name += f"_{start:%H%M}"
+    return name
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """Whether event_logs is partitioned (older databases are until migration 0002 runs)"""
+    return conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:parent)"), {'parent': PARENT}
+    ).scalar() is True
+
+
+def list_partitions(conn: Connection) -> List[Partition]:
+    """
+    List attached range partitions ordered by lower bound
+    
+    Expects the session time zone to be UTC (bounds are rendered in it).
+    """
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass)"
+    ), {'parent': PARENT}).all()
+    
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound)
+        if match:
+            partitions.append(Partition(name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    
+    minimum = datetime.min.replace(tzinfo=timezone.utc)
+    partitions.sort(key=lambda p: p.lower or minimum)
+    return partitions
+
+
+def _gaps(start: datetime, end: datetime, partitions: List[Partition]) -> List[Tuple[datetime, datetime]]:
+    """Sub-ranges of [start, end) not covered by any partition"""
+    gaps = []
+    cursor = start
+    for partition in partitions:
+        lower = partition.lower
+        upper = partition.upper
+        if (upper is not None and upper <= cursor) or (lower is not None and lower >= end):
+            continue
+        if lower is not None and lower > cursor:
+            gaps.append((cursor, lower))
+        cursor = end if upper is None else max(cursor, upper)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _create_partition(conn: Connection, start: datetime, end: datetime) -> str:
+    """
+    Create the partition for [start, end)
+    
+    Rows that already landed in the DEFAULT partition for this range are
+    moved into the new table before it is attached (attaching would
+    otherwise fail the default partition's constraint check).
+    """
+    name = partition_name(start)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    params = {'start': start, 'end': end}
+    
+    stranded = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end)"
+    ), params).scalar()
+    
+    if not stranded:
+        conn.exec_driver_sql(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES {bounds}")
+    else:
+        conn.exec_driver_sql(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)")
+        moved = conn.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :start AND timestamp < :end "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ), params).rowcount
+        conn.exec_driver_sql(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES {bounds}")
+        logger.warning("Moved rows out of the default partition", partition=name, rows=moved)
+    
+    partition_operations.labels(operation='create').inc()
+    logger.info("Created event_logs partition", partition=name, start=start.isoformat(), end=end.isoformat())
+    return name
+
+
+def _try_lock(conn: Connection) -> bool:
+    return conn.execute(
+        text("SELECT pg_try_advisory_lock(hashtext(:key))"), {'key': _ADVISORY_LOCK_KEY}
+    ).scalar()
+
+
+def _unlock(conn: Connection):
+    conn.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {'key': _ADVISORY_LOCK_KEY})
+    conn.commit()
+
+
+def _ensure_range(conn: Connection, start: datetime, end: datetime) -> List[str]:
+    """Create missing partitions covering [start, end) inside the caller's transaction"""
+    conn.exec_driver_sql("SET LOCAL TIME ZONE 'UTC'")
+    conn.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT")
+    
+    created = []
+    partitions = list_partitions(conn)
+    period = period_start(start)
+    while period < end:
+        following = next_period(period)
+        for gap_start, gap_end in _gaps(period, following, partitions):
+            created.append(_create_partition(conn, gap_start, gap_end))
+        period = following
+    return created
+
+
+def ensure_partitions(conn: Connection, now: Optional[datetime] = None) -> List[str]:
+    """
+    Create missing partitions for the current period and the next
+    EVENT_PARTITION_PREMAKE periods, plus the DEFAULT partition
+    
+    Args:
+        conn: Connection holding the maintenance lock (no open transaction)
+        now: Reference time (defaults to the current UTC time)
+        
+    Returns:
+        Names of the partitions created
+    """
+    now = now or datetime.now(timezone.utc)
+    start = period_start(now)
+    end = start
+    for _ in range(config.partitions.premake + 1):
+        end = next_period(end)
+    
+    with conn.begin():
+        created = _ensure_range(conn, start, end)
+        
+        partition_count.set(len(list_partitions(conn)))
+        default_partition_rows.set(max(conn.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+            {'name': DEFAULT_PARTITION}
+        ).scalar() or 0, 0))
+    
+    return created
+
+
+def ensure_partitions_for_range(start: datetime, end: datetime) -> List[str]:
+    """
+    Create the partitions covering [start, end], e.g. before loading
+    historical events; waits for running maintenance to finish
+    
+    Args:
+        start: Earliest timestamp to cover
+        end: Latest timestamp to cover
+        
+    Returns:
+        Names of the partitions created
+    """
+    with get_engine().begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {'key': _ADVISORY_LOCK_KEY})
+        return _ensure_range(conn, start, end + timedelta(microseconds=1))
+
+
+def expired_partitions(conn: Connection, now: Optional[datetime] = None) -> List[Partition]:
+    """Partitions whose upper bound is older than EVENT_RETENTION_DAYS"""
+    if config.partitions.retention_days <= 0:
+        return []
+    
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=config.partitions.retention_days)
+    
+    with conn.begin():
+        conn.exec_driver_sql("SET LOCAL TIME ZONE 'UTC'")
+        partitions = list_partitions(conn)
+    
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+def detached_partitions(conn: Connection) -> List[str]:
+    """Partition tables (event_logs_p*) that are no longer attached to event_logs"""
+    with conn.begin():
+        return list(conn.execute(text(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition AND relname LIKE :pattern AND pg_table_is_visible(oid) "
+            "ORDER BY relname"
+        ), {'pattern': f"{PARENT}\\_p%"}).scalars())
+
+
+def archive_partition(conn: Connection, name: str, directory: str) -> str:
+    """
+    Copy a partition to a gzip-compressed CSV file
+    
+    Args:
+        conn: Connection to copy through
+        name: Table name
+        directory: Target directory
+    
+    Returns:
+        Path of the archive
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.csv.gz")
+    partial = path + ".partial"
+    
+    cursor = conn.connection.dbapi_connection.cursor()
+    with gzip.open(partial, "wb") as archive:
+        cursor.execute(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", stream=archive)
+    os.replace(partial, path)
+    
+    partition_operations.labels(operation='archive').inc()
+    logger.info("Archived event_logs partition", partition=name, path=path, bytes=os.path.getsize(path))
+    return path
+
+
+def _retire(conn: Connection, name: str, attached: bool):
+    """Archive a partition (when EVENT_ARCHIVE_DIR is set), then detach and drop it in one transaction"""
+    if config.partitions.archive_dir:
+        with conn.begin():
+            archive_partition(conn, name, config.partitions.archive_dir)
+    
+    drop = config.partitions.retention_action == "drop"
+    with conn.begin():
+        if attached:
+            conn.exec_driver_sql(f"ALTER TABLE {PARENT} DETACH PARTITION {name}")
+        if drop:
+            conn.exec_driver_sql(f"DROP TABLE {name}")
+    
+    if attached:
+        partition_operations.labels(operation='detach').inc()
+        logger.info("Detached event_logs partition", partition=name)
+    if drop:
+        partition_operations.labels(operation='drop').inc()
+        logger.info("Dropped event_logs partition", partition=name)
+
+
+def apply_retention(conn: Connection, now: Optional[datetime] = None) -> List[str]:
+    """
+    Archive expired partitions when EVENT_ARCHIVE_DIR is set, then detach
+    them and drop them unless EVENT_RETENTION_ACTION=detach
+    
+    Archiving reads the still-attached partition (its range is closed), and
+    detach and drop share one transaction, so a failure leaves the partition
+    attached and the next run retries it. With EVENT_RETENTION_ACTION=drop,
+    tables a failed earlier run left detached are archived and dropped too.
+    
+    Args:
+        conn: Connection holding the maintenance lock (no open transaction)
+        now: Reference time (defaults to the current UTC time)
+    
+    Returns:
+        Names of the partitions removed from event_logs
+    """
+    removed = []
+    
+    if config.partitions.retention_action == "drop":
+        for name in detached_partitions(conn):
+            logger.warning("Finishing event_logs partition left detached", partition=name)
+            _retire(conn, name, attached=False)
+            removed.append(name)
+    
+    for partition in expired_partitions(conn, now):
+        _retire(conn, partition.name, attached=True)
+        removed.append(partition.name)
+    
+    return removed
+
+
+def run_maintenance(retention: bool = True, now: Optional[datetime] = None) -> dict:
+    """
+    Ensure partitions and apply retention under a cluster-wide advisory lock
+    
+    Skips (returns locked=False) when another process is already running it.
+    
+    Args:
+        retention: Also apply the retention policy
+        now: Reference time (defaults to the current UTC time)
+    
+    Returns:
+        Dict with the partitions created and removed
+    """
+    engine = get_engine()
+    
+    with engine.connect() as conn:
+        locked = _try_lock(conn)
+        conn.commit()
+        if not locked:
+            logger.info("Partition maintenance already running elsewhere")
+            return {'locked': False, 'created': [], 'removed': []}
+        
+        try:
+            created = ensure_partitions(conn, now)
+            removed = apply_retention(conn, now) if retention else []
+        finally:
+            _unlock(conn)
+    
+    logger.info("Partition maintenance complete", created=created, removed=removed)
+    return {'locked': True, 'created': created, 'removed': removed}
@@ -0,0 +1,333 @@
+"""
+Content-addressed payload store
+Message bodies are stored once in the payloads table, keyed by the SHA-256
+of their canonical JSON; jobs and events reference them by hash. Bodies
+above PAYLOAD_COMPRESS_THRESHOLD are zlib-compressed, and bodies above
+PAYLOAD_BLOB_THRESHOLD are written to PAYLOAD_BLOB_DIR when it is set.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from prometheus_client import Counter
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .config import config
+from .database import get_engine
+from .logging_config import get_logger
+from .models import Payload
+
+logger = get_logger(__name__)
+
+ENCODING_JSON = 'json'
+ENCODING_ZLIB = 'zlib'
+
+# Rows per INSERT statement (4 bind parameters each, below the protocol's 65535 limit)
+INSERT_BATCH_ROWS = 1000
+
+# Prometheus metrics
+payloads_stored = Counter('payloads_stored_total', 'Payload writes by outcome', ['outcome'])  # new, duplicate
+payload_bytes = Counter('payload_bytes_total', 'Bytes of newly stored payloads', ['kind'])  # raw, stored
+payload_cache_requests = Counter('payload_cache_requests_total', 'In-process payload cache lookups', ['result'])
+
+# Resolved bodies by hash; content-addressed entries never go stale
+_body_cache: 'OrderedDict[str, bytes]' = OrderedDict()
+_body_cache_lock = threading.Lock()
+
+
+@dataclass
+class EncodedPayload:
+    """A payload ready to store: body is None when it goes to the blob directory"""
+    hash: str
+    encoding: str
+    size_bytes: int
+    body: Optional[bytes]
+    blob: Optional[bytes] = None
+
+
+def canonical_body(payload: Any) -> bytes:
+    """Canonical JSON encoding (sorted keys, no whitespace) the hash is taken over"""
+    return json.dumps(
+        payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str
+    ).encode('utf-8')
+
+
+def payload_hash(payload: Any) -> str:
+    """SHA-256 (hex) of a payload's canonical JSON"""
+    return hashlib.sha256(canonical_body(payload)).hexdigest()
+
+
+def encode_payload(payload: Any) -> EncodedPayload:
+    """
+    Hash and encode a payload according to the size thresholds
+    
+    Args:
+        payload: JSON-serializable value
+    
+    Returns:
+        EncodedPayload for store_payloads
+    """
+    raw = canonical_body(payload)
+    digest = hashlib.sha256(raw).hexdigest()
+    settings = config.payloads
+    
+    encoding, stored = ENCODING_JSON, raw
+    if len(raw) > settings.compress_threshold:
+        compressed = zlib.compress(raw, settings.compress_level)
+        if len(compressed) < len(raw):
+            encoding, stored = ENCODING_ZLIB, compressed
+    
+    if settings.blob_dir and len(raw) > settings.blob_threshold:
+        return EncodedPayload(digest, encoding, len(raw), None, blob=stored)
+    return EncodedPayload(digest, encoding, len(raw), stored)
+
+
+def _blob_path(digest: str) -> str:
+    if not config.payloads.blob_dir:
+        raise RuntimeError(f"Payload {digest} is stored as a blob but PAYLOAD_BLOB_DIR is not set")
+    return os.path.join(config.payloads.blob_dir, digest[:2], digest[2:4], digest)
+
+
+def _write_blob(digest: str, data: bytes):
+    """Write a blob atomically; an existing file already holds the same content"""
+    path = _blob_path(digest)
+    if os.path.exists(path):
+        return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=directory, prefix='.partial-')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(partial, path)
+    except Exception:
+        os.unlink(partial)
+        raise
+
+
+def store_payloads(db: Union[Session, Connection], payloads: Iterable[Any]) -> List[str]:
+    """
+    Store payloads (deduplicated by hash) inside the caller's transaction
+    
+    Blobs are written before the rows; a rolled-back transaction can leave
+    an unreferenced blob behind, never a row without its blob.
+    
+    Args:
+        db: Session or connection whose transaction the rows join
+        payloads: JSON-serializable values
+    
+    Returns:
+        Hash of each payload, in input order
+    """
+    encoded = [encode_payload(payload) for payload in payloads]
+    unique = {item.hash: item for item in encoded}
+    if not unique:
+        return []
+    
+    for item in unique.values():
+        if item.blob is not None:
+            _write_blob(item.hash, item.blob)
+    
+    created = set()
+    items = list(unique.values())
+    for start in range(0, len(items), INSERT_BATCH_ROWS):
+        statement = insert(Payload).values([
+            {'hash': item.hash, 'encoding': item.encoding, 'size_bytes': item.size_bytes, 'body': item.body}
+            for item in items[start:start + INSERT_BATCH_ROWS]
+        ]).on_conflict_do_nothing(index_elements=['hash']).returning(Payload.hash)
+        created.update(db.execute(statement).scalars())
+    
+    payloads_stored.labels(outcome='new').inc(len(created))
+    payloads_stored.labels(outcome='duplicate').inc(len(unique) - len(created))
+    for digest in created:
+        item = unique[digest]
+        payload_bytes.labels(kind='raw').inc(item.size_bytes)
+        payload_bytes.labels(kind='stored').inc(len(item.body if item.body is not None else item.blob))
+    
+    return [item.hash for item in encoded]
+
+
+def store_payload(db: Union[Session, Connection], payload: Any) -> str:
+    """Store one payload; see store_payloads"""
+    return store_payloads(db, [payload])[0]
+
+
+def _cache_get(digest: str) -> Optional[bytes]:
+    with _body_cache_lock:
+        body = _body_cache.get(digest)
+        if body is not None:
+            _body_cache.move_to_end(digest)
+    payload_cache_requests.labels(result='hit' if body is not None else 'miss').inc()
+    return body
+
+
+def _cache_put(digest: str, body: bytes):
+    if config.payloads.cache_size <= 0:
+        return
+    with _body_cache_lock:
+        _body_cache[digest] = body
+        _body_cache.move_to_end(digest)
+        while len(_body_cache) > config.payloads.cache_size:
+            _body_cache.popitem(last=False)
+
+
+def _decode_body(digest: str, encoding: str, body: Optional[bytes]) -> bytes:
+    if body is None:
+        with open(_blob_path(digest), 'rb') as handle:
+            body = handle.read()
+    if encoding == ENCODING_ZLIB:
+        body = zlib.decompress(body)
+    return bytes(body)
+
+
+def load_payloads(db: Union[Session, Connection], hashes: Iterable[str]) -> Dict[str, Any]:
+    """
+    Resolve payloads by hash (in-process cache first, then one query)
+    
+    Args:
+        db: Session or connection to read through (a replica is fine)
+        hashes: Payload hashes; unknown hashes are left out of the result
+    
+    Returns:
+        Dict mapping hash to the decoded payload
+    """
+    bodies = {}
+    missing = []
+    for digest in dict.fromkeys(h for h in hashes if h):
+        body = _cache_get(digest)
+        if body is None:
+            missing.append(digest)
+        else:
+            bodies[digest] = body
+    
+    if missing:
+        rows = db.execute(
+            text("SELECT hash, encoding, body FROM payloads WHERE hash = ANY(:hashes)"),
+            {'hashes': missing}
+        ).all()
+        for digest, encoding, body in rows:
+            bodies[digest] = _decode_body(digest, encoding, body)
+            _cache_put(digest, bodies[digest])
+    
+    return {digest: json.loads(body) for digest, body in bodies.items()}
+
+
+def load_payload(db: Union[Session, Connection], digest: str) -> Optional[Any]:
+    """Resolve one payload by hash; None if unknown"""
+    return load_payloads(db, [digest]).get(digest)
+
+
+# Backfill of rows written before the payload store existed
+_JOB_TABLES = ('jobs', 'jobs_archive')
+
+
+def _compact_jobs_batch(conn: Connection, table: str, after_id: int, batch_size: int) -> tuple:
+    rows = conn.execute(text(
+        f"SELECT id, payload FROM {table} WHERE id > :after_id AND payload IS NOT NULL "
+        f"ORDER BY id LIMIT :batch_size FOR UPDATE SKIP LOCKED"
+    ), {'after_id': after_id, 'batch_size': batch_size}).all()
+    if not rows:
+        return 0, None
+    
+    ids = [row.id for row in rows]
+    # A JSON null payload is cleared without a reference
+    stored = iter(store_payloads(conn, [row.payload for row in rows if row.payload is not None]))
+    hashes = [next(stored) if row.payload is not None else None for row in rows]
+    conn.execute(text(
+        f"UPDATE {table} AS t SET payload_hash = v.hash, payload = NULL "
+        f"FROM unnest(CAST(:ids AS int[]), CAST(:hashes AS varchar[])) AS v(id, hash) WHERE t.id = v.id"
+    ), {'ids': ids, 'hashes': hashes})
+    return len(rows), ids[-1]
+
+
+def _compact_events_batch(conn: Connection, after_id: int, batch_size: int) -> tuple:
+    rows = conn.execute(text(
+        "SELECT id, timestamp, data, event_metadata FROM event_logs "
+        "WHERE id > :after_id AND event_type = 'message.received' ORDER BY id LIMIT :batch_size"
+    ), {'after_id': after_id, 'batch_size': batch_size}).all()
+    if not rows:
+        return 0, None
+    
+    # message.received carried the job payload's data; attributes are in event_metadata
+    pending = [row for row in rows if isinstance(row.data, dict) and 'payload' in row.data]
+    if pending:
+        hashes = store_payloads(conn, [
+            {'data': row.data['payload'], 'attributes': (row.event_metadata or {}).get('attributes', {})}
+            for row in pending
+        ])
+        data = [
+            json.dumps({**{k: v for k, v in row.data.items() if k != 'payload'}, 'payload_hash': digest})
+            for row, digest in zip(pending, hashes)
+        ]
+        # The timestamp bounds let Postgres prune to the partitions this batch touches
+        conn.execute(text(
+            "UPDATE event_logs AS e SET data = CAST(v.data AS json) "
+            "FROM unnest(CAST(:ids AS int[]), CAST(:timestamps AS timestamptz[]), CAST(:data AS text[])) "
+            "AS v(id, timestamp, data) "
+            "WHERE e.id = v.id AND e.timestamp = v.timestamp "
+            "AND e.timestamp >= :first AND e.timestamp <= :last"
+        ), {
+            'ids': [row.id for row in pending],
+            'timestamps': [row.timestamp for row in pending],
+            'data': data,
+            'first': min(row.timestamp for row in pending),
+            'last': max(row.timestamp for row in pending),
+        })
+    return len(pending), rows[-1].id
+
+
+def compact_payloads(
+    tables: Iterable[str] = ('jobs', 'jobs_archive', 'event_logs'),
+    batch_size: int = 1000,
+    pause_seconds: float = 0.0
+) -> Dict[str, int]:
+    """
+    Move inline payloads of existing rows into the payload store
+    
+    Walks each table by id, one short transaction per batch, so it can run
+    next to live traffic and resume after interruption. Space is reused
+    after the next VACUUM; the files only shrink after VACUUM FULL or a
+    repack.
+    
+    Args:
+        tables: Tables to compact (jobs, jobs_archive, event_logs)
+        batch_size: Rows per transaction
+        pause_seconds: Sleep between batches
+    
+    Returns:
+        Dict mapping table to the number of rows rewritten
+    """
+    totals = {}
+    engine = get_engine()
+    
+    for table in tables:
+        if table not in _JOB_TABLES and table != 'event_logs':
+            raise ValueError(f"Unknown table: {table}")
+        
+        totals[table] = 0
+        after_id = 0
+        while True:
+            with engine.begin() as conn:
+                if table == 'event_logs':
+                    count, after_id = _compact_events_batch(conn, after_id, batch_size)
+                else:
+                    count, after_id = _compact_jobs_batch(conn, table, after_id, batch_size)
+            if after_id is None:
+                break
+            totals[table] += count
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        
+        logger.info("Payload compaction finished", table=table, rows=totals[table])
+    
+    return totals
@@ -0,0 +1,202 @@
+"""
+Connection pool telemetry and autotuning for the SQLAlchemy engine
+Exports checkout wait, saturation, connection age and invalidations,
+and recommends (or applies) a pool size from observed concurrency
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.pool import QueuePool
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Prometheus metrics
+pool_checkout_wait = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time waiting for a pooled connection (includes creating one)',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+pool_checkout_duration = Histogram(
+    'db_pool_checkout_duration_seconds', 'Time a connection stays checked out',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+pool_connection_age = Histogram(
+    'db_pool_connection_age_seconds', 'Age of connections when returned to the pool',
+    buckets=(1, 10, 60, 300, 600, 1200, 1800, 3600)
+)
+pool_timeouts = Counter('db_pool_timeouts_total', 'Checkouts that timed out waiting for a connection')
+pool_invalidations = Counter('db_pool_invalidations_total', 'Invalidated pool connections', ['soft'])
+pool_size_gauge = Gauge('db_pool_size', 'Configured pool size')
+pool_checked_out = Gauge('db_pool_checked_out', 'Connections currently checked out')
+pool_overflow = Gauge('db_pool_overflow', 'Connections open beyond pool_size')
+pool_max_overflow = Gauge('db_pool_max_overflow', 'Configured max overflow')
+pool_saturation = Gauge('db_pool_saturation_ratio', 'Checked-out connections / (pool_size + max_overflow)')
+pool_recommended_size = Gauge('db_pool_recommended_size', 'Pool size recommended by the autotuner')
+pool_connection_budget = Gauge('db_pool_connection_budget', 'Per-instance share of the server connection limit')
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures checkout wait and can be resized at runtime"""
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start)
+    
+    def max_overflow(self) -> int:
+        return self._max_overflow
+    
+    def resize(self, pool_size: int, max_overflow: int):
+        """
+        Change pool_size and max_overflow without disposing the pool
+        
+        Shrinking takes effect as connections are returned: returns that
+        find the pool full are closed.
+        """
+        with self._overflow_lock:
+            # Keep checkedout() invariant: maxsize - qsize + overflow
+            self._overflow -= pool_size - self._pool.maxsize
+            self._pool.maxsize = pool_size
+            self._max_overflow = max_overflow
+
+
+def connection_budget() -> int:
+    """Connections one instance may hold without exceeding the server limit across all instances"""
+    usable = config.database.server_max_connections - config.database.reserved_connections
+    return max(1, usable // max(1, config.database.max_instances))
+
+
+class PoolAutotuner:
+    """
+    Recommend or apply a pool size from observed concurrency
+    
+    Tracks the peak number of checked-out connections per interval over a
+    sliding set of intervals. The recommendation is that peak plus 25%
+    headroom, capped by this instance's share of the Cloud SQL connection
+    limit; the rest of the share is left as overflow.
+    """
+    
+    HEADROOM = 1.25
+    MIN_POOL_SIZE = 2
+    
+    def __init__(self, pool: InstrumentedQueuePool, mode: str, interval: float, windows: int = 10):
+        self.pool = pool
+        self.mode = mode
+        self.interval = interval
+        self._peaks = deque(maxlen=windows)
+        self._window_peak = 0
+        self._window_started = time.monotonic()
+        self._lock = threading.Lock()
+        self.recommended: Optional[int] = None
+    
+    def observe(self, checked_out: int):
+        """Record current concurrency; evaluates once per interval"""
+        if checked_out > self._window_peak:
+            self._window_peak = checked_out
+        if time.monotonic() - self._window_started >= self.interval:
+            self._evaluate()
+    
+    def _evaluate(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_started < self.interval:
+                return
+            self._peaks.append(self._window_peak)
+            self._window_peak = 0
+            self._window_started = now
+            
+            budget = connection_budget()
+            pool_connection_budget.set(budget)
+            
+            peak = max(self._peaks)
+            recommended = min(budget, max(self.MIN_POOL_SIZE, math.ceil(peak * self.HEADROOM)))
+            overflow = max(0, budget - recommended)
+            pool_recommended_size.set(recommended)
+            
+            if recommended == self.recommended:
+                return
+            self.recommended = recommended
+            
+            current = self.pool.size()
+            logger.info(
+                "Pool size recommendation",
+                mode=self.mode,
+                observed_peak=peak,
+                current_pool_size=current,
+                current_max_overflow=self.pool.max_overflow(),
+                recommended_pool_size=recommended,
+                recommended_max_overflow=overflow,
+                connection_budget=budget
+            )
+            
+            if self.mode == "adjust" and recommended != current:
+                self.pool.resize(recommended, overflow)
+                logger.info("Pool resized", pool_size=recommended, max_overflow=overflow)
+
+
+def install_pool_telemetry(engine: Engine) -> Optional[PoolAutotuner]:
+    """
+    Attach telemetry listeners (and the autotuner, if enabled) to an engine's pool
+    
+    Args:
+        engine: Engine created with poolclass=InstrumentedQueuePool
+        
+    Returns:
+        The autotuner, or None when DB_POOL_AUTOTUNE is off
+    """
+    pool = engine.pool
+    autotuner = None
+    if config.database.pool_autotune in ("recommend", "adjust"):
+        autotuner = PoolAutotuner(pool, config.database.pool_autotune, config.database.pool_autotune_interval)
+    
+    def capacity() -> int:
+        return max(1, pool.size() + max(0, pool.max_overflow()))
+    
+    pool_size_gauge.set_function(pool.size)
+    pool_checked_out.set_function(pool.checkedout)
+    pool_overflow.set_function(lambda: max(0, pool.overflow()))
+    pool_max_overflow.set_function(pool.max_overflow)
+    pool_saturation.set_function(lambda: pool.checkedout() / capacity())
+    pool_connection_budget.set(connection_budget())
+    
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info['created_at'] = time.monotonic()
+    
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.monotonic()
+        if autotuner is not None:
+            autotuner.observe(pool.checkedout())
+    
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        now = time.monotonic()
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+        if checked_out_at is not None:
+            pool_checkout_duration.observe(now - checked_out_at)
+        created_at = connection_record.info.get('created_at')
+        if created_at is not None:
+            pool_connection_age.observe(now - created_at)
+    
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_invalidations.labels(soft='false').inc()
+    
+    @event.listens_for(pool, "soft_invalidate")
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        pool_invalidations.labels(soft='true').inc()
+    
+    return autotuner
@@ -0,0 +1,36 @@
+"""
+Message processing shared by the push worker (worker_http) and the pull
+worker (queue_worker)
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+
+def process_message(payload: str, attributes: dict) -> dict:
+    """Process message - implement business logic here"""
+    return {
+        'processed': True,
+        'payload_length': len(payload),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+def split_payload(body: Any) -> Tuple[str, Dict[str, Any]]:
+    """
+    Turn a stored job payload into process_message arguments
+    
+    Pub/Sub jobs store {'data': <decoded body>, 'attributes': {...}}; any
+    other payload (API, bulk ingest) is handed over as its JSON text.
+    
+    Args:
+        body: Resolved job payload (None for jobs without one)
+    
+    Returns:
+        (payload, attributes)
+    """
+    if isinstance(body, dict) and isinstance(body.get('data'), str):
+        return body['data'], body.get('attributes') or {}
+    if body is None:
+        return "", {}
+    return json.dumps(body), {}
@@ -1,22 +1,276 @@
+"""
+Pub/Sub publisher for CUIDA+Care
+One long-lived PublisherClient per process with batching and flow
+control; publish() returns a future right away instead of waiting for
+the round trip. Set PUBSUB_EMULATOR_HOST to publish to the local emulator.
+"""
+import gzip
+import json
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from google.api_core.exceptions import AlreadyExists
 from google.cloud import pubsub_v1
-import os
+from google.cloud.pubsub_v1.types import BatchSettings, LimitExceededBehavior, PublishFlowControl, PublisherOptions
+from prometheus_client import Counter, Histogram
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Prometheus metrics
+messages_published = Counter('pubsub_messages_published_total', 'Messages published', ['topic', 'result'])
+publish_latency = Histogram(
+    'pubsub_publish_latency_seconds', 'Time from publish() until the server acknowledged the message', ['topic'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+_publisher: Optional[pubsub_v1.PublisherClient] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> pubsub_v1.PublisherClient:
+    """
+    Get or create the process-wide publisher
+    
+    Messages are sent in batches of up to PUBSUB_PUBLISH_MAX_MESSAGES /
+    PUBSUB_PUBLISH_MAX_BYTES, or after PUBSUB_PUBLISH_MAX_LATENCY. Once
+    PUBSUB_FLOW_MAX_MESSAGES / PUBSUB_FLOW_MAX_BYTES are in flight,
+    publish() blocks until the server catches up.
+    
+    Returns:
+        pubsub_v1.PublisherClient
+    """
+    global _publisher
+    
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                settings = config.pubsub
+                _publisher = pubsub_v1.PublisherClient(
+                    batch_settings=BatchSettings(
+                        max_messages=settings.publish_max_messages,
+                        max_bytes=settings.publish_max_bytes,
+                        max_latency=settings.publish_max_latency,
+                    ),
+                    publisher_options=PublisherOptions(flow_control=PublishFlowControl(
+                        message_limit=settings.flow_max_messages,
+                        byte_limit=settings.flow_max_bytes,
+                        limit_exceeded_behavior=LimitExceededBehavior.BLOCK,
+                    )),
+                )
+                logger.info(
+                    "Pub/Sub publisher created",
+                    project_id=settings.project_id,
+                    max_messages=settings.publish_max_messages,
+                    max_latency=settings.publish_max_latency
+                )
+    return _publisher
+
+
+def close_publisher():
+    """Flush pending batches and stop the publisher (a later publish() creates a new one)"""
+    global _publisher
+    
+    with _publisher_lock:
+        publisher, _publisher = _publisher, None
+    if publisher is not None:
+        publisher.stop()
+
 
-PROJECT_ID = os.getenv("GCP_PROJECT_ID") or os.getenv("GOOGLE_CLOUD_PROJECT")
-TOPIC_NAME = os.getenv("PUBSUB_TOPIC", "hello-topic")
+def topic_path(topic: Optional[str] = None) -> str:
+    """Full path of a topic in PUBSUB project (default: PUBSUB_TOPIC)"""
+    return pubsub_v1.PublisherClient.topic_path(config.pubsub.project_id, topic or config.pubsub.topic_name)
 
 
-def publish_message(message: str):
-    if not PROJECT_ID:
-        raise RuntimeError("GCP_PROJECT_ID not set in environment")
-    publisher = pubsub_v1.PublisherClient()
-    topic_path = publisher.topic_path(PROJECT_ID, TOPIC_NAME)
-    data = message.encode("utf-8")
-    future = publisher.publish(topic_path, data)
-    result = future.result()
+def ensure_topic(topic: Optional[str] = None) -> str:
+    """Create the topic if it does not exist (the emulator starts empty); returns its path"""
+    path = topic_path(topic)
+    try:
+        get_publisher().create_topic(name=path)
+        logger.info("Created Pub/Sub topic", topic=path)
+    except AlreadyExists:
+        pass
+    return path
+
+
+def publish(
+    data: Union[str, bytes],
+    attributes: Optional[Dict[str, Any]] = None,
+    topic: Optional[str] = None,
+    callback: Optional[Callable[[Future], None]] = None
+) -> Future:
+    """
+    Queue a message for publishing without waiting for the server
+    
+    Args:
+        data: Message body (str is UTF-8 encoded)
+        attributes: Message attributes (values converted to str)
+        topic: Topic name (default: PUBSUB_TOPIC)
+        callback: Called with the future once the message is acknowledged or failed
+    
+    Returns:
+        Future resolving to the message id
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    name = topic or config.pubsub.topic_name
+    start = time.perf_counter()
+    
+    future = get_publisher().publish(
+        topic_path(name), data, **{key: str(value) for key, value in (attributes or {}).items()}
+    )
+    
+    def record(done: Future):
+        if done.exception() is None:
+            messages_published.labels(topic=name, result='ok').inc()
+            publish_latency.labels(topic=name).observe(time.perf_counter() - start)
+        else:
+            messages_published.labels(topic=name, result='error').inc()
+    
+    future.add_done_callback(record)
+    if callback is not None:
+        future.add_done_callback(callback)
+    return future
+
+
+def publish_message(message: str) -> str:
+    """Publish one message and wait for its id"""
+    return publish(message).result()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def publish_stream(
+    messages: Iterable[Tuple[Union[str, bytes], Dict[str, Any]]],
+    rate: Optional[float] = None,
+    topic: Optional[str] = None,
+    progress_every: float = 5.0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Publish a stream of messages, optionally paced to a target rate
+    
+    Sends are scheduled at fixed intervals from the start (1 / rate), so a
+    slow moment is caught up instead of lowering the overall rate. Flow
+    control bounds the messages in flight.
+    
+    Args:
+        messages: (data, attributes) pairs
+        rate: Target messages per second (default: as fast as possible)
+        topic: Topic name (default: PUBSUB_TOPIC)
+        progress_every: Seconds between progress callbacks
+        progress: Optional callback receiving the running totals
+    
+    Returns:
+        Dict with messages sent, published, failed, seconds, published per
+        second and publish latency percentiles (ms)
+    """
+    lock = threading.Lock()
+    drained = threading.Condition(lock)
+    totals = {'sent': 0, 'published': 0, 'failed': 0}
+    latencies = []
+    errors: Dict[str, int] = {}
+    
+    def done(future: Future, sent_at: float):
+        with lock:
+            error = future.exception()
+            if error is None:
+                totals['published'] += 1
+                latencies.append(time.perf_counter() - sent_at)
+            else:
+                totals['failed'] += 1
+                errors[type(error).__name__] = errors.get(type(error).__name__, 0) + 1
+            if totals['published'] + totals['failed'] == totals['sent']:
+                drained.notify_all()
+    
+    def snapshot() -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        with lock:
+            return {
+                **totals,
+                'seconds': round(elapsed, 3),
+                'published_per_second': round(totals['published'] / elapsed, 1) if elapsed else 0.0,
+            }
+    
+    start = time.perf_counter()
+    last_report = start
+    for n, (data, attributes) in enumerate(messages):
+        if rate:
+            delay = start + n / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent_at = time.perf_counter()
+        with lock:
+            totals['sent'] += 1
+        publish(data, attributes, topic, callback=lambda future, sent_at=sent_at: done(future, sent_at))
+        if progress and sent_at - last_report >= progress_every:
+            progress(snapshot())
+            last_report = sent_at
+    
+    with lock:
+        drained.wait_for(lambda: totals['published'] + totals['failed'] == totals['sent'])
+    
+    result = snapshot()
+    result.update({
+        'target_rate': rate,
+        'publish_p50_ms': round(_percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'publish_p95_ms': round(_percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'publish_p99_ms': round(_percentile(latencies, 99) * 1000, 2) if latencies else None,
+    })
+    if errors:
+        result['errors'] = errors
     return result
 
 
+def read_messages(path: str, fmt: str = 'text', attributes: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Read messages from a file ('-' for stdin), optionally gzipped
+    
+    Args:
+        path: Input file
+        fmt: 'text' (each line is a message body) or 'ndjson' (each line is
+            {"data": ..., "attributes": {...}}; non-string data is sent as JSON)
+        attributes: Attributes added to every message (a message's own win)
+    
+    Yields:
+        (data, attributes) pairs
+    """
+    if path == '-':
+        stream = sys.stdin
+    elif path.endswith('.gz'):
+        stream = gzip.open(path, 'rt', encoding='utf-8')
+    else:
+        stream = open(path, encoding='utf-8')
+    
+    try:
+        for line in stream:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            if fmt == 'ndjson':
+                record = json.loads(line)
+                data = record.get('data', '')
+                yield (data if isinstance(data, str) else json.dumps(data),
+                       {**(attributes or {}), **(record.get('attributes') or {})})
+            else:
+                yield line, dict(attributes or {})
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
 if __name__ == "__main__":
     msg = "Hello from publisher"
     res = publish_message(msg)
     print("Published message id:", res)
+    close_publisher()
@@ -0,0 +1,233 @@
+"""
+Statement-level query profiler
+Normalizes SQL into fingerprints and keeps per-fingerprint latency and
+row statistics, with sampled slow statements for EXPLAIN capture
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import Engine, event
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Prometheus metrics
+query_duration = Histogram(
+    'db_query_duration_seconds', 'Statement latency by fingerprint', ['fingerprint'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+query_rows = Histogram(
+    'db_query_rows', 'Rows returned or affected by fingerprint', ['fingerprint'],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000)
+)
+
+# Fingerprints beyond the cap share one label to bound metric cardinality
+OVERFLOW_FINGERPRINT = "other"
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%s|%\(\w+\)s|\$\d+|(?<!:):\w+")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_ROWS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so executions differing only in literals,
+    placeholders, IN-list length or VALUES row count share a fingerprint
+    """
+    sql = _COMMENTS.sub(" ", statement)
+    sql = _STRINGS.sub("?", sql)
+    sql = _PLACEHOLDERS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (?)", sql)
+    sql = _VALUES_ROWS.sub("(?), ...", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint_id(fp: str) -> str:
+    """Short stable id for a fingerprint (metric label, URL component)"""
+    return hashlib.sha1(fp.encode("utf-8")).hexdigest()[:12]
+
+
+class FingerprintStats:
+    """Aggregates for one fingerprint"""
+    
+    RECENT_SAMPLES = 512
+    
+    def __init__(self, fp: str):
+        self.fingerprint = fp
+        self.id = fingerprint_id(fp)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.total_rows = 0
+        self.recent = deque(maxlen=self.RECENT_SAMPLES)
+        self.slow_sample: Optional[Dict[str, Any]] = None
+    
+    def record(self, duration: float, rows: int):
+        self.count += 1
+        self.total_seconds += duration
+        self.total_rows += rows
+        if duration > self.max_seconds:
+            self.max_seconds = duration
+        self.recent.append(duration)
+    
+    def p95(self) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'fingerprint': self.fingerprint,
+            'count': self.count,
+            'total_seconds': round(self.total_seconds, 6),
+            'mean_seconds': round(self.total_seconds / self.count, 6) if self.count else 0.0,
+            'p95_seconds': round(self.p95(), 6),
+            'max_seconds': round(self.max_seconds, 6),
+            'mean_rows': round(self.total_rows / self.count, 2) if self.count else 0.0,
+            'has_slow_sample': self.slow_sample is not None,
+        }
+
+
+_stats: Dict[str, FingerprintStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _get_stats(fp: str) -> Optional[FingerprintStats]:
+    """Get or create stats for a fingerprint; None once the cap is reached"""
+    stats = _stats.get(fp)
+    if stats is None:
+        with _stats_lock:
+            stats = _stats.get(fp)
+            if stats is None:
+                if len(_stats) >= config.database.profiler_max_fingerprints:
+                    return None
+                stats = _stats[fp] = FingerprintStats(fp)
+    return stats
+
+
+def record_statement(statement: str, parameters: Any, duration: float, rows: int, executemany: bool):
+    """Record one statement execution"""
+    fp = fingerprint(statement)
+    stats = _get_stats(fp)
+    label = stats.id if stats is not None else OVERFLOW_FINGERPRINT
+    
+    query_duration.labels(fingerprint=label).observe(duration)
+    query_rows.labels(fingerprint=label).observe(rows)
+    
+    # Logged even past the fingerprint cap, when no stats are kept
+    if duration > config.database.slow_query_seconds:
+        logger.warning(
+            "Slow query detected",
+            duration_seconds=duration,
+            fingerprint_id=label,
+            query=statement[:1000]
+        )
+    
+    if stats is None:
+        return
+    
+    with _stats_lock:
+        stats.record(duration, rows)
+        # Keep the slowest single-row-set SELECT per fingerprint for EXPLAIN
+        if (
+            not executemany
+            and duration >= config.database.profiler_sample_seconds
+            and fp.lstrip("( ").upper().startswith(("SELECT", "WITH"))
+            and (stats.slow_sample is None or duration > stats.slow_sample['duration_seconds'])
+        ):
+            stats.slow_sample = {
+                'statement': statement,
+                'parameters': parameters,
+                'duration_seconds': duration,
+                'captured_at': datetime.utcnow().isoformat()
+            }
+
+
+def install_query_profiler(engine: Engine):
+    """Attach the profiler's cursor hooks to an engine"""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get('query_start_time')
+        if not start_times:
+            return
+        duration = time.perf_counter() - start_times.pop()
+        rows = max(getattr(cursor, 'rowcount', 0) or 0, 0)
+        record_statement(statement, parameters, duration, rows, executemany)
+
+
+def get_profile(order_by: str = 'total_seconds', limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Get per-fingerprint statistics
+    
+    Args:
+        order_by: Sort key (total_seconds, p95_seconds, count, max_seconds)
+        limit: Maximum entries
+        
+    Returns:
+        List of fingerprint stats, highest first
+    """
+    with _stats_lock:
+        entries = [stats.to_dict() for stats in _stats.values()]
+    entries.sort(key=lambda entry: entry.get(order_by, 0), reverse=True)
+    return entries[:limit]
+
+
+def explain_sample(fp_id: str, engine: Engine) -> Optional[Dict[str, Any]]:
+    """
+    Capture EXPLAIN (ANALYZE, BUFFERS) for a fingerprint's sampled slow statement
+    
+    The statement is re-executed inside a transaction that is rolled back.
+    
+    Args:
+        fp_id: Fingerprint id
+        engine: Engine to run the plan on
+        
+    Returns:
+        Plan and sample details, or None if there is no sample
+    """
+    with _stats_lock:
+        stats = next((s for s in _stats.values() if s.id == fp_id), None)
+        sample = dict(stats.slow_sample) if stats and stats.slow_sample else None
+    
+    if sample is None:
+        return None
+    
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sample['statement'], sample['parameters'] or ())
+        plan = [row[0] for row in cursor.fetchall()]
+        raw.rollback()
+    finally:
+        raw.close()
+    
+    return {
+        'id': fp_id,
+        'fingerprint': stats.fingerprint,
+        'sample_duration_seconds': sample['duration_seconds'],
+        'captured_at': sample['captured_at'],
+        'plan': plan
+    }
@@ -0,0 +1,400 @@
+"""
+Pull-mode work queue on the jobs table
+Workers claim PENDING jobs per priority lane in batches with FOR UPDATE
+SKIP LOCKED, run them on a bounded thread pool under a lease (lanes share
+it by weight, see src/lanes.py), and finalize the results in batches. No
+broker is involved, so API-submitted, scheduled and bulk-ingested jobs can
+be worked off by any number of worker processes.
+"""
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import bindparam, func, select, text, update
+
+from .config import config
+from .database import get_engine
+from .lanes import LANES, LaneScheduler, lane_filter, lane_for
+from .leases import acquire_lease, lease_expiry, release_lease
+from .logging_config import get_logger
+from .models import Job, JobStatus
+from .outbox import TOPIC_JOB_LISTS, TOPIC_JOB_SNAPSHOT, enqueue_many, notify_relay
+from .payloads import load_payloads
+from .processing import process_message, split_payload
+from .snapshots import encode_job
+
+logger = get_logger(__name__)
+
+# Prometheus metrics
+queue_claimed = Counter('queue_jobs_claimed_total', 'Jobs claimed from the jobs table')
+queue_finalized = Counter('queue_jobs_finalized_total', 'Jobs finalized by the pull worker', ['status'])
+queue_claim_duration = Histogram(
+    'queue_claim_duration_seconds', 'Duration of one claim transaction',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+queue_wait = Histogram(
+    'queue_wait_seconds', 'Time from job creation until it starts running', ['lane'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+queue_running = Gauge('queue_jobs_running', 'Claimed jobs currently running in this process')
+
+_RETURNING = ", ".join(f"jobs.{column.name}" for column in Job.__table__.columns)
+
+# One statement per outcome status; rows the reaper took over (no longer
+# PROCESSING) are left out and come back missing from RETURNING
+FINALIZE_SQL = text(f"""
+    UPDATE jobs SET
+        status = :status,
+        result = CAST(v.result AS json),
+        error_message = coalesce(v.error, jobs.error_message),
+        retry_count = v.retry_count,
+        completed_at = CASE WHEN :completed THEN now() ELSE jobs.completed_at END,
+        started_at = CASE WHEN :requeue THEN NULL ELSE jobs.started_at END,
+        lease_expires_at = NULL,
+        updated_at = now()
+    FROM unnest(
+        CAST(:ids AS int[]), CAST(:results AS text[]), CAST(:errors AS text[]), CAST(:retry_counts AS int[])
+    ) AS v(id, result, error, retry_count)
+    WHERE jobs.id = v.id AND jobs.status = 'PROCESSING'
+    RETURNING {_RETURNING}
+""").bindparams(bindparam('status', type_=Job.__table__.c.status.type)).columns(*Job.__table__.columns)
+
+
+@dataclass
+class ClaimedJob:
+    """A job claimed by this worker, with its payload resolved"""
+    id: int
+    job_id: str
+    payload: str
+    attributes: Dict[str, Any]
+    correlation_id: Optional[str] = None
+    retry_count: int = 0
+    max_retries: int = 3
+    lane: str = LANES[1]
+    created_at: Optional[datetime] = None
+
+
+@dataclass
+class JobOutcome:
+    """Result of running a claimed job, waiting to be finalized"""
+    job: ClaimedJob
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    duration_seconds: float = 0.0
+    finished_at: float = field(default_factory=time.monotonic)
+
+
+def claim_jobs(batch_size: int, lane: Optional[str] = None) -> List[ClaimedJob]:
+    """
+    Claim up to batch_size PENDING jobs, highest priority first, oldest first
+    within a priority
+    
+    Rows locked by other workers are skipped rather than waited for, so
+    concurrent claims never block each other or hand out a job twice. The
+    claimed jobs become PROCESSING with a lease and their snapshots go to
+    the outbox in the same transaction.
+    
+    Args:
+        batch_size: Maximum jobs to claim
+        lane: Only claim jobs of this lane (default: any)
+    
+    Returns:
+        Claimed jobs in queue order (empty when nothing is pending)
+    """
+    start = time.perf_counter()
+    oldest = select(Job.id).where(Job.status == JobStatus.PENDING)
+    if lane is not None:
+        oldest = oldest.where(lane_filter(lane))
+    # Matches ix_jobs_pending_priority_id: no sort, only the head of the index is read
+    oldest = oldest.order_by(Job.priority.desc(), Job.id).limit(batch_size).with_for_update(skip_locked=True)
+    
+    with get_engine().begin() as conn:
+        rows = conn.execute(
+            update(Job)
+            .where(Job.id.in_(oldest.scalar_subquery()))
+            .values(status=JobStatus.PROCESSING, started_at=func.now(), lease_expires_at=lease_expiry())
+            .returning(*Job.__table__.columns)
+        ).all()
+        if not rows:
+            return []
+        
+        rows.sort(key=lambda row: (-row.priority, row.id))
+        payloads = load_payloads(conn, [row.payload_hash for row in rows if row.payload_hash])
+        enqueue_many(conn, TOPIC_JOB_SNAPSHOT, [encode_job(row) for row in rows])
+    
+    queue_claim_duration.observe(time.perf_counter() - start)
+    queue_claimed.inc(len(rows))
+    
+    claimed = []
+    for row in rows:
+        body = payloads.get(row.payload_hash) if row.payload_hash else row.payload
+        payload, attributes = split_payload(body)
+        claimed.append(ClaimedJob(
+            row.id, row.job_id, payload, attributes, row.correlation_id,
+            # Bulk-ingested rows may carry NULL counters (the model defaults are 0 and 3)
+            retry_count=row.retry_count or 0,
+            max_retries=row.max_retries if row.max_retries is not None else 3,
+            lane=lane_for(row.priority),
+            created_at=row.created_at
+        ))
+    return claimed
+
+
+def _outcome_status(outcome: JobOutcome, retry_failed: bool) -> JobStatus:
+    if outcome.error is None:
+        return JobStatus.COMPLETED
+    if outcome.job.retry_count + 1 >= outcome.job.max_retries:
+        return JobStatus.DEAD_LETTER
+    return JobStatus.PENDING if retry_failed else JobStatus.FAILED
+
+
+def finalize_outcomes(outcomes: List[JobOutcome], retry_failed: bool = True) -> Dict[str, str]:
+    """
+    Record the outcomes of a batch of jobs in one transaction
+    
+    Successful jobs are COMPLETED. Failed jobs go back to PENDING for
+    another attempt (or to FAILED if not retry_failed) until retry_count
+    reaches max_retries, then to DEAD_LETTER. Jobs that are no longer
+    PROCESSING lost their lease to the reaper and are left as it decided.
+    
+    Args:
+        outcomes: Finished jobs
+        retry_failed: Requeue failed jobs (pull queue) instead of failing them
+    
+    Returns:
+        Dict mapping each job_id to its new status value, or lease_lost
+    """
+    statuses: Dict[str, str] = {}
+    if not outcomes:
+        return statuses
+    
+    by_status = defaultdict(list)
+    for outcome in outcomes:
+        by_status[_outcome_status(outcome, retry_failed)].append(outcome)
+    
+    snapshots = []
+    with get_engine().begin() as conn:
+        for status, group in by_status.items():
+            rows = conn.execute(FINALIZE_SQL, {
+                'status': status,
+                'completed': status == JobStatus.COMPLETED,
+                'requeue': status == JobStatus.PENDING,
+                'ids': [outcome.job.id for outcome in group],
+                'results': [json.dumps(outcome.result) if outcome.result is not None else None for outcome in group],
+                'errors': [outcome.error for outcome in group],
+                'retry_counts': [
+                    outcome.job.retry_count + (outcome.error is not None) for outcome in group
+                ],
+            }).all()
+            snapshots.extend(encode_job(row) for row in rows)
+            for outcome in group:
+                statuses[str(outcome.job.job_id)] = 'lease_lost'
+            for row in rows:
+                statuses[str(row.job_id)] = status.value
+        
+        enqueue_many(conn, TOPIC_JOB_SNAPSHOT, snapshots)
+        changed = [snapshot['job_id'] for snapshot in snapshots if snapshot['status'] != JobStatus.COMPLETED.value]
+        if changed:
+            enqueue_many(conn, TOPIC_JOB_LISTS, [{'job_ids': changed}])
+    
+    notify_relay()
+    return statuses
+
+
+def finalize_jobs(outcomes: List[JobOutcome]) -> Dict[str, int]:
+    """
+    Record the outcomes of a batch of pull-queue jobs (see finalize_outcomes)
+    
+    Args:
+        outcomes: Finished jobs
+    
+    Returns:
+        Dict mapping the new status (or lease_lost) to a job count
+    """
+    counts: Dict[str, int] = defaultdict(int)
+    for status in finalize_outcomes(outcomes).values():
+        counts[status] += 1
+    
+    for status, count in counts.items():
+        queue_finalized.labels(status=status).inc(count)
+    if counts.get('lease_lost'):
+        logger.warning("Queue jobs lost their lease before finalizing", jobs=counts['lease_lost'])
+    return dict(counts)
+
+
+def return_jobs(jobs: List[ClaimedJob]) -> int:
+    """
+    Hand claimed jobs that never started back to the queue (worker shutdown)
+    
+    Args:
+        jobs: Claimed, unstarted jobs
+    
+    Returns:
+        Number of jobs made PENDING again
+    """
+    if not jobs:
+        return 0
+    with get_engine().begin() as conn:
+        rows = conn.execute(
+            update(Job)
+            .where(Job.id.in_([job.id for job in jobs]), Job.status == JobStatus.PROCESSING)
+            .values(status=JobStatus.PENDING, started_at=None, lease_expires_at=None)
+            .returning(*Job.__table__.columns)
+        ).all()
+        enqueue_many(conn, TOPIC_JOB_SNAPSHOT, [encode_job(row) for row in rows])
+    notify_relay()
+    return len(rows)
+
+
+class QueueWorker:
+    """
+    Claim, run and finalize PENDING jobs until stopped
+    
+    At most `concurrency` jobs run at once. Each lane claims only while its
+    buffer has room and LaneScheduler decides which buffered job gets the
+    next free slot, so a busy worker leaves the rest of the queue to others
+    and a flooded lane cannot crowd out the other lanes.
+    """
+    
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        claim_batch_size: Optional[int] = None,
+        scheduler: Optional[LaneScheduler] = None
+    ):
+        settings = config.queue
+        self.concurrency = concurrency or settings.concurrency
+        self.claim_batch_size = claim_batch_size or settings.claim_batch_size
+        self.scheduler = scheduler or LaneScheduler()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="queue-job")
+        self._finished: 'queue.Queue[JobOutcome]' = queue.Queue()
+        self._running = 0
+        self._stop = threading.Event()
+    
+    def _execute(self, job: ClaimedJob):
+        start = time.perf_counter()
+        outcome = JobOutcome(job)
+        try:
+            outcome.result = process_message(job.payload, job.attributes)
+        except Exception as e:
+            outcome.error = str(e)
+            logger.error("Queue job failed", job_id=job.job_id, error=str(e), correlation_id=job.correlation_id)
+        finally:
+            release_lease(job.job_id)
+        outcome.duration_seconds = time.perf_counter() - start
+        outcome.finished_at = time.monotonic()
+        self._finished.put(outcome)
+    
+    def _claim(self) -> bool:
+        """Top up every lane's buffer; True if a lane filled its batch (more may be waiting)"""
+        more = False
+        for lane in LANES:
+            size = min(self.claim_batch_size, self.scheduler.room(lane))
+            if size <= 0:
+                continue
+            try:
+                jobs = claim_jobs(size, lane=lane)
+            except Exception as e:
+                logger.error("Queue claim failed", lane=lane, error=str(e), error_type=type(e).__name__)
+                return False
+            for job in jobs:
+                # Renewed from the claim on: buffered jobs keep their lease too
+                acquire_lease(job.job_id)
+                self.scheduler.push(lane, job)
+            more = more or len(jobs) == size
+        return more
+    
+    def _dispatch(self):
+        """Start buffered jobs in weighted fair order while slots are free"""
+        while self._running < self.concurrency:
+            picked = self.scheduler.pop()
+            if picked is None:
+                break
+            lane, job, _ = picked
+            if job.created_at:
+                queue_wait.labels(lane=lane).observe(
+                    max((datetime.now(timezone.utc) - job.created_at).total_seconds(), 0)
+                )
+            self._running += 1
+            self._executor.submit(self._execute, job)
+        queue_running.set(self._running)
+    
+    def _collect(self, timeout: float, done: List[JobOutcome]):
+        """Wait up to timeout for the first finished job, then take whatever else is ready"""
+        collected = []
+        try:
+            collected.append(self._finished.get(timeout=timeout) if timeout > 0 else self._finished.get_nowait())
+            while True:
+                collected.append(self._finished.get_nowait())
+        except queue.Empty:
+            pass
+        for outcome in collected:
+            self.scheduler.done(outcome.job.lane)
+        self._running -= len(collected)
+        queue_running.set(self._running)
+        done.extend(collected)
+    
+    def _finalize(self, done: List[JobOutcome], force: bool = False) -> List[JobOutcome]:
+        settings = config.queue
+        due = done and (
+            force
+            or len(done) >= settings.finalize_batch_size
+            or time.monotonic() - done[0].finished_at >= settings.finalize_seconds
+        )
+        if not due:
+            return done
+        try:
+            finalize_jobs(done)
+        except Exception as e:
+            # Kept for the next attempt; the leases lapse if it never succeeds
+            logger.error("Queue finalize failed", jobs=len(done), error=str(e), error_type=type(e).__name__)
+            return done
+        return []
+    
+    def run(self):
+        """Work the queue until stop() is called, then drain running jobs"""
+        settings = config.queue
+        done: List[JobOutcome] = []
+        logger.info("Queue worker started", concurrency=self.concurrency, claim_batch_size=self.claim_batch_size)
+        
+        while not self._stop.is_set():
+            more = self._claim()
+            self._dispatch()
+            if more and self._running < self.concurrency and not self.scheduler.waiting():
+                timeout = 0.0  # more work is likely waiting: claim again right away
+            elif self._running or done:
+                timeout = settings.finalize_seconds
+            else:
+                timeout = settings.poll_seconds
+            self._collect(timeout, done)
+            done = self._finalize(done)
+        
+        # Buffered jobs go back to the queue; running ones are finished
+        buffered = self.scheduler.drain()
+        for job in buffered:
+            release_lease(job.job_id)
+        try:
+            return_jobs(buffered)
+        except Exception as e:
+            logger.error("Returning buffered jobs failed", jobs=len(buffered), error=str(e))
+        
+        while self._running:
+            self._collect(settings.poll_seconds, done)
+        for _ in range(3):
+            done = self._finalize(done, force=True)
+            if not done:
+                break
+            time.sleep(settings.poll_seconds)
+        self._executor.shutdown(wait=True)
+        logger.info("Queue worker stopped")
+    
+    def stop(self):
+        """Stop claiming; run() returns once running jobs are finalized"""
+        self._stop.set()
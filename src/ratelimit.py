@@ -0,0 +1,187 @@
+"""
+Per-source rate limiting shared by every worker and API instance
+Each limit key (a source, optionally split by tenant) is a GCRA bucket in
+Redis, updated atomically by one Lua script, so all instances draw from
+the same budget. An instance takes several tokens per round trip and
+spends them locally, and remembers a rejection until the bucket refills,
+so most checks never reach Redis.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from prometheus_client import Counter
+
+from .cache import take_tokens
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Local state is pruned once this many keys are tracked
+MAX_LOCAL_KEYS = 10_000
+
+# Prometheus metrics
+rate_limit_throttled = Counter('rate_limit_throttled_total', 'Requests rejected by the rate limiter', ['scope', 'rule'])
+# path: local, redis or unavailable (Redis down or circuit open)
+rate_limit_checks = Counter('rate_limit_checks_total', 'Rate limit checks by where they were decided', ['scope', 'path'])
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """Rate and burst of one source"""
+    name: str
+    rate: float  # tokens per second
+    burst: int  # tokens available after idling
+    
+    @property
+    def interval_us(self) -> int:
+        return max(int(round(1_000_000 / self.rate)), 1)
+
+
+@dataclass
+class RateDecision:
+    """Outcome of a rate limit check"""
+    allowed: bool
+    key: str = ''
+    rule: Optional[str] = None
+    retry_after: float = 0.0  # seconds, when rejected
+
+
+@dataclass
+class _LocalBucket:
+    tokens: int = 0
+    expires_at: float = 0.0  # unspent tokens are dropped after this
+    blocked_until: float = 0.0  # rejected locally until this
+
+
+def limit_key(source: str, tenant: Optional[str] = None) -> str:
+    """Limit key of a source, split by tenant when one is given"""
+    return f"{source}:{tenant}" if tenant else source
+
+
+class RateLimiter:
+    """
+    GCRA rate limiter with local token batching
+    
+    A Redis round trip takes up to local_batch tokens (at most a quarter of
+    the burst, so instances share small buckets); later checks spend them
+    without Redis. A rejection is cached until the bucket has a token
+    again. Taken tokens are already paid for in Redis, so batching can
+    only under-admit (tokens left unspent), never exceed the rate.
+    """
+    
+    def __init__(
+        self,
+        scope: str,
+        rates: Optional[Dict[str, float]] = None,
+        burst_seconds: Optional[float] = None,
+        local_batch: Optional[int] = None,
+        fail_open: Optional[bool] = None
+    ):
+        settings = config.rate_limit
+        self.scope = scope
+        self.rates = settings.rates if rates is None else rates
+        self.burst_seconds = burst_seconds or settings.burst_seconds
+        self.local_batch = max(local_batch or settings.local_batch, 1)
+        self.fail_open = settings.fail_open if fail_open is None else fail_open
+        self._buckets: Dict[str, _LocalBucket] = {}
+        self._lock = threading.Lock()
+    
+    def rule_for(self, source: str) -> Optional[RateRule]:
+        """Rule for a source, or None if it is unlimited"""
+        name = source if source in self.rates else 'default'
+        rate = self.rates.get(name, 0)
+        if rate <= 0:
+            return None
+        return RateRule(name, rate, max(int(rate * self.burst_seconds), 1))
+    
+    def _prune(self, now: float):
+        """Drop keys with nothing left to remember (caller holds the lock)"""
+        for key in [key for key, bucket in self._buckets.items()
+                    if bucket.expires_at <= now and bucket.blocked_until <= now]:
+            del self._buckets[key]
+    
+    def check(self, source: str, tenant: Optional[str] = None) -> RateDecision:
+        """
+        Spend one token of the source's (or tenant's) budget
+        
+        Args:
+            source: Job source or caller class (pubsub, api, ...)
+            tenant: Optional finer key within the source
+        
+        Returns:
+            RateDecision; rejected decisions carry a retry_after
+        """
+        key = limit_key(source, tenant)
+        rule = self.rule_for(source)
+        if rule is None:
+            return RateDecision(True, key)
+        
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                if now < bucket.blocked_until:
+                    rate_limit_checks.labels(scope=self.scope, path='local').inc()
+                    return self._reject(key, rule, bucket.blocked_until - now)
+                if bucket.tokens and now < bucket.expires_at:
+                    bucket.tokens -= 1
+                    rate_limit_checks.labels(scope=self.scope, path='local').inc()
+                    return RateDecision(True, key, rule.name)
+        
+        wanted = min(self.local_batch, max(rule.burst // 4, 1))
+        taken = take_tokens(key, rule.interval_us, rule.burst, wanted)
+        if taken is None:
+            rate_limit_checks.labels(scope=self.scope, path='unavailable').inc()
+            if self.fail_open:
+                return RateDecision(True, key, rule.name)
+            return self._reject(key, rule, 1.0)
+        
+        rate_limit_checks.labels(scope=self.scope, path='redis').inc()
+        granted, retry_after = taken
+        with self._lock:
+            if len(self._buckets) >= MAX_LOCAL_KEYS:
+                self._prune(now)
+            bucket = self._buckets.setdefault(key, _LocalBucket())
+            if not granted:
+                bucket.blocked_until = now + retry_after
+                return self._reject(key, rule, retry_after)
+            bucket.tokens = granted - 1
+            bucket.expires_at = now + self.burst_seconds
+        return RateDecision(True, key, rule.name)
+    
+    def _reject(self, key: str, rule: RateRule, retry_after: float) -> RateDecision:
+        rate_limit_throttled.labels(scope=self.scope, rule=rule.name).inc()
+        return RateDecision(False, key, rule.name, retry_after)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(scope: str) -> RateLimiter:
+    """Process-wide limiter for a scope (worker, api)"""
+    limiter = _limiters.get(scope)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(scope, RateLimiter(scope))
+    return limiter
+
+
+def check_rate_limit(scope: str, source: str, tenant: Optional[str] = None) -> RateDecision:
+    """
+    Check a request against its source's rate limit (always allowed unless RATE_LIMIT_ENABLED)
+    
+    Args:
+        scope: Calling service, for metrics (worker, api)
+        source: Job source or caller class
+        tenant: Optional finer key within the source
+    
+    Returns:
+        RateDecision
+    """
+    if not config.rate_limit.enabled:
+        return RateDecision(True, limit_key(source, tenant))
+    return get_rate_limiter(scope).check(source, tenant)
@@ -0,0 +1,107 @@
+"""
+Canonical job snapshot format for CUIDA+Care
+Shared by the worker (cache write-through) and the API (cache reads)
+"""
+from typing import Optional, Any, Dict
+
+from .config import config
+from .models import Job, JobStatus
+
+# Bump when the snapshot shape changes; older cached entries are then ignored
+SNAPSHOT_VERSION = 3
+
+# Fields of a job snapshot, matching the API's JobResponse
+JOB_SNAPSHOT_FIELDS = (
+    'job_id',
+    'message_id',
+    'status',
+    'payload',
+    'payload_hash',
+    'result',
+    'error_message',
+    'retry_count',
+    'max_retries',
+    'created_at',
+    'updated_at',
+    'started_at',
+    'completed_at',
+    'source',
+    'correlation_id',
+    'priority',
+)
+
+# Statuses a job does not leave
+TERMINAL_STATUSES = frozenset({
+    JobStatus.COMPLETED.value,
+    JobStatus.FAILED.value,
+    JobStatus.DEAD_LETTER.value,
+})
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def encode_job(job: Job) -> Dict[str, Any]:
+    """
+    Build the canonical snapshot of a job
+    
+    Args:
+        job: Job (or JobArchive) model instance (flushed, so server defaults are loaded)
+        
+    Returns:
+        JSON-serializable snapshot dictionary
+    """
+    return {
+        'v': SNAPSHOT_VERSION,
+        'job_id': job.job_id,
+        'message_id': job.message_id,
+        'status': job.status.value if job.status else None,
+        'payload': job.payload,
+        'payload_hash': job.payload_hash,
+        'result': job.result,
+        'error_message': job.error_message,
+        'retry_count': job.retry_count or 0,
+        'max_retries': job.max_retries if job.max_retries is not None else 3,
+        'created_at': _isoformat(job.created_at),
+        'updated_at': _isoformat(job.updated_at),
+        'started_at': _isoformat(job.started_at),
+        'completed_at': _isoformat(job.completed_at),
+        'source': job.source,
+        'correlation_id': job.correlation_id,
+        'priority': job.priority or 0,
+    }
+
+
+def decode_job(data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Validate a cached snapshot and return its fields
+    
+    Args:
+        data: Value read from the cache
+        
+    Returns:
+        Snapshot fields (without version), or None if the value is not a
+        snapshot of the current version
+    """
+    if not isinstance(data, dict) or data.get('v') != SNAPSHOT_VERSION:
+        return None
+    if not data.get('job_id') or not data.get('status'):
+        return None
+    return {field: data.get(field) for field in JOB_SNAPSHOT_FIELDS}
+
+
+def snapshot_ttl(status: Optional[str]) -> int:
+    """
+    Cache TTL for a snapshot: short while the job can still change, long once
+    terminal or when the change feed keeps every snapshot current
+    
+    Args:
+        status: Job status value
+        
+    Returns:
+        TTL in seconds
+    """
+    if status in TERMINAL_STATUSES or config.change_feed.enabled:
+        return config.redis.ttl_job
+    return config.redis.ttl_job_active
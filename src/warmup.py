@@ -0,0 +1,170 @@
+"""
+Startup warm-up for cold Cloud Run instances
+Pre-opens database and Redis pools and precomputes hot cache keys
+before /readiness reports ready
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import text
+
+from .config import config
+from .logging_config import get_logger
+from .database import get_engine, get_replica_engines
+from .cache import get_redis_client
+
+logger = get_logger(__name__)
+
+# Prometheus metrics
+warmup_duration = Gauge('warmup_duration_seconds', 'Time spent in startup warm-up')
+warmup_task_duration = Gauge('warmup_task_duration_seconds', 'Time spent per warm-up task', ['task'])
+warmup_tasks = Counter('warmup_tasks_total', 'Warm-up tasks by outcome', ['task', 'result'])
+
+# Registered warm-up tasks, run in order: (name, callable)
+_tasks: List[Tuple[str, Callable[[], Any]]] = []
+
+_status: Dict[str, Any] = {'status': 'pending'}
+_ready = threading.Event()
+_started = False
+_start_lock = threading.Lock()
+
+
+def register_warmup_task(name: str, task: Callable[[], Any]):
+    """
+    Register a task to run during warm-up
+    
+    Args:
+        name: Task name for logs and metrics
+        task: Callable with no arguments; must manage its own sessions
+    """
+    _tasks.append((name, task))
+
+
+def _open_connections(engine, count: int):
+    """Open count connections concurrently and return them to the pool"""
+    def open_connection(_):
+        conn = engine.connect()
+        conn.execute(text("SELECT 1"))
+        return conn
+    
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        connections = list(executor.map(open_connection, range(count)))
+    
+    for conn in connections:
+        conn.close()
+
+
+def warm_db_pool():
+    """Pre-open the primary pool and any read replica pools"""
+    _open_connections(get_engine(), config.warmup.db_connections or config.database.pool_size)
+    for replica in get_replica_engines():
+        _open_connections(replica.engine, config.database.replica_pool_size)
+
+
+def warm_redis_pool():
+    """Open Redis pool connections concurrently"""
+    client = get_redis_client()
+    count = config.warmup.redis_connections
+    
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        list(executor.map(lambda _: client.ping(), range(count)))
+
+
+register_warmup_task("db_pool", warm_db_pool)
+register_warmup_task("redis_pool", warm_redis_pool)
+
+
+def run_warmup(budget_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run registered warm-up tasks within a time budget
+    
+    Tasks run in registration order. Once the budget is spent the remaining
+    tasks are skipped; a task still running at the deadline is left to
+    finish in the background. Failures are logged and never block readiness.
+    
+    Args:
+        budget_seconds: Total time budget (default from config)
+        
+    Returns:
+        Warm-up status dictionary
+    """
+    budget = config.warmup.budget_seconds if budget_seconds is None else budget_seconds
+    start = time.monotonic()
+    deadline = start + budget
+    results = {}
+    
+    _status.update({'status': 'warming_up', 'started_at': datetime.utcnow().isoformat()})
+    logger.info("Warm-up started", budget_seconds=budget, tasks=[name for name, _ in _tasks])
+    
+    for name, task in _tasks:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            results[name] = 'skipped'
+            warmup_tasks.labels(task=name, result='skipped').inc()
+            continue
+        
+        outcome = {}
+        
+        def run(task=task, outcome=outcome):
+            try:
+                task()
+                outcome['result'] = 'ok'
+            except Exception as e:
+                outcome['result'] = 'failed'
+                outcome['error'] = str(e)
+        
+        task_start = time.monotonic()
+        worker = threading.Thread(target=run, name=f"warmup-{name}", daemon=True)
+        worker.start()
+        worker.join(timeout=remaining)
+        
+        result = outcome.get('result', 'timeout')
+        results[name] = result
+        warmup_tasks.labels(task=name, result=result).inc()
+        warmup_task_duration.labels(task=name).set(time.monotonic() - task_start)
+        if result != 'ok':
+            logger.warning("Warm-up task did not complete", task=name, result=result, error=outcome.get('error'))
+    
+    duration = time.monotonic() - start
+    warmup_duration.set(duration)
+    _status.update({
+        'status': 'ready',
+        'duration_seconds': round(duration, 3),
+        'tasks': results,
+        'completed_at': datetime.utcnow().isoformat()
+    })
+    _ready.set()
+    
+    logger.info("Warm-up finished", duration_seconds=duration, tasks=results)
+    return dict(_status)
+
+
+def start_warmup():
+    """Run warm-up once per process in a background thread"""
+    global _started
+    
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    
+    if not config.warmup.enabled:
+        _status.update({'status': 'ready', 'tasks': {}})
+        _ready.set()
+        return
+    
+    threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
+
+
+def is_ready() -> bool:
+    """Whether warm-up has finished (or is disabled)"""
+    return _ready.is_set()
+
+
+def get_warmup_status() -> Dict[str, Any]:
+    """Get warm-up status for readiness responses"""
+    return dict(_status)
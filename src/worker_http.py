@@ -1,19 +1,38 @@
 from flask import Flask, request, jsonify
+import atexit
 import base64
+import json
+import math
 import os
-import uuid
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from sqlalchemy import text
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.dialects import postgresql
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 
 from .config import config
 from .logging_config import get_logger
-from .database import get_db_session, init_db, close_db_connections
+from .database import get_db_session, get_engine, init_db, close_db_connections
 from .models import Job, EventLog, JobStatus
-from .cache import (
-    get_cached_job, cache_job, invalidate_job,
-    get_cache_stats, close_redis_connection
+from .snapshots import encode_job
+from .ids import new_id
+from .payloads import store_payload, store_payloads
+from .processing import process_message
+from .change_feed import start_change_feed
+from .lanes import LaneGate, job_priority, lane_for
+from .ratelimit import check_rate_limit
+from .leases import hold_lease, lease_expiry, start_lease_reaper, stop_lease_reaper
+from .outbox import (
+    TOPIC_JOB_LISTS, TOPIC_JOB_METRICS, TOPIC_JOB_SNAPSHOT,
+    enqueue, enqueue_many, notify_relay, start_outbox_relay, stop_outbox_relay
 )
+from .queue_worker import ClaimedJob, JobOutcome, finalize_outcomes
+from .partitions import run_maintenance
+from .warmup import register_warmup_task, start_warmup, is_ready, get_warmup_status
+from .cache import pin_primary, get_cache_stats, close_redis_connection
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -25,8 +44,9 @@ try:
     import sys
     import os
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-    from monitoring import get_monitoring_exporter
+    from monitoring import start_cache_metrics_exporter
     monitoring_enabled = True
+    start_cache_metrics_exporter(config.redis.stats_export_interval)
     logger.info("Cloud Monitoring integration enabled")
 except ImportError as e:
     monitoring_enabled = False
@@ -38,6 +58,63 @@ job_duration = Histogram('job_duration_seconds', 'Job processing duration')
 cache_hits = Counter('cache_hits_total', 'Cache hits')
 cache_misses = Counter('cache_misses_total', 'Cache misses')
 active_jobs = Gauge('active_jobs', 'Number of jobs currently processing')
+push_batch_size = Histogram(
+    'push_batch_messages', 'Messages per bulk push request',
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500)
+)
+
+# Bounded parallelism for bulk push processing, shared by all requests
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+# Per-lane caps on concurrent push requests (PUSH_LANE_CONCURRENCY)
+_push_lanes = LaneGate()
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+
+_ID_TYPE = Job.__table__.c.job_id.type.compile(dialect=postgresql.dialect())
+_RETURNING = ", ".join(f"jobs.{column.name}" for column in Job.__table__.columns)
+
+# Bulk push inserts: one row per array element, so a batch of any size is a
+# single statement with a handful of parameters (a multi-row VALUES list
+# costs more to compile and bind than to execute)
+INSERT_JOBS_SQL = text(f"""
+    INSERT INTO jobs (
+        job_id, message_id, status, priority, payload_hash, retry_count, max_retries,
+        started_at, lease_expires_at, source, correlation_id
+    )
+    SELECT CAST(v.job_id AS {_ID_TYPE}), v.message_id, :status, v.priority, v.payload_hash, 0, :max_retries,
+           now(), now() + make_interval(secs => :lease_seconds), 'pubsub', :correlation_id
+    FROM unnest(
+        CAST(:job_ids AS text[]), CAST(:message_ids AS text[]), CAST(:priorities AS smallint[]),
+        CAST(:payload_hashes AS text[])
+    ) AS v(job_id, message_id, priority, payload_hash)
+    RETURNING {_RETURNING}
+""").bindparams(bindparam('status', type_=Job.__table__.c.status.type)).columns(*Job.__table__.columns)
+
+INSERT_EVENTS_SQL = text(f"""
+    INSERT INTO event_logs (event_id, event_type, job_id, data, event_metadata, correlation_id)
+    SELECT CAST(v.event_id AS {_ID_TYPE}), 'message.received', CAST(v.job_id AS {_ID_TYPE}),
+           CAST(v.data AS json), CAST(v.metadata AS json), :correlation_id
+    FROM unnest(
+        CAST(:event_ids AS text[]), CAST(:job_ids AS text[]), CAST(:data AS text[]), CAST(:metadata AS text[])
+    ) AS v(event_id, job_id, data, metadata)
+""")
+
+# Keep future event_logs partitions ready (retention runs from manage_partitions.py)
+register_warmup_task("event_partitions", lambda: run_maintenance(retention=False))
+
+# Pre-open DB and Redis pools before /readiness reports ready
+start_warmup()
+
+# Keep cached snapshots coherent with writes from any source (CHANGE_FEED_ENABLED)
+start_change_feed()
+
+# Deliver post-commit side effects recorded in the outbox
+start_outbox_relay()
+
+# Recover jobs left PROCESSING by instances that died mid-request
+start_lease_reaper()
 
 # Initialize database on startup
 @app.before_request
@@ -82,10 +159,17 @@ def cache_stats_endpoint():
 
 @app.route("/readiness", methods=["GET"])
 def readiness():
-    """Readiness check - verifies database and cache connectivity"""
+    """Readiness check - waits for warm-up, then verifies database and cache connectivity"""
     db_status = 'disconnected'
     cache_status = 'disconnected'
     
+    if not is_ready():
+        return jsonify({
+            'status': 'warming_up',
+            'warmup': get_warmup_status(),
+            'timestamp': datetime.utcnow().isoformat()
+        }), 503
+    
     try:
         # Check database
         with get_db_session() as session:
@@ -122,139 +206,234 @@ def readiness():
         }), 503
 
 
-@app.route("/pubsub/push", methods=["POST"])
-def pubsub_push():
-    """HTTP endpoint for Pub/Sub push subscription with database tracking"""
-    correlation_id = str(uuid.uuid4())
+def _decode_envelope(envelope: Any) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Decode a Pub/Sub push envelope
     
-    try:
-        envelope = request.get_json()
-        if not envelope:
-            logger.warning("Bad request: no JSON body", correlation_id=correlation_id)
-            return ("Bad Request: no JSON body", 400)
+    Returns:
+        (message_id, payload text, attributes)
+    
+    Raises:
+        ValueError: Not an envelope, no message field, or data that is not base64 UTF-8
+    """
+    if not isinstance(envelope, dict):
+        raise ValueError("envelope is not a JSON object")
+    message = envelope.get("message")
+    if not message:
+        raise ValueError("no message field")
+    if not isinstance(message, dict):
+        raise ValueError("message is not a JSON object")
+    
+    message_id = message.get('messageId', 'unknown')
+    data = message.get("data")
+    if data is not None and not isinstance(data, str):
+        raise ValueError("message data is not a base64 string")
+    payload = base64.b64decode(data).decode("utf-8") if data else ""
+    attributes = message.get('attributes')
+    if attributes is None:
+        attributes = {}
+    elif not isinstance(attributes, dict):
+        raise ValueError("message attributes is not a JSON object")
+    return message_id, payload, attributes
 
-        message = envelope.get("message")
-        if not message:
-            logger.warning("Bad request: no message field", correlation_id=correlation_id)
-            return ("Bad Request: no message field", 400)
 
-        message_id = message.get('messageId', 'unknown')
-        data = message.get("data")
-        payload = base64.b64decode(data).decode("utf-8") if data else ""
-        attributes = message.get('attributes', {})
+def _handle_push(
+    message_id: str,
+    payload: str,
+    attributes: Dict[str, Any],
+    priority: int,
+    correlation_id: str
+):
+    """Persist, process and finalize one admitted push message (see pubsub_push)"""
+    logger.info(
+        "Received Pub/Sub message",
+        message_id=message_id,
+        correlation_id=correlation_id,
+        payload_preview=payload[:100] if payload else None
+    )
+    
+    # Create job and event log in database (time-ordered ids keep index inserts local)
+    job_id = new_id()
+    
+    with get_db_session() as session:
+        # Store the body once; the job and its event reference it by hash
+        payload_ref = store_payload(session, {'data': payload, 'attributes': attributes})
         
-        logger.info(
-            "Received Pub/Sub message",
+        # Create job record, leased to this worker while the message is processed
+        job = Job(
+            job_id=job_id,
             message_id=message_id,
+            status=JobStatus.PROCESSING,
+            payload_hash=payload_ref,
+            source='pubsub',
+            priority=priority,
             correlation_id=correlation_id,
-            payload_preview=payload[:100] if payload else None
+            started_at=datetime.utcnow(),
+            lease_expires_at=lease_expiry()
         )
+        session.add(job)
         
-        # Create job and event log in database
-        job_id = str(uuid.uuid4())
+        # Create event log
+        event = EventLog(
+            event_id=new_id(),
+            event_type='message.received',
+            job_id=job_id,
+            data={'message_id': message_id, 'payload_hash': payload_ref},
+            event_metadata={'attributes': attributes},
+            correlation_id=correlation_id
+        )
+        session.add(event)
         
-        with get_db_session() as session:
-            # Create job record
-            job = Job(
+        # Committed before processing: if this instance dies, the lease reaper recovers the job
+        session.flush()
+        enqueue(session, TOPIC_JOB_SNAPSHOT, encode_job(job))
+    
+    notify_relay()
+    
+    # Process message
+    active_jobs.inc()
+    start_time = datetime.utcnow()
+    outcome = {}
+    
+    try:
+        with hold_lease(job_id):
+            outcome['result'] = process_message(payload, attributes)
+    except Exception as process_error:
+        outcome['error'] = process_error
+    finally:
+        active_jobs.dec()
+    
+    with get_db_session() as session:
+        job = session.execute(
+            select(Job).where(Job.job_id == job_id).with_for_update()
+        ).scalar_one_or_none()
+        
+        # The reaper got here first (the lease ran out): leave its decision in place and
+        # nack, since it failed the job expecting Pub/Sub to redeliver (REDELIVERED_SOURCES)
+        if job is None or job.status != JobStatus.PROCESSING:
+            messages_processed.labels(status='lease_lost').inc()
+            logger.warning(
+                "Job lease lost before completion",
+                job_id=job_id,
+                status=job.status.value if job else None,
+                correlation_id=correlation_id
+            )
+            return jsonify({"status": "lease_lost", "job_id": job_id, "correlation_id": correlation_id}), 409
+        
+        job.lease_expires_at = None
+        
+        if 'error' not in outcome:
+            job.status = JobStatus.COMPLETED
+            job.result = outcome['result']
+            job.completed_at = datetime.utcnow()
+            
+            # Track metrics
+            duration = (job.completed_at - start_time).total_seconds()
+            job_duration.observe(duration)
+            messages_processed.labels(status='success').inc()
+            
+            # Export to Cloud Monitoring after commit (via the outbox)
+            if monitoring_enabled:
+                enqueue(session, TOPIC_JOB_METRICS, {
+                    'duration_seconds': duration,
+                    'status': 'completed',
+                    'active_jobs': active_jobs._value._value
+                })
+            
+            logger.info(
+                "Message processed successfully",
                 job_id=job_id,
                 message_id=message_id,
-                status=JobStatus.PROCESSING,
-                payload={'data': payload, 'attributes': attributes},
-                source='pubsub',
                 correlation_id=correlation_id,
-                started_at=datetime.utcnow()
+                duration_seconds=duration
             )
-            session.add(job)
+        else:
+            process_error = outcome['error']
+            job.status = JobStatus.FAILED
+            job.error_message = str(process_error)
+            job.retry_count += 1
             
-            # Create event log
-            event = EventLog(
-                event_id=str(uuid.uuid4()),
-                event_type='message.received',
+            # Track metrics
+            messages_processed.labels(status='failed').inc()
+            
+            logger.error(
+                "Message processing failed",
                 job_id=job_id,
-                data={'message_id': message_id, 'payload': payload},
-                event_metadata={'attributes': attributes},
+                error=str(process_error),
                 correlation_id=correlation_id
             )
-            session.add(event)
-            session.flush()
-            
-            # Process message
-            active_jobs.inc()
-            start_time = datetime.utcnow()
             
-            try:
-                result = process_message(payload, attributes)
-                
-                job.status = JobStatus.COMPLETED
-                job.result = result
-                job.completed_at = datetime.utcnow()
-                
-                # Track metrics
-                duration = (job.completed_at - start_time).total_seconds()
-                job_duration.observe(duration)
-                messages_processed.labels(status='success').inc()
-                
-                # Export to Cloud Monitoring
-                if monitoring_enabled:
-                    try:
-                        exporter = get_monitoring_exporter()
-                        exporter.write_time_series("job_processing_latency", duration * 1000, metric_labels={"status": "completed"})
-                        exporter.write_time_series("active_jobs", active_jobs._value._value)
-                    except Exception as mon_error:
-                        logger.warning("Failed to export metrics to Cloud Monitoring", error=str(mon_error))
-                
-                # Cache the completed job
-                job_dict = {
-                    'job_id': job.job_id,
-                    'message_id': job.message_id,
-                    'status': job.status.value,
-                    'payload': job.payload,
-                    'result': job.result,
-                    'created_at': job.created_at.isoformat() if job.created_at else None,
-                    'completed_at': job.completed_at.isoformat() if job.completed_at else None,
-                    'correlation_id': job.correlation_id
-                }
-                cache_job(job_dict)
-                
-                logger.info(
-                    "Message processed successfully",
-                    job_id=job_id,
-                    message_id=message_id,
-                    correlation_id=correlation_id,
-                    duration_seconds=duration
-                )
-            except Exception as process_error:
-                job.status = JobStatus.FAILED
-                job.error_message = str(process_error)
-                job.retry_count += 1
-                
-                # Track metrics
-                messages_processed.labels(status='failed').inc()
-                
-                # Invalidate cache if exists
-                invalidate_job(job_id)
-                
-                logger.error(
-                    "Message processing failed",
+            # Check if should send to DLQ
+            if job.retry_count >= job.max_retries:
+                job.status = JobStatus.DEAD_LETTER
+                messages_processed.labels(status='dead_letter').inc()
+                logger.warning(
+                    "Message moved to dead letter",
                     job_id=job_id,
-                    error=str(process_error),
+                    retry_count=job.retry_count,
                     correlation_id=correlation_id
                 )
-                
-                # Check if should send to DLQ
-                if job.retry_count >= job.max_retries:
-                    job.status = JobStatus.DEAD_LETTER
-                    messages_processed.labels(status='dead_letter').inc()
-                    logger.warning(
-                        "Message moved to dead letter",
-                        job_id=job_id,
-                        retry_count=job.retry_count,
-                        correlation_id=correlation_id
-                    )
-            finally:
-                active_jobs.dec()
         
-        return jsonify({"status": "processed", "job_id": job_id}), 200
+        # Flush the final state so the snapshot carries server timestamps
+        session.flush()
+        snapshot = encode_job(job)
+        
+        # Cache write-through happens only if this transaction commits
+        enqueue(session, TOPIC_JOB_SNAPSHOT, snapshot)
+        if snapshot['status'] != JobStatus.COMPLETED.value:
+            enqueue(session, TOPIC_JOB_LISTS, {'job_id': job_id})
+    
+    notify_relay()
+    
+    # Read-your-writes: API reads for this correlation id go to the primary for a while
+    if config.database.replica_targets:
+        pin_primary(correlation_id)
+    
+    return jsonify({"status": "processed", "job_id": job_id, "correlation_id": correlation_id}), 200
+
+
+@app.route("/pubsub/push", methods=["POST"])
+def pubsub_push():
+    """HTTP endpoint for Pub/Sub push subscription with database tracking"""
+    correlation_id = request.headers.get('X-Correlation-ID') or new_id()
+    
+    try:
+        envelope = request.get_json()
+        if not envelope:
+            logger.warning("Bad request: no JSON body", correlation_id=correlation_id)
+            return ("Bad Request: no JSON body", 400)
+        
+        try:
+            message_id, payload, attributes = _decode_envelope(envelope)
+        except ValueError as e:
+            logger.warning("Bad request", error=str(e), correlation_id=correlation_id)
+            return (f"Bad Request: {e}", 400)
+        
+        # Over its source's budget: Pub/Sub redelivers a rejected push with backoff
+        decision = check_rate_limit('worker', 'pubsub', attributes.get(config.rate_limit.key_attribute))
+        if not decision.allowed:
+            messages_processed.labels(status='throttled').inc()
+            logger.warning(
+                "Message throttled",
+                message_id=message_id,
+                limit_key=decision.key,
+                retry_after=decision.retry_after,
+                correlation_id=correlation_id
+            )
+            return ("Too Many Requests", 429, {'Retry-After': str(math.ceil(decision.retry_after))})
+        
+        # Lane admission: a full lane is refused (Pub/Sub redelivers with backoff) so bulk
+        # traffic cannot take every thread from high and normal priority messages
+        priority = job_priority('pubsub', attributes.get('priority'))
+        lane = lane_for(priority)
+        if not _push_lanes.try_acquire(lane):
+            messages_processed.labels(status='lane_full').inc()
+            logger.warning("Lane full", message_id=message_id, lane=lane, correlation_id=correlation_id)
+            return ("Too Many Requests", 429, {'Retry-After': '1'})
+        try:
+            return _handle_push(message_id, payload, attributes, priority, correlation_id)
+        finally:
+            _push_lanes.release(lane)
         
     except Exception as e:
         logger.error(
@@ -266,18 +445,248 @@ def pubsub_push():
         return ("Internal Server Error", 500)
 
 
-def process_message(payload: str, attributes: dict) -> dict:
-    """Process message - implement business logic here"""
-    return {
-        'processed': True,
-        'payload_length': len(payload),
-        'timestamp': datetime.utcnow().isoformat()
-    }
+def _read_envelopes() -> List[Any]:
+    """
+    Envelopes of a bulk push request: a JSON array, or NDJSON (one per line)
+    
+    An NDJSON line that is not valid JSON becomes None and is reported as
+    invalid on its own.
+    
+    Raises:
+        ValueError: The body is neither
+    """
+    if request.mimetype in NDJSON_CONTENT_TYPES:
+        envelopes = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                envelopes.append(json.loads(line))
+            except ValueError:
+                envelopes.append(None)
+        return envelopes
+    
+    envelopes = request.get_json(silent=True)
+    if not isinstance(envelopes, list):
+        raise ValueError("expected a JSON array of envelopes or NDJSON")
+    return envelopes
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """Get or create the bulk push processing pool"""
+    global _batch_executor
+    
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=config.pubsub.push_batch_concurrency,
+                    thread_name_prefix="push-batch"
+                )
+    return _batch_executor
+
+
+def _persist_batch(
+    messages: List[Tuple[str, str, Dict[str, Any]]],
+    correlation_id: str
+) -> List[ClaimedJob]:
+    """
+    Create PROCESSING jobs and their message.received events for a batch in one transaction
+    
+    Args:
+        messages: (message_id, payload, attributes) per message
+        correlation_id: Correlation id of the request
+    
+    Returns:
+        The leased jobs, in message order
+    """
+    job_ids = [new_id() for _ in messages]
+    
+    with get_engine().begin() as conn:
+        hashes = store_payloads(
+            conn, [{'data': payload, 'attributes': attributes} for _, payload, attributes in messages]
+        )
+        rows = conn.execute(INSERT_JOBS_SQL, {
+            'status': JobStatus.PROCESSING,
+            'max_retries': Job.__table__.c.max_retries.default.arg,
+            'lease_seconds': config.leases.lease_seconds,
+            'correlation_id': correlation_id,
+            'job_ids': job_ids,
+            'message_ids': [message_id for message_id, _, _ in messages],
+            'priorities': [job_priority('pubsub', attributes.get('priority')) for _, _, attributes in messages],
+            'payload_hashes': hashes,
+        }).all()
+        conn.execute(INSERT_EVENTS_SQL, {
+            'correlation_id': correlation_id,
+            'event_ids': [new_id() for _ in messages],
+            'job_ids': job_ids,
+            'data': [
+                json.dumps({'message_id': message_id, 'payload_hash': payload_hash})
+                for (message_id, _, _), payload_hash in zip(messages, hashes)
+            ],
+            'metadata': [json.dumps({'attributes': attributes}) for _, _, attributes in messages],
+        })
+        enqueue_many(conn, TOPIC_JOB_SNAPSHOT, [encode_job(row) for row in rows])
+    
+    notify_relay()
+    
+    by_job_id = {str(row.job_id): row for row in rows}
+    claimed = []
+    for job_id, (_, payload, attributes) in zip(job_ids, messages):
+        row = by_job_id[str(job_id)]
+        claimed.append(ClaimedJob(
+            row.id, row.job_id, payload, attributes, correlation_id,
+            retry_count=row.retry_count or 0,
+            max_retries=row.max_retries if row.max_retries is not None else 3,
+            created_at=row.created_at
+        ))
+    return claimed
+
+
+def _run_claimed(job: ClaimedJob) -> JobOutcome:
+    """Process one persisted message under its lease"""
+    outcome = JobOutcome(job)
+    active_jobs.inc()
+    start = time.perf_counter()
+    try:
+        with hold_lease(job.job_id):
+            outcome.result = process_message(job.payload, job.attributes)
+    except Exception as e:
+        outcome.error = str(e)
+        logger.error("Message processing failed", job_id=job.job_id, error=str(e), correlation_id=job.correlation_id)
+    finally:
+        active_jobs.dec()
+    outcome.duration_seconds = time.perf_counter() - start
+    return outcome
+
+
+# Job status -> messages_processed label (as in pubsub_push)
+_PROCESSED_LABELS = {
+    JobStatus.COMPLETED.value: 'success',
+    JobStatus.FAILED.value: 'failed',
+    JobStatus.DEAD_LETTER.value: 'dead_letter',
+}
+
+
+@app.route("/pubsub/push/batch", methods=["POST"])
+def pubsub_push_batch():
+    """
+    Bulk push: many Pub/Sub-style envelopes per request (JSON array or NDJSON)
+    
+    Valid messages are persisted in one transaction, processed with
+    bounded parallelism (PUSH_BATCH_CONCURRENCY) and finalized in one
+    transaction. Each lane the request has messages for takes one
+    PUSH_LANE_CONCURRENCY slot; messages of a full lane are throttled.
+    Every message gets its own result (completed, failed, dead_letter,
+    lease_lost, throttled or invalid), in request order.
+    """
+    correlation_id = request.headers.get('X-Correlation-ID') or new_id()
+    
+    try:
+        envelopes = _read_envelopes()
+    except ValueError as e:
+        logger.warning("Bad request", error=str(e), correlation_id=correlation_id)
+        return (f"Bad Request: {e}", 400)
+    
+    limit = config.pubsub.push_batch_max_messages
+    if len(envelopes) > limit:
+        return (f"Payload Too Large: at most {limit} messages per request", 413)
+    push_batch_size.observe(len(envelopes))
+    
+    try:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(envelopes)
+        accepted: List[int] = []
+        messages = []
+        for index, envelope in enumerate(envelopes):
+            try:
+                message_id, payload, attributes = _decode_envelope(envelope)
+            except ValueError as e:
+                messages_processed.labels(status='invalid').inc()
+                results[index] = {'index': index, 'status': 'invalid', 'error': str(e)}
+                continue
+            
+            decision = check_rate_limit('worker', 'pubsub', attributes.get(config.rate_limit.key_attribute))
+            if not decision.allowed:
+                messages_processed.labels(status='throttled').inc()
+                results[index] = {
+                    'index': index, 'message_id': message_id, 'status': 'throttled',
+                    'retry_after': decision.retry_after
+                }
+                continue
+            
+            accepted.append(index)
+            messages.append((message_id, payload, attributes))
+        
+        # Lane admission: the request takes one slot in each lane it has messages for;
+        # messages of a full lane are throttled like over-budget ones
+        lanes = [lane_for(job_priority('pubsub', attributes.get('priority'))) for _, _, attributes in messages]
+        admitted = [lane for lane in dict.fromkeys(lanes) if _push_lanes.try_acquire(lane)]
+        try:
+            if len(admitted) < len(set(lanes)):
+                admitted_messages = []
+                for index, message, lane in zip(accepted, messages, lanes):
+                    if lane in admitted:
+                        admitted_messages.append((index, message))
+                        continue
+                    messages_processed.labels(status='lane_full').inc()
+                    results[index] = {
+                        'index': index, 'message_id': message[0], 'status': 'throttled', 'lane': lane,
+                        'retry_after': 1.0
+                    }
+                accepted = [index for index, _ in admitted_messages]
+                messages = [message for _, message in admitted_messages]
+            
+            if messages:
+                claimed = _persist_batch(messages, correlation_id)
+                outcomes = list(_get_batch_executor().map(_run_claimed, claimed))
+                statuses = finalize_outcomes(outcomes, retry_failed=False)
+                
+                for index, (message_id, _, _), outcome in zip(accepted, messages, outcomes):
+                    status = statuses[str(outcome.job.job_id)]
+                    messages_processed.labels(status=_PROCESSED_LABELS.get(status, status)).inc()
+                    if status == JobStatus.COMPLETED.value:
+                        job_duration.observe(outcome.duration_seconds)
+                    results[index] = {
+                        'index': index, 'message_id': message_id, 'job_id': str(outcome.job.job_id), 'status': status
+                    }
+                    if outcome.error is not None:
+                        results[index]['error'] = outcome.error
+                
+                if config.database.replica_targets:
+                    pin_primary(correlation_id)
+        finally:
+            for lane in admitted:
+                _push_lanes.release(lane)
+        
+        summary: Dict[str, int] = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        logger.info("Processed push batch", messages=len(envelopes), correlation_id=correlation_id, **summary)
+        
+        return jsonify({
+            "correlation_id": correlation_id,
+            "messages": len(envelopes),
+            "summary": summary,
+            "results": results,
+        }), 200
+        
+    except Exception as e:
+        logger.error(
+            "Unexpected error in push batch",
+            error=str(e),
+            error_type=type(e).__name__,
+            correlation_id=correlation_id
+        )
+        return ("Internal Server Error", 500)
 
 
-@app.teardown_appcontext
-def shutdown_session(exception=None):
-    """Close database and cache connections on shutdown"""
+@atexit.register
+def shutdown_connections():
+    """Stop background threads and close database and cache connections on process shutdown"""
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=False)
+    stop_lease_reaper()
+    stop_outbox_relay()
     close_db_connections()
     close_redis_connection()
 
@@ -68,6 +68,15 @@ resource "google_cloud_run_v2_service" "worker" {
         value = "INFO"
       }
       
+      startup_probe {
+        http_get {
+          path = "/readiness"
+        }
+        period_seconds    = 2
+        timeout_seconds   = 2
+        failure_threshold = 15
+      }
+      
       resources {
         limits = {
           cpu    = "1"
@@ -166,6 +175,15 @@ resource "google_cloud_run_v2_service" "api" {
         value = "INFO"
       }
       
+      startup_probe {
+        http_get {
+          path = "/readiness"
+        }
+        period_seconds    = 2
+        timeout_seconds   = 2
+        failure_threshold = 15
+      }
+      
       resources {
         limits = {
           cpu    = "1"
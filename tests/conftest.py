@@ -0,0 +1,63 @@
+"""
+Shared fixtures
+
+Database tests run against the configured database (DB_HOST/DB_NAME, with
+migrations applied) and are skipped when it is unreachable. The jobs they
+insert are deleted afterwards.
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import delete, insert, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import get_engine
+from src.ids import new_id
+from src.models import EventLog, Job, JobStatus
+
+
+@pytest.fixture
+def make_jobs():
+    """Factory inserting test jobs: make_jobs(count, **column values) -> [(id, job_id)]"""
+    try:
+        engine = get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"Database unavailable: {e}")
+    
+    created = []
+    
+    def make(count, **values):
+        rows = []
+        for _ in range(count):
+            job_id = new_id()
+            rows.append({
+                'job_id': job_id, 'message_id': f"test-{job_id}", 'status': JobStatus.PENDING,
+                'payload': {'test': True}, 'source': 'test', 'retry_count': 0, 'max_retries': 3,
+                **values
+            })
+        with engine.begin() as conn:
+            result = conn.execute(insert(Job).returning(Job.id, Job.job_id, sort_by_parameter_order=True), rows)
+            jobs = [(row.id, str(row.job_id)) for row in result]
+        created.extend(jobs)
+        return jobs
+    
+    yield make
+    
+    if created:
+        with engine.begin() as conn:
+            conn.execute(delete(EventLog).where(EventLog.job_id.in_([job_id for _, job_id in created])))
+            conn.execute(delete(Job).where(Job.id.in_([id for id, _ in created])))
+
+
+@pytest.fixture
+def job_rows():
+    """Reads the current jobs rows: job_rows(ids) -> {id: row}"""
+    def fetch(ids):
+        with get_engine().connect() as conn:
+            rows = conn.execute(Job.__table__.select().where(Job.id.in_(ids))).all()
+        return {row.id: row for row in rows}
+    return fetch
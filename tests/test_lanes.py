@@ -0,0 +1,158 @@
+"""
+Priority lanes (src/lanes.py): weighted fair dequeueing, per-lane caps and
+push admission
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.lanes import (
+    LANE_BULK, LANE_HIGH, LANE_NORMAL, LaneGate, LaneScheduler, job_priority, lane_for
+)
+
+UNCAPPED = {LANE_HIGH: 1000, LANE_NORMAL: 1000, LANE_BULK: 1000}
+
+
+def _dispatch(scheduler, count):
+    """Pop (and immediately finish) up to count jobs; returns the lanes in dispatch order"""
+    order = []
+    for _ in range(count):
+        picked = scheduler.pop()
+        if picked is None:
+            break
+        lane, _, _ = picked
+        scheduler.done(lane)
+        order.append(lane)
+    return order
+
+
+def test_lane_for_priority():
+    assert lane_for(5) == LANE_HIGH
+    assert lane_for(0) == LANE_NORMAL
+    assert lane_for(None) == LANE_NORMAL
+    assert lane_for(-1) == LANE_BULK
+
+
+def test_job_priority_clamps_and_falls_back():
+    assert job_priority('pubsub', '7') == 7
+    assert job_priority('pubsub', 10 ** 6) == 32767
+    assert job_priority('pubsub', 'urgent') == job_priority('pubsub')
+
+
+def test_busy_lanes_share_dispatches_by_weight():
+    scheduler = LaneScheduler({LANE_HIGH: 8, LANE_NORMAL: 4, LANE_BULK: 1}, UNCAPPED)
+    for lane in (LANE_HIGH, LANE_NORMAL, LANE_BULK):
+        for n in range(200):
+            scheduler.push(lane, (lane, n))
+    
+    counts = Counter(_dispatch(scheduler, 130))
+    assert counts == {LANE_HIGH: 80, LANE_NORMAL: 40, LANE_BULK: 10}
+
+
+def test_lane_keeps_fifo_order():
+    scheduler = LaneScheduler(None, UNCAPPED)
+    for n in range(3):
+        scheduler.push(LANE_NORMAL, n)
+    assert [scheduler.pop()[1] for _ in range(3)] == [0, 1, 2]
+
+
+def test_only_lane_with_work_gets_every_dispatch():
+    scheduler = LaneScheduler({LANE_HIGH: 8, LANE_NORMAL: 4, LANE_BULK: 1}, UNCAPPED)
+    for n in range(20):
+        scheduler.push(LANE_BULK, n)
+    assert _dispatch(scheduler, 20) == [LANE_BULK] * 20
+    assert scheduler.pop() is None
+
+
+def test_concurrency_cap_holds_lane_until_a_job_finishes():
+    scheduler = LaneScheduler({LANE_HIGH: 1, LANE_NORMAL: 1, LANE_BULK: 1}, {LANE_HIGH: 5, LANE_NORMAL: 5, LANE_BULK: 2})
+    for n in range(5):
+        scheduler.push(LANE_BULK, n)
+    
+    assert scheduler.pop()[0] == LANE_BULK
+    assert scheduler.pop()[0] == LANE_BULK
+    assert scheduler.pop() is None
+    
+    # Another lane is not blocked by bulk being at its cap
+    scheduler.push(LANE_HIGH, 'h')
+    assert scheduler.pop()[:2] == (LANE_HIGH, 'h')
+    
+    scheduler.done(LANE_BULK)
+    assert scheduler.pop()[0] == LANE_BULK
+    assert scheduler.status()[LANE_BULK] == {'waiting': 2, 'running': 2}
+
+
+def test_room_is_bounded_by_cap():
+    scheduler = LaneScheduler(None, {LANE_HIGH: 3, LANE_NORMAL: 3, LANE_BULK: 3})
+    assert scheduler.room(LANE_NORMAL) == 3
+    scheduler.push(LANE_NORMAL, 1)
+    scheduler.push(LANE_NORMAL, 2)
+    assert scheduler.room(LANE_NORMAL) == 1
+    scheduler.push(LANE_NORMAL, 3)
+    scheduler.push(LANE_NORMAL, 4)
+    assert scheduler.room(LANE_NORMAL) == 0
+
+
+def test_idle_lane_gets_no_credit_for_time_without_work():
+    scheduler = LaneScheduler({LANE_HIGH: 1, LANE_NORMAL: 1, LANE_BULK: 1}, UNCAPPED)
+    for n in range(300):
+        scheduler.push(LANE_NORMAL, n)
+    _dispatch(scheduler, 100)
+    
+    # High was idle for 100 dispatches: with equal weights it now alternates
+    # with normal instead of running 100 jobs in a row
+    for n in range(100):
+        scheduler.push(LANE_HIGH, n)
+    order = _dispatch(scheduler, 20)
+    assert order[:4].count(LANE_NORMAL) >= 1
+    assert abs(order.count(LANE_HIGH) - order.count(LANE_NORMAL)) <= 2
+
+
+def test_drain_returns_unstarted_jobs():
+    scheduler = LaneScheduler(None, UNCAPPED)
+    scheduler.push(LANE_HIGH, 'a')
+    scheduler.push(LANE_BULK, 'b')
+    scheduler.pop()
+    assert len(scheduler.drain()) == 1
+    assert scheduler.waiting() == 0
+
+
+def test_gate_refuses_full_lane_only():
+    gate = LaneGate({LANE_BULK: 2})
+    assert gate.try_acquire(LANE_BULK)
+    assert gate.try_acquire(LANE_BULK)
+    assert not gate.try_acquire(LANE_BULK)
+    
+    # Uncapped lanes are bounded only by the server's threads
+    assert all(gate.try_acquire(LANE_HIGH) for _ in range(50))
+    
+    gate.release(LANE_BULK)
+    assert gate.try_acquire(LANE_BULK)
+    assert gate.status()[LANE_BULK] == {'running': 2, 'cap': 2}
+
+
+def test_gate_never_exceeds_cap_under_contention():
+    gate = LaneGate({LANE_BULK: 3})
+    peak = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(16)
+    
+    def worker():
+        barrier.wait()
+        for _ in range(200):
+            if gate.try_acquire(LANE_BULK):
+                with lock:
+                    peak.append(gate.status()[LANE_BULK]['running'])
+                gate.release(LANE_BULK)
+    
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert peak and max(peak) <= 3
+    assert gate.status()[LANE_BULK]['running'] == 0
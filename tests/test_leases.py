@@ -0,0 +1,74 @@
+"""
+Lease renewal and the expired-lease reaper (src/leases.py)
+
+Runs against the configured database; skipped when it is unreachable.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import get_engine
+from src.leases import LEASE_EXPIRED_MESSAGE, renew_leases, run_reaper
+from src.models import EventLog, JobStatus
+
+
+def _expired():
+    return datetime.now(timezone.utc) - timedelta(minutes=5)
+
+
+def test_reaper_requeues_fails_or_dead_letters(make_jobs, job_rows):
+    (requeued, _), = make_jobs(1, status=JobStatus.PROCESSING, lease_expires_at=_expired(),
+                               started_at=_expired())
+    (redelivered, _), = make_jobs(1, status=JobStatus.PROCESSING, lease_expires_at=_expired(), source='pubsub')
+    (exhausted, exhausted_job_id), = make_jobs(1, status=JobStatus.PROCESSING, lease_expires_at=_expired(),
+                                               retry_count=2)
+    
+    run_reaper()
+    
+    rows = job_rows([requeued, redelivered, exhausted])
+    assert rows[requeued].status == JobStatus.PENDING and rows[requeued].started_at is None
+    assert rows[redelivered].status == JobStatus.FAILED
+    assert rows[exhausted].status == JobStatus.DEAD_LETTER
+    for row in rows.values():
+        assert row.lease_expires_at is None
+        assert row.error_message == LEASE_EXPIRED_MESSAGE
+    assert rows[requeued].retry_count == 1 and rows[exhausted].retry_count == 3
+    
+    with get_engine().connect() as conn:
+        events = conn.execute(
+            select(EventLog.event_type, EventLog.data).where(EventLog.job_id == exhausted_job_id)
+        ).all()
+    assert [(event.event_type, event.data['status']) for event in events] == [
+        ('job.lease_expired', JobStatus.DEAD_LETTER.value)
+    ]
+
+
+def test_reaper_skips_live_leases(make_jobs, job_rows):
+    live = datetime.now(timezone.utc) + timedelta(minutes=5)
+    (job, _), = make_jobs(1, status=JobStatus.PROCESSING, lease_expires_at=live)
+    run_reaper()
+    assert job_rows([job])[job].status == JobStatus.PROCESSING
+
+
+def test_reaper_handles_null_counters(make_jobs, job_rows):
+    (job, _), = make_jobs(1, status=JobStatus.PROCESSING, lease_expires_at=_expired(),
+                          retry_count=None, max_retries=None)
+    run_reaper()
+    row = job_rows([job])[job]
+    assert row.status == JobStatus.PENDING and row.retry_count == 1
+
+
+def test_renewal_extends_lease_without_touching_updated_at(make_jobs, job_rows):
+    (processing, processing_job_id), = make_jobs(1, status=JobStatus.PROCESSING, lease_expires_at=_expired())
+    (_, completed_job_id), = make_jobs(1, status=JobStatus.COMPLETED)
+    before = job_rows([processing])[processing]
+    
+    assert renew_leases([processing_job_id, completed_job_id]) == {processing_job_id}
+    
+    after = job_rows([processing])[processing]
+    assert after.lease_expires_at > datetime.now(timezone.utc)
+    assert after.updated_at == before.updated_at
@@ -0,0 +1,87 @@
+"""
+Batched claim and finalize of pull-queue jobs (src/queue_worker.py)
+
+Runs against the configured database; skipped when it is unreachable.
+Test jobs use the top priority so they are claimed ahead of any others.
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.lanes import LANE_HIGH
+from src.models import JobStatus
+from src.queue_worker import JobOutcome, claim_jobs, finalize_outcomes, return_jobs
+
+TOP_PRIORITY = 32767
+
+
+def test_claim_takes_highest_priority_oldest_first(make_jobs, job_rows):
+    low = make_jobs(2, priority=TOP_PRIORITY - 1)
+    top = make_jobs(2, priority=TOP_PRIORITY)
+    
+    claimed = claim_jobs(3, lane=LANE_HIGH)
+    try:
+        assert [job.id for job in claimed] == [top[0][0], top[1][0], low[0][0]]
+        assert all(job.lane == LANE_HIGH for job in claimed)
+        assert claimed[0].payload == '{"test": true}'
+        
+        rows = job_rows([id for id, _ in top + low])
+        for job in claimed:
+            assert rows[job.id].status == JobStatus.PROCESSING
+            assert rows[job.id].started_at is not None
+            assert rows[job.id].lease_expires_at > datetime.now(timezone.utc)
+        assert rows[low[1][0]].status == JobStatus.PENDING
+    finally:
+        return_jobs(claimed)
+
+
+def test_claim_defaults_null_counters(make_jobs):
+    make_jobs(1, priority=TOP_PRIORITY, retry_count=None, max_retries=None)
+    claimed = claim_jobs(1, lane=LANE_HIGH)
+    assert (claimed[0].retry_count, claimed[0].max_retries) == (0, 3)
+    return_jobs(claimed)
+
+
+def test_finalize_moves_each_outcome_to_its_status(make_jobs, job_rows):
+    make_jobs(1, priority=TOP_PRIORITY)
+    make_jobs(1, priority=TOP_PRIORITY, retry_count=2)
+    make_jobs(1, priority=TOP_PRIORITY)
+    ok, exhausted, retried = claim_jobs(3, lane=LANE_HIGH)
+    
+    statuses = finalize_outcomes([
+        JobOutcome(ok, result={'done': 1}),
+        JobOutcome(exhausted, error='boom'),
+        JobOutcome(retried, error='boom'),
+    ])
+    assert statuses == {
+        ok.job_id: JobStatus.COMPLETED.value,
+        exhausted.job_id: JobStatus.DEAD_LETTER.value,
+        retried.job_id: JobStatus.PENDING.value,
+    }
+    
+    rows = job_rows([ok.id, exhausted.id, retried.id])
+    assert rows[ok.id].result == {'done': 1} and rows[ok.id].completed_at is not None
+    assert rows[exhausted.id].retry_count == 3 and rows[exhausted.id].error_message == 'boom'
+    assert rows[retried.id].retry_count == 1 and rows[retried.id].started_at is None
+    assert all(row.lease_expires_at is None for row in rows.values())
+
+
+def test_finalize_without_retry_fails_job(make_jobs):
+    make_jobs(1, priority=TOP_PRIORITY)
+    job, = claim_jobs(1, lane=LANE_HIGH)
+    assert finalize_outcomes([JobOutcome(job, error='boom')], retry_failed=False) == {
+        job.job_id: JobStatus.FAILED.value
+    }
+
+
+def test_finalize_leaves_reaped_job_alone(make_jobs, job_rows):
+    make_jobs(1, priority=TOP_PRIORITY)
+    job, = claim_jobs(1, lane=LANE_HIGH)
+    # The reaper took the job over in the meantime
+    return_jobs([job])
+    
+    assert finalize_outcomes([JobOutcome(job, result={'late': True})]) == {job.job_id: 'lease_lost'}
+    row = job_rows([job.id])[job.id]
+    assert row.status == JobStatus.PENDING and row.result is None
@@ -0,0 +1,92 @@
+"""
+GCRA rate limiting (src/cache.py take_tokens, src/ratelimit.py)
+
+Runs against the configured Redis (REDIS_HOST/REDIS_PORT); skipped when it
+is unreachable.
+"""
+import os
+import sys
+import time
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cache import CacheKey, cache_delete, get_redis_client, take_tokens
+from src.ratelimit import RateLimiter, RateRule, limit_key
+
+# One token per 10s: no refill between calls within a test
+SLOW_INTERVAL_US = 10_000_000
+
+
+@pytest.fixture
+def key():
+    try:
+        get_redis_client().ping()
+    except Exception as e:
+        pytest.skip(f"Redis unavailable: {e}")
+    key = f"test-gcra-{uuid.uuid4()}"
+    yield key
+    cache_delete(CacheKey.rate_limit(key))
+
+
+def test_rule_interval_and_burst():
+    assert RateRule('api', 100, 200).interval_us == 10_000
+    limiter = RateLimiter('test', rates={'default': 50, 'api': 0}, burst_seconds=2, local_batch=1)
+    assert limiter.rule_for('pubsub') == RateRule('default', 50, 100)
+    assert limiter.rule_for('api') is None
+    assert RateLimiter('test', rates={'default': 0.1}, burst_seconds=2).rule_for('x').burst == 1
+
+
+def test_full_bucket_grants_burst(key):
+    assert take_tokens(key, SLOW_INTERVAL_US, 5, wanted=3) == (3, 0.0)
+    # Only what is left of the burst is granted
+    assert take_tokens(key, SLOW_INTERVAL_US, 5, wanted=3) == (2, 0.0)
+
+
+def test_empty_bucket_reports_time_to_next_token(key):
+    assert take_tokens(key, SLOW_INTERVAL_US, 2, wanted=2) == (2, 0.0)
+    
+    granted, retry_after = take_tokens(key, SLOW_INTERVAL_US, 2, wanted=1)
+    assert granted == 0
+    # The first token refills one interval after the burst was spent
+    assert 9.5 < retry_after <= 10.0
+    
+    # A rejection takes nothing: the wait does not grow
+    _, again = take_tokens(key, SLOW_INTERVAL_US, 2, wanted=1)
+    assert again <= retry_after
+
+
+def test_bucket_refills_at_rate(key):
+    interval_us = 50_000  # 20/s
+    assert take_tokens(key, interval_us, 1, wanted=1) == (1, 0.0)
+    granted, retry_after = take_tokens(key, interval_us, 1, wanted=1)
+    assert granted == 0 and 0 < retry_after <= 0.05
+    
+    time.sleep(retry_after + 0.01)
+    assert take_tokens(key, interval_us, 1, wanted=1) == (1, 0.0)
+
+
+def test_limiter_batches_tokens_and_caches_rejection(key):
+    limiter = RateLimiter('test', rates={'default': 0.4}, burst_seconds=10, local_batch=10)
+    # rate 0.4/s, burst 4: one round trip takes burst // 4 = 1 token
+    decisions = [limiter.check(key) for _ in range(5)]
+    assert [decision.allowed for decision in decisions] == [True] * 4 + [False]
+    assert decisions[0].key == limit_key(key)
+    assert 2.0 < decisions[-1].retry_after <= 2.5
+    
+    # Rejected locally without another Redis round trip
+    cache_delete(CacheKey.rate_limit(key))
+    blocked = limiter.check(key)
+    assert not blocked.allowed and blocked.retry_after <= decisions[-1].retry_after
+
+
+def test_tenants_have_separate_buckets(key):
+    limiter = RateLimiter('test', rates={'default': 0.1}, burst_seconds=10, local_batch=1)
+    assert limiter.check(key, 'a').allowed
+    assert not limiter.check(key, 'a').allowed
+    tenant_b = limiter.check(key, 'b')
+    cache_delete(CacheKey.rate_limit(limit_key(key, 'a')))
+    cache_delete(CacheKey.rate_limit(limit_key(key, 'b')))
+    assert tenant_b.allowed
@@ -0,0 +1,69 @@
+"""
+Job snapshot writes are ordered by updated_at (src/cache.py)
+
+Runs against the configured Redis (REDIS_HOST/REDIS_PORT); skipped when it
+is unreachable.
+"""
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cache import cache_job, cache_jobs, get_cached_job, get_redis_client, invalidate_jobs
+from src.models import JobStatus
+from src.outbox import _deliver_snapshots
+from src.snapshots import encode_job
+
+
+@pytest.fixture
+def job_id():
+    try:
+        get_redis_client().ping()
+    except Exception as e:
+        pytest.skip(f"Redis unavailable: {e}")
+    job_id = f"test-cas-{uuid.uuid4()}"
+    yield job_id
+    invalidate_jobs([job_id])
+
+
+def _snapshot(job_id, status, updated_at):
+    job = SimpleNamespace(
+        job_id=job_id, message_id=f"msg-{job_id}", status=status, payload={}, payload_hash=None,
+        result=None, error_message=None, retry_count=0, max_retries=3, created_at=updated_at,
+        updated_at=updated_at, started_at=None, completed_at=None, source="test",
+        correlation_id=None, priority=0
+    )
+    return encode_job(job)
+
+
+def test_late_delivery_does_not_regress_status(job_id):
+    started = datetime.now(timezone.utc)
+    processing = _snapshot(job_id, JobStatus.PROCESSING, started)
+    completed = _snapshot(job_id, JobStatus.COMPLETED, started + timedelta(seconds=1))
+    
+    # Outbox batches delivered out of order (a retried batch lands last)
+    _deliver_snapshots([completed])
+    _deliver_snapshots([processing])
+    assert get_cached_job(job_id)['status'] == JobStatus.COMPLETED.value
+    
+    assert cache_job(processing)
+    assert get_cached_job(job_id)['status'] == JobStatus.COMPLETED.value
+
+
+def test_newer_snapshot_replaces_older(job_id):
+    started = datetime.now(timezone.utc)
+    assert cache_jobs([_snapshot(job_id, JobStatus.PROCESSING, started)])
+    assert cache_jobs([_snapshot(job_id, JobStatus.COMPLETED, started + timedelta(seconds=1))])
+    assert get_cached_job(job_id)['status'] == JobStatus.COMPLETED.value
+
+
+def test_same_version_is_rewritten(job_id):
+    updated_at = datetime.now(timezone.utc)
+    assert cache_job(_snapshot(job_id, JobStatus.PENDING, updated_at))
+    assert cache_job(_snapshot(job_id, JobStatus.PROCESSING, updated_at))
+    assert get_cached_job(job_id)['status'] == JobStatus.PROCESSING.value